@@ -1,4 +1,14 @@
-import React, {useState} from 'react'
+import React, {useState, useRef, useEffect} from 'react'
+
+const API = 'http://localhost:5000'
+
+const STAGE_LABELS = {
+  queued: 'Queued',
+  running: 'Starting',
+  ocr: 'Reading text',
+  translate: 'Translating',
+  render: 'Building output',
+}
 
 export default function FileUpload(){
   const [file, setFile] = useState(null)
@@ -6,22 +16,69 @@ export default function FileUpload(){
   const [output, setOutput] = useState('pdf')
   const [loading, setLoading] = useState(false)
   const [downloadUrl, setDownloadUrl] = useState(null)
+  const [progress, setProgress] = useState(null)
+  const events = useRef(null)
+
+  // close the progress stream if the component goes away mid-job
+  useEffect(() => () => events.current && events.current.close(), [])
 
   const onFile = (e) => {
     setFile(e.target.files[0])
     setDownloadUrl(null)
+    setProgress(null)
+  }
+
+  const fetchResult = async (jobId) => {
+    const res = await fetch(`${API}/api/jobs/${jobId}/result`)
+    if(!res.ok){
+      const err = await res.json()
+      throw new Error(err.error || JSON.stringify(err))
+    }
+    const untranslated = Number(res.headers.get('X-Untranslated-Segments') || 0)
+    if(untranslated) alert(`${untranslated} segment(s) could not be translated and were left as-is`)
+    // stream the file as blob and create object URL
+    const blob = await res.blob()
+    setDownloadUrl(URL.createObjectURL(blob))
   }
 
+  // follow the job's Server-Sent Events until it is done or failed
+  const follow = (jobId) => new Promise((resolve, reject) => {
+    const source = new EventSource(`${API}/api/jobs/${jobId}/events`)
+    events.current = source
+    const update = (patch) => setProgress(p => ({...p, ...patch}))
+    const on = (name, handler) => source.addEventListener(name, e => handler(JSON.parse(e.data)))
+
+    // a requeued job starts over, so its pages are counted afresh on each attempt
+    on('queued', () => update({stage: 'queued', pagesDone: new Set()}))
+    on('running', () => update({stage: 'running', pagesDone: new Set()}))
+    on('stage', d => {
+      if(d.status === 'started') update({stage: d.stage})
+      else setProgress(p => ({...p, timings: {...(p && p.timings), [d.stage]: d.seconds}}))
+    })
+    on('rasterized', d => update({pages: d.pages, rasterized: d.page}))
+    // keyed by page number, so an event delivered twice counts once
+    on('page', d => setProgress(p => ({...p, pages: d.pages, pagesDone: new Set((p && p.pagesDone) || []).add(d.page)})))
+    on('translated', d => update({segments: d.segments, segmentsTotal: d.total}))
+    on('done', () => { source.close(); resolve() })
+    on('failed', d => { source.close(); reject(new Error(d.error)) })
+    // EventSource reconnects on its own after network blips; only give up once it is closed
+    source.onerror = () => {
+      if(source.readyState === EventSource.CLOSED) reject(new Error('lost connection to the server'))
+    }
+  })
+
   const submit = async () => {
     if(!file) return alert('pick a file')
     setLoading(true)
+    setDownloadUrl(null)
+    setProgress({stage: 'queued'})
     const fd = new FormData()
     fd.append('file', file)
     fd.append('target', target)
     fd.append('output', output)
 
     try{
-      const res = await fetch('http://localhost:5000/api/translate', {
+      const res = await fetch(`${API}/api/jobs`, {
         method: 'POST',
         body: fd
       })
@@ -33,16 +90,31 @@ export default function FileUpload(){
         return
       }
 
-      // stream the file as blob and create object URL
-      const blob = await res.blob()
-      const url = URL.createObjectURL(blob)
-      setDownloadUrl(url)
+      const job = await res.json()
+      await follow(job.job_id)
+      await fetchResult(job.job_id)
     }catch(err){
       alert('Request failed: ' + err.message)
     }
     setLoading(false)
   }
 
+  const status = () => {
+    if(!progress) return null
+    const parts = [STAGE_LABELS[progress.stage] || progress.stage]
+    if(progress.stage === 'ocr' && progress.pages){
+      parts.push(`page ${progress.pagesDone ? progress.pagesDone.size : 0} of ${progress.pages}`)
+    }
+    if(progress.stage === 'translate' && progress.segmentsTotal){
+      parts.push(`${progress.segments} of ${progress.segmentsTotal} sentences`)
+    }
+    return parts.join(': ')
+  }
+
+  const timings = progress && progress.timings
+    ? Object.entries(progress.timings).map(([stage, seconds]) => `${STAGE_LABELS[stage] || stage} ${seconds.toFixed(1)}s`).join(', ')
+    : null
+
   return (
     <div>
       <input type="file" onChange={onFile} accept=".png,.jpg,.jpeg,.pdf" />
@@ -65,6 +137,14 @@ export default function FileUpload(){
         <button onClick={submit} disabled={loading}>{loading ? 'Processing...' : 'Translate'}</button>
       </div>
 
+      {loading && progress && (
+        <div style={{marginTop:12}}>{status()}</div>
+      )}
+
+      {timings && (
+        <div style={{marginTop:6, color:'#666', fontSize:12}}>{timings}</div>
+      )}
+
       {downloadUrl && (
         <div style={{marginTop:12}}>
           <a href={downloadUrl} download={`translated.${output === 'text' ? 'txt' : output === 'image' ? 'png' : 'pdf'}`}>
@@ -1,19 +1,76 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context, g
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
+from werkzeug.serving import is_running_from_reloader
 import os
 import sys
+import json
+import tempfile
+import time
+import zipfile
+import zlib
 import uuid
-import pytesseract
+import threading
+import functools
+import hmac
 from PIL import Image, ImageDraw, ImageFont
-from pdf2image import convert_from_path
-from reportlab.pdfgen import canvas
 from io import BytesIO
-from deep_translator import GoogleTranslator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from config import (OCR_WORKERS, PDF_DPI, PDF_RASTER_WINDOW, PDF_PAGE_BUDGET,
+                    PDF_TEXT_LAYER, PDF_TEXT_LAYER_MIN_CHARS,
+                    OCR_CACHE_ITEMS, OCR_CACHE_DIR, OCR_CACHE_MAX_BYTES,
+                    RESULT_CACHE, RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES, PIPELINE_VERSION,
+                    OCR_ENGINE, OCR_PRELOAD_LANGS,
+                    OCR_PREPROCESS, PREPROCESS_TARGET_DPI, PREPROCESS_LINE_HEIGHT,
+                    SKIP_BLANK_PAGES, BLANK_PAGE_INK_RATIO,
+                    GOOGLE_CONCURRENCY, HTTP_RETRIES, HTTP_RETRY_BACKOFF, GOOGLE_RATE,
+                    TRANSLATION_FALLBACK, LIBRETRANSLATE_URL, LIBRETRANSLATE_API_KEY, LIBRETRANSLATE_CONCURRENCY,
+                    LIBRETRANSLATE_RATE, DEEPL_API_KEY, DEEPL_CONCURRENCY, DEEPL_RATE,
+                    TRANSLATION_RETRY_BUDGET, TRANSLATION_FAIL_ON_UNTRANSLATED,
+                    BREAKER_FAILURES, BREAKER_SLOW_SECONDS, BREAKER_OPEN_SECONDS,
+                    JOB_DB_PATH, JOB_WORKERS, JOB_MAX_ATTEMPTS, JOB_LEASE_SECONDS, JOB_EVENTS_KEEPALIVE, JOB_TTL_HOURS,
+                    BATCH_WORKERS, BATCH_MAX_FILES, BATCH_MAX_BYTES,
+                    TRANSLATION_MEMORY, TRANSLATION_MEMORY_PATH, TRANSLATION_MEMORY_MAX_ENTRIES,
+                    ADMIN_TOKEN, IN_MEMORY_MAX_BYTES,
+                    UPLOAD_MAX_AGE_HOURS, OUTPUT_MAX_AGE_HOURS, DISK_QUOTA_MB,
+                    JANITOR_INTERVAL, JANITOR_GRACE_SECONDS, DOCUMENT_DIR, DOCUMENT_TTL_HOURS,
+                    TRACING, TRACE_PATH, TRACE_MAX_BYTES, TRACE_MAX_AGE_HOURS, PROFILE_DIR,
+                    PROFILE_MAX_AGE_HOURS, PROFILE_SAMPLE_INTERVAL,
+                    WARMUP, WARMUP_OCR_POOL, WARMUP_PROVIDERS, WARMUP_TIMEOUT,
+                    TESSERACT_THREADS, OCR_MAX_ACTIVE, OCR_MAX_WAITING, OCR_MAX_WAIT_SECONDS, JOB_MAX_QUEUED)
+from services.parallel_ocr import ocr_pdf_pages, get_pool
+from services.ocr_cache import OCRCache
+from services.result_store import ResultStore, SingleFlight, hash_upload, save_hashed
+from services import tesseract_engine
+from services.preprocess import preprocess, parse_steps, make_options, options_key, is_blank
+from services.translation_batching import translate_in_batches, Translations
+from services.translation_providers import GoogleProvider, LibreTranslateProvider, DeepLProvider
+from services.http_clients import get_session
+from services.rate_limiter import RetryBudget
+from services.circuit_breaker import ProviderRouter
+from services.job_queue import JobStore, JobQueue, TERMINAL_EVENTS
+from services.zip_stream import stream_zip
+from services.janitor import FileJanitor
+from services.document_store import DocumentStore
+from services.metrics import Registry
+from services.tracing import Tracer, TRACE_ID_PATTERN
+from services.profiling import PROFILERS
+from services.translation_memory import TranslationMemory
+from services.text_segmenter import segment_text, join_segments
+from services.admission import AdmissionController, Overloaded
+
+# Tesseract's OpenMP threads would otherwise multiply with our own parallelism;
+# set before tesseract is first run, and inherited by the OCR worker processes
+os.environ.setdefault('OMP_THREAD_LIMIT', str(TESSERACT_THREADS))
+# image requests borrow warm engines; admission control never lets more than this OCR at once
+tesseract_engine.configure(max_engines=OCR_MAX_ACTIVE)
 
 # Create the Flask app instance
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+CORS(app, expose_headers=['X-OCR-Page-Timings', 'X-OCR-Skipped-Pages', 'X-OCR-Failed-Pages',
+                          'X-Untranslated-Segments', 'X-Trace-Id', 'X-Profile-Id', 'Retry-After', 'X-Result-Cache',
+                          'X-Document-Id'])  # Enable CORS for all routes
 
 # Configuration
 UPLOAD_DIR = os.path.join(os.path.dirname(__file__), 'uploads')
@@ -21,6 +78,166 @@ OUT_DIR = os.path.join(os.path.dirname(__file__), 'translations')
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(OUT_DIR, exist_ok=True)
 
+# OCR output of uploaded documents, translated on request without redoing the OCR
+DOCUMENTS = DocumentStore(DOCUMENT_DIR, ttl=DOCUMENT_TTL_HOURS * 3600)
+
+# Expires idle uploads, results, documents, profiles and traces and keeps them together
+# under the disk quota; uploads of queued and running jobs are kept however long they
+# wait. Finished jobs and their events are purged on the same tick
+JANITOR_DIRS = {UPLOAD_DIR: UPLOAD_MAX_AGE_HOURS * 3600, OUT_DIR: OUTPUT_MAX_AGE_HOURS * 3600,
+                str(DOCUMENT_DIR): DOCUMENT_TTL_HOURS * 3600, str(PROFILE_DIR): PROFILE_MAX_AGE_HOURS * 3600}
+# traces are only expired in a directory of their own, never next to the job or memory databases
+if TRACE_PATH.parent not in (JOB_DB_PATH.parent, TRANSLATION_MEMORY_PATH.parent):
+    JANITOR_DIRS[str(TRACE_PATH.parent)] = TRACE_MAX_AGE_HOURS * 3600
+JANITOR = FileJanitor(JANITOR_DIRS,
+                      quota_bytes=DISK_QUOTA_MB * 1024 * 1024, grace_seconds=JANITOR_GRACE_SECONDS,
+                      interval=JANITOR_INTERVAL, keep=lambda: JOB_QUEUE.store.active_inputs(),
+                      purge=(lambda: JOB_QUEUE.store.purge(JOB_TTL_HOURS * 3600)) if JOB_TTL_HOURS else None)
+
+# OCR results are reused across uploads of the same image or page
+OCR_CACHE = OCRCache(max_items=OCR_CACHE_ITEMS, disk_dir=OCR_CACHE_DIR, disk_max_bytes=OCR_CACHE_MAX_BYTES)
+
+# Whole documents are reused across identical requests; identical requests
+# arriving together share one run
+RESULT_STORE = ResultStore(RESULT_CACHE_DIR, max_bytes=RESULT_CACHE_MAX_BYTES) if RESULT_CACHE else None
+RESULT_FLIGHTS = SingleFlight()
+
+# Translated segments are reused across requests, so repeats are never re-billed
+TRANSLATION_MEMORY_STORE = (TranslationMemory(TRANSLATION_MEMORY_PATH, max_entries=TRANSLATION_MEMORY_MAX_ENTRIES)
+                            if TRANSLATION_MEMORY else None)
+
+# Prometheus metrics served at /metrics; per-stage timings are observed as
+# documents go through the pipeline, service counters are read at scrape time
+METRICS = Registry()
+HTTP_REQUESTS = METRICS.counter('ocr_http_requests_total', 'HTTP requests served', ('endpoint', 'status'))
+HTTP_IN_FLIGHT = METRICS.gauge('ocr_http_requests_in_flight', 'HTTP requests being handled', ('endpoint',))
+HTTP_SECONDS = METRICS.histogram('ocr_http_request_seconds', 'HTTP request duration, including streaming',
+                                 ('endpoint',))
+UPLOAD_BYTES = METRICS.histogram('ocr_upload_bytes', 'Size of uploaded documents',
+                                 buckets=[2 ** n * 1024 for n in range(4, 17, 2)])
+STAGE_SECONDS = METRICS.histogram('ocr_stage_seconds', 'Time per document in each pipeline stage', ('stage',))
+RASTERIZE_SECONDS = METRICS.histogram('ocr_rasterize_page_seconds', 'Time to rasterize one PDF page')
+PAGE_OCR_SECONDS = METRICS.histogram('ocr_page_seconds', 'OCR time per page or image', ('source',))
+TRANSLATION_BATCH_SECONDS = METRICS.histogram('ocr_translation_batch_seconds',
+                                              'Provider call time per translation batch', ('provider',))
+RENDER_SECONDS = METRICS.histogram('ocr_render_seconds', 'Time to render the output document', ('output',))
+BATCH_FILES_PENDING = METRICS.gauge('ocr_batch_files_pending', 'Files of /api/batch requests not yet processed')
+RESULT_REQUESTS = METRICS.counter('ocr_result_requests_total',
+                                  'Documents by how they were answered: hit, miss or shared with a concurrent run',
+                                  ('result',))
+ADMISSION_WAIT_SECONDS = METRICS.histogram('ocr_admission_wait_seconds', 'Time documents waited for an OCR slot')
+
+# Caps documents in the CPU-bound OCR stage across requests, jobs and batches
+ADMISSION = AdmissionController(OCR_MAX_ACTIVE, OCR_MAX_WAITING, OCR_MAX_WAIT_SECONDS)
+
+
+@METRICS.collector
+def collect_service_metrics():
+    ocr = OCR_CACHE.stats()
+    yield 'ocr_cache_lookups_total', 'counter', 'OCR cache lookups', [
+        ({'result': 'hit'}, ocr['hits'] - ocr['disk_hits']), ({'result': 'disk_hit'}, ocr['disk_hits']),
+        ({'result': 'miss'}, ocr['misses'])]
+    yield 'ocr_cache_hit_ratio', 'gauge', 'Share of OCR cache lookups answered from the cache', [({}, ocr['hit_rate'])]
+    if RESULT_STORE:
+        yield 'ocr_result_store_bytes', 'gauge', 'Bytes used by stored documents', [
+            ({}, RESULT_STORE.stats()['disk_bytes'])]
+    if TRANSLATION_MEMORY_STORE:
+        memory = TRANSLATION_MEMORY_STORE.stats()
+        yield 'ocr_translation_memory_lookups_total', 'counter', 'Translation memory lookups', [
+            ({'result': 'hit'}, memory['hits']), ({'result': 'miss'}, memory['misses'])]
+        yield 'ocr_translation_memory_hit_ratio', 'gauge', 'Share of segments answered from the translation memory', [
+            ({}, memory['hit_rate'])]
+        yield 'ocr_translation_memory_entries', 'gauge', 'Segments stored in the translation memory', [
+            ({}, memory['entries'])]
+    counts = JOB_QUEUE.store.counts()
+    admission = ADMISSION.stats()
+    yield 'ocr_admission_active', 'gauge', 'Documents holding an OCR slot', [({}, admission['active'])]
+    yield 'ocr_admission_waiting', 'gauge', 'Documents waiting for an OCR slot', [({}, admission['waiting'])]
+    yield 'ocr_admission_rejected_total', 'counter', 'Requests turned away with 429', [({}, admission['rejected'])]
+    yield 'ocr_jobs', 'gauge', 'Background jobs by status', [
+        ({'status': status}, counts.get(status, 0)) for status in ('queued', 'running', 'done', 'failed')]
+    yield 'ocr_provider_circuit_open', 'gauge', 'Whether a translation provider is currently skipped', [
+        ({'provider': name}, int(health['state'] != 'closed')) for name, health in TRANSLATION_ROUTER.stats().items()]
+    storage = JANITOR.stats()
+    yield 'ocr_storage_bytes', 'gauge', 'Bytes used by uploads, translations and documents', [
+        ({'directory': directory}, size) for directory, size in storage['disk_bytes'].items()]
+    yield 'ocr_storage_reclaimed_bytes_total', 'counter', 'Bytes removed by the janitor', [
+        ({'reason': reason}, size) for reason, size in storage['bytes_reclaimed'].items()]
+
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_endpoint = request.endpoint or 'unknown'
+    g.metrics_start = time.perf_counter()
+    HTTP_IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+
+
+@app.after_request
+def count_request(response):
+    HTTP_REQUESTS.inc(endpoint=request.endpoint or 'unknown', status=response.status_code)
+    return response
+
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    # for streamed responses this runs once the stream is closed
+    if 'metrics_start' in g:
+        HTTP_IN_FLIGHT.dec(endpoint=g.metrics_endpoint)
+        HTTP_SECONDS.observe(time.perf_counter() - g.metrics_start, endpoint=g.metrics_endpoint)
+
+
+# Every request is a trace: pipeline stages and provider calls are spans under it,
+# exported to TRACE_PATH as JSON lines. The trace id is returned in X-Trace-Id and
+# a caller-supplied X-Trace-Id is continued.
+TRACER = Tracer(TRACE_PATH, max_bytes=TRACE_MAX_BYTES, enabled=TRACING)
+os.makedirs(PROFILE_DIR, exist_ok=True)
+# cProfile cannot run twice at once, so only one request is profiled at a time
+PROFILE_LOCK = threading.Lock()
+
+
+@app.before_request
+def start_trace():
+    incoming = request.headers.get('X-Trace-Id', '').lower()
+    g.trace = TRACER.start_span(f"{request.method} {request.endpoint or 'unknown'}", activate=True,
+                                trace_id=incoming if TRACE_ID_PATTERN.match(incoming) else None,
+                                path=request.path)
+    # admins can profile one request with ?profile=cprofile|sample (or an X-Profile header)
+    mode = request.args.get('profile') or request.headers.get('X-Profile')
+    if mode in PROFILERS and admin_allowed():
+        if PROFILE_LOCK.acquire(blocking=False):
+            try:
+                g.profiler = PROFILERS[mode]() if mode == 'cprofile' else PROFILERS[mode](PROFILE_SAMPLE_INTERVAL)
+            except Exception:
+                PROFILE_LOCK.release()
+                raise
+        else:
+            g.trace.set(profile='skipped, another request is being profiled')
+
+
+@app.after_request
+def add_trace_headers(response):
+    if 'trace' in g:
+        g.trace.set(status=response.status_code)
+        response.headers['X-Trace-Id'] = g.trace.trace_id
+        if 'profiler' in g:
+            response.headers['X-Profile-Id'] = g.trace.trace_id
+    return response
+
+
+@app.teardown_request
+def finish_trace(exc):
+    profiler = g.pop('profiler', None)
+    trace = g.pop('trace', None)
+    if profiler:
+        try:
+            path = profiler.stop(os.path.join(PROFILE_DIR, trace.trace_id))
+            print(f"Saved profile of {trace.name} to {path}")
+        finally:
+            PROFILE_LOCK.release()
+    if trace:
+        trace.end(exc)
+        TRACER.deactivate()
+
 # Add a root route with a user-friendly interface
 @app.route('/', methods=['GET', 'POST'])
 def index():
@@ -33,33 +250,24 @@ def index():
         
         if file.filename == '':
             return "No selected file", 400
+
+        if not GOOGLE_PROVIDER.supports(target_lang):
+            return f"Unsupported target language: {target_lang}", 400
             
         if file and allowed_file(file.filename):
-            # Save the file
             filename = secure_filename(file.filename)
-            filepath = os.path.join(UPLOAD_DIR, filename)
-            file.save(filepath)
-            
-            # Process the file
+            params = {'target': target_lang, 'output': 'pdf', 'preprocess': None, 'filename': filename}
+            # small uploads never touch the disk; larger ones get a unique name
+            UPLOAD_BYTES.observe(upload_size(file))
+            source, digest = read_upload(file, filename)
+            if digest:
+                params['upload_sha256'] = digest
             try:
-                # OCR
-                ext = os.path.splitext(filename)[1].lower()
-                if ext == '.pdf':
-                    text = ocr_pdf(filepath)
-                else:
-                    text = ocr_image(filepath)
-                
-                # Translate
-                translated = translate_text(text, target_lang)
-                
-                # Save as PDF
-                output_filename = os.path.splitext(filename)[0] + '_translated.pdf'
-                output_path = os.path.join(OUT_DIR, output_filename)
-                text_to_pdf(translated, output_path)
-                
-                # Return the translated file
-                return send_file(output_path, as_attachment=True)
-                
+                out_name = None if isinstance(source, BytesIO) else str(uuid.uuid4())
+                output, headers = process_document_once(source, params, out_name, bounded=True)
+                return send_output(output, headers, os.path.splitext(filename)[0] + '_translated.pdf')
+            except Overloaded as e:
+                return overloaded_response(e)
             except Exception as e:
                 return f"Error processing file: {str(e)}", 500
     
@@ -279,8 +487,126 @@ def index():
 def test_endpoint():
     return jsonify({'status': 'success', 'message': 'API is working!'})
 
-# Configuration: LibreTranslate endpoint (default public instance)
-LIBRETRANSLATE_URL = 'https://libretranslate.com/translate'
+# Readiness for load balancers: 503 until warm-up has loaded everything a request needs
+@app.route('/api/ready', methods=['GET'])
+def ready_endpoint():
+    return jsonify(WARMUP_STATE), 200 if WARMUP_STATE['status'] in ('ready', 'disabled') else 503
+
+# Cache hit/miss counters
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats_endpoint():
+    stats = {'ocr': OCR_CACHE.stats()}
+    if RESULT_STORE:
+        stats['results'] = dict(RESULT_STORE.stats(), coalesced=RESULT_FLIGHTS.coalesced)
+    if TRANSLATION_MEMORY_STORE:
+        stats['translation'] = TRANSLATION_MEMORY_STORE.stats()
+    return jsonify(stats)
+
+# Spans of one trace, for looking into a slow request by its X-Trace-Id
+@app.route('/api/admin/traces/<trace_id>', methods=['GET'])
+def trace_endpoint(trace_id):
+    denied = admin_denied()
+    if denied:
+        return denied
+    spans = TRACER.read(trace_id) if TRACE_ID_PATTERN.match(trace_id) else []
+    if not spans:
+        return jsonify({'error': 'trace not found'}), 404
+    return jsonify({'trace_id': trace_id, 'spans': spans})
+
+# Download a profile captured with ?profile=cprofile|sample, by its X-Profile-Id
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+def profile_endpoint(profile_id):
+    denied = admin_denied()
+    if denied:
+        return denied
+    if TRACE_ID_PATTERN.match(profile_id):
+        for profiler in PROFILERS.values():
+            path = os.path.join(PROFILE_DIR, profile_id + profiler.extension)
+            if os.path.exists(path):
+                return send_file(path, as_attachment=True)
+    return jsonify({'error': 'profile not found'}), 404
+
+# Prometheus scrape target
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(METRICS.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Disk usage of uploads/translations/documents and what the janitor reclaimed
+@app.route('/api/storage/stats', methods=['GET'])
+def storage_stats_endpoint():
+    return jsonify(JANITOR.stats())
+
+
+def admin_allowed():
+    # only with the configured token: behind a reverse proxy every request comes
+    # from localhost, so the client address proves nothing
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
+
+
+def admin_denied():
+    # error response for an admin endpoint, or None to go ahead;
+    # without an ADMIN_TOKEN the admin endpoints don't exist
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'not found'}), 404
+    if not admin_allowed():
+        return jsonify({'error': 'forbidden'}), 403
+    return None
+
+
+# Inspect (GET) or purge (DELETE) the translation memory
+# filters: provider, target, q (source text substring); DELETE also takes older_than (seconds)
+@app.route('/api/admin/translation-memory', methods=['GET', 'DELETE'])
+def translation_memory_endpoint():
+    denied = admin_denied()
+    if denied:
+        return denied
+    if not TRANSLATION_MEMORY_STORE:
+        return jsonify({'error': 'translation memory is disabled'}), 404
+    filters = {
+        'provider': request.args.get('provider'),
+        'target_lang': request.args.get('target'),
+        'search': request.args.get('q'),
+    }
+    try:
+        if request.method == 'DELETE':
+            older_than = request.args.get('older_than')
+            deleted = TRANSLATION_MEMORY_STORE.purge(
+                older_than=float(older_than) if older_than else None, **filters)
+            return jsonify({'deleted': deleted, 'stats': TRANSLATION_MEMORY_STORE.stats()})
+        limit = min(int(request.args.get('limit', 50)), 1000)
+        offset = int(request.args.get('offset', 0))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'stats': TRANSLATION_MEMORY_STORE.stats(),
+        'entries': TRANSLATION_MEMORY_STORE.entries(limit=limit, offset=offset, **filters),
+    })
+
+# Translation provider used by translate_text, on a keep-alive pool shared by all requests
+GOOGLE_PROVIDER = GoogleProvider(get_session('google', GOOGLE_CONCURRENCY, HTTP_RETRIES, HTTP_RETRY_BACKOFF),
+                                 concurrency=GOOGLE_CONCURRENCY, rate=GOOGLE_RATE)
+# Optional provider to fail over to (TRANSLATION_FALLBACK)
+if TRANSLATION_FALLBACK == 'libretranslate':
+    FALLBACK_PROVIDERS = [LibreTranslateProvider(
+        get_session('libretranslate', LIBRETRANSLATE_CONCURRENCY, HTTP_RETRIES, HTTP_RETRY_BACKOFF),
+        LIBRETRANSLATE_URL, api_key=LIBRETRANSLATE_API_KEY, concurrency=LIBRETRANSLATE_CONCURRENCY,
+        rate=LIBRETRANSLATE_RATE)]
+elif TRANSLATION_FALLBACK == 'deepl' and DEEPL_API_KEY:
+    FALLBACK_PROVIDERS = [DeepLProvider(get_session('deepl', DEEPL_CONCURRENCY, HTTP_RETRIES, HTTP_RETRY_BACKOFF),
+                                        DEEPL_API_KEY, concurrency=DEEPL_CONCURRENCY, rate=DEEPL_RATE)]
+else:
+    FALLBACK_PROVIDERS = []
+# While Google keeps failing or timing out its circuit opens: batches go to the
+# fallback provider if there is one, and otherwise fail fast (failover inactive)
+TRANSLATION_ROUTER = ProviderRouter([GOOGLE_PROVIDER] + FALLBACK_PROVIDERS,
+                                    BREAKER_FAILURES, BREAKER_SLOW_SECONDS, BREAKER_OPEN_SECONDS)
+
+
+# Circuit state and rolling latency per translation provider
+@app.route('/api/providers/health', methods=['GET'])
+def provider_health_endpoint():
+    return jsonify(TRANSLATION_ROUTER.stats())
 
 ALLOWED_EXT = {'.png', '.jpg', '.jpeg', '.pdf'}
 
@@ -289,29 +615,81 @@ def allowed_file(filename):
     return ext in ALLOWED_EXT
 
 
-def ocr_image(path, lang=None):
+def preprocess_options(value=None):
+    # per-request preprocessing steps on top of the configured defaults
+    steps = parse_steps(value if value is not None else OCR_PREPROCESS)
+    return make_options(steps, PREPROCESS_TARGET_DPI, PREPROCESS_LINE_HEIGHT)
+
+
+def ocr_image(path, lang=None, preprocessing=None):
     img = Image.open(path)
-    # simple OCR
-    text = pytesseract.image_to_string(img, lang=lang)
+    # blank pages are skipped before paying for the cache key's hash
+    if SKIP_BLANK_PAGES and is_blank(img, BLANK_PAGE_INK_RATIO):
+        print("Skipping OCR: image is blank")
+        return ""
+    # reuse the result if these exact pixels were OCR'd before
+    key = OCR_CACHE.make_key(img, lang, options_key(preprocessing), tesseract_engine.identity(OCR_ENGINE))
+    text = OCR_CACHE.get(key)
+    if text is None:
+        img, report = preprocess(img, preprocessing)
+        if report['steps']:
+            print(f"Preprocessed {report['original_size']} -> {report['size']} in {report['seconds']:.2f}s")
+        text = tesseract_engine.image_to_string(img, lang=lang, engine=OCR_ENGINE)
+        OCR_CACHE.put(key, text)
     return text
 
 
-def ocr_pdf(path, lang=None):
-    # convert each PDF page to image then OCR
-    pages = convert_from_path(path)
-    texts = []
+def ocr_pdf_with_timings(path, lang=None, workers=None, preprocessing=None, on_progress=None):
+    # born-digital pages use their text layer, the rest stream through a bounded
+    # rasterizer into parallel OCR workers; page order is kept
+    pages = ocr_pdf_pages(path, lang=lang, workers=workers or OCR_WORKERS, dpi=PDF_DPI,
+                          window=PDF_RASTER_WINDOW, page_budget=PDF_PAGE_BUDGET,
+                          use_text_layer=PDF_TEXT_LAYER, min_text_chars=PDF_TEXT_LAYER_MIN_CHARS,
+                          cache=OCR_CACHE, engine=OCR_ENGINE, preload_langs=OCR_PRELOAD_LANGS,
+                          preprocess_options=preprocessing,
+                          blank_ink_ratio=BLANK_PAGE_INK_RATIO if SKIP_BLANK_PAGES else None,
+                          on_progress=on_progress)
     for p in pages:
-        texts.append(pytesseract.image_to_string(p, lang=lang))
-    return "\n\n".join(texts)
+        print(f"OCR page {p['page']}/{len(pages)} ({p['source']}): "
+              f"rasterize {p['rasterize_seconds']:.2f}s, preprocess {p.get('preprocess_seconds', 0.0):.2f}s, "
+              f"ocr {p['ocr_seconds']:.2f}s")
+    return pages
+
+
+def ocr_pdf(path, lang=None, workers=None, preprocessing=None):
+    return "\n\n".join(p['text'] for p in ocr_pdf_with_timings(path, lang, workers, preprocessing))
+
+
+def page_timings_header(pages):
+    # compact per-page timing summary, e.g. "1:0.84,2:0.91"
+    return ','.join(f"{p['page']}:{p['rasterize_seconds'] + p['ocr_seconds']:.2f}" for p in pages)
 
 
-def translate_text(text, target_lang):
+def skipped_pages(pages):
+    return [p['page'] for p in pages if p['source'] == 'blank']
+
+
+def failed_pages(pages):
+    # pages whose OCR raised; the document went on without their text
+    return [p['page'] for p in pages if p['source'] == 'failed']
+
+
+def send_output(output, headers=None, download_name=None):
+    # output is a file path or an in-memory buffer, which needs a download_name
+    response = send_file(output, as_attachment=True, download_name=download_name)
+    response.headers.update(headers or {})
+    return response
+
+
+def translate_text(text, target_lang, budget=None, on_progress=None):
+    # budget: per-document RetryBudget, which also counts segments left untranslated
+    # on_progress: called as ('translated', {...}) after each batch
+    budget = budget or RetryBudget(TRANSLATION_RETRY_BUDGET)
+    progress = on_progress or (lambda event, data: None)
     if not text.strip():
         return ""
     
     try:
-        from deep_translator import GoogleTranslator
-        
         # Default to English if language not found
         target = target_lang if target_lang else 'en'
         print(f"Translating to language code: {target}")
@@ -319,28 +697,58 @@ def translate_text(text, target_lang):
         # Clean the text to remove any problematic characters
         cleaned_text = ''.join(char for char in text if ord(char) < 0x110000)
         
-        # Split text into chunks to handle long texts
-        max_chunk_size = 2000  # Smaller chunks for better reliability
-        chunks = [cleaned_text[i:i+max_chunk_size] for i in range(0, len(cleaned_text), max_chunk_size)]
-        translated_chunks = []
-        
-        for i, chunk in enumerate(chunks):
-            if chunk.strip():
-                try:
-                    print(f"Translating chunk {i+1}/{len(chunks)} (length: {len(chunk)})")
-                    translated = GoogleTranslator(source='auto', target=target).translate(chunk)
-                    if translated and translated.strip():
-                        translated_chunks.append(translated)
-                        print("Translation successful")
-                    else:
-                        print("Warning: Empty translation received")
-                        translated_chunks.append(chunk)
-                except Exception as chunk_error:
-                    print(f"Chunk translation error: {chunk_error}")
-                    translated_chunks.append(chunk)  # Keep original if translation fails
-        
-        result = ' '.join(translated_chunks)
+        # Split on paragraph and sentence boundaries, then pack sentences into as
+        # few requests as the provider's limits allow and send them concurrently;
+        # a sentence that fails keeps its original text
+        router = TRANSLATION_ROUTER
+        separator_chars = max(len(getattr(p, 'separator', '')) for p in router.providers)
+        parent = TRACER.current()
+        pieces = segment_text(cleaned_text, router.max_chars)
+        segments = [segment for segment, _ in pieces]
+
+        to_translate = sum(1 for segment in segments if segment.strip())
+
+        def translate_missing(segments):
+            sent = sum(1 for segment in segments if segment.strip())
+            done = [0]
+            lock = threading.Lock()
+
+            def batch_done(count):
+                with lock:
+                    done[0] += count
+                    progress('translated', {'segments': done[0], 'total': sent, 'reused': to_translate - sent})
+
+            def send(batch, provider):
+                # batches run on worker threads, so their spans name the parent explicitly
+                with TRACER.span('translate_batch', parent=parent, provider=provider.name, items=len(batch),
+                                 chars=sum(len(text) for text in batch)):
+                    with TRANSLATION_BATCH_SECONDS.time(provider=provider.name):
+                        return Translations.by(provider.name, provider.translate_batch(batch, target, budget=budget))
+
+            return translate_in_batches(
+                segments,
+                lambda batch: router.call(lambda p: send(batch, p)),
+                router.max_items,
+                router.max_chars,
+                separator_chars,
+                concurrency=router.concurrency,
+                budget=budget,
+                progress=batch_done,
+            )
+
+        # segments already in the translation memory are not sent at all; each new
+        # translation is remembered under the provider that answered it
+        if TRANSLATION_MEMORY_STORE:
+            translated = TRANSLATION_MEMORY_STORE.translate(segments, translate_missing,
+                                                            [p.name for p in router.providers], target)
+        else:
+            translated = translate_missing(segments)
+
+        result = join_segments(translated, [gap for _, gap in pieces])
         print(f"Final translation length: {len(result)}")
+        if budget.untranslated:
+            print(f"WARNING: {budget.untranslated} segments left untranslated "
+                  f"({budget.retries}/{budget.max_retries} retries used)")
         return result
         
     except Exception as e:
@@ -348,20 +756,17 @@ def translate_text(text, target_lang):
         print(f"Translation error: {e}")
         print("Stack trace:", traceback.format_exc())
         print("Falling back to original text")
+        budget.record_untranslated()
         return text  # Return original text if translation fails
 
 
-def text_to_pdf(text, out_path):
-    # PDF writer with better Unicode support
+@functools.lru_cache(maxsize=None)
+def pdf_font_name():
+    # register the PDF font with reportlab once per process (at warm-up)
+    # rather than parsing the TTF again for every document
     from reportlab.pdfbase import pdfmetrics
     from reportlab.pdfbase.ttfonts import TTFont
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib import colors
-    import os
-    import sys
-    
+
     # Try to use a font that supports Hindi (Devanagari) characters
     try:
         # Try to use Noto Sans which has good Unicode coverage
@@ -381,7 +786,17 @@ def text_to_pdf(text, out_path):
     except Exception as e:
         print(f"Error in font setup: {e}")
         font_name = 'Helvetica'
-    
+    return font_name
+
+
+def text_to_pdf(text, out_path):
+    # PDF writer with better Unicode support; reportlab is only imported once a PDF is needed
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.pagesizes import letter
+
+    font_name = pdf_font_name()
+
     # Create a custom style with the selected font
     styles = getSampleStyleSheet()
     style = ParagraphStyle(
@@ -469,11 +884,7 @@ def text_to_pdf(text, out_path):
         doc.build(content)
     else:
         # Fallback if no content was added
-        from reportlab.lib import colors
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet
-        
-        doc = SimpleDocTemplate(out_path, pagesize=A4)
+        doc = SimpleDocTemplate(out_path, pagesize=letter)
         styles = getSampleStyleSheet()
         elements = []
         
@@ -494,78 +905,740 @@ def text_to_pdf(text, out_path):
         doc.build(elements)
 
 
-@app.route('/api/translate', methods=['POST'])
-def translate_endpoint():
-    # expects: file (multipart), target_lang (e.g. 'hi'), output (text|pdf|image)
+class PipelineError(Exception):
+    # a failed processing stage, reported to the client as {'error': ..., 'detail': ...}
+    def __init__(self, error, detail=None, status=500):
+        super().__init__(f"{error}: {detail}" if detail else error)
+        self.error = error
+        self.detail = detail
+        self.status = status
+
+    def to_json(self):
+        body = {'error': self.error}
+        if self.detail is not None:
+            body['detail'] = self.detail
+        return body
+
+
+OUTPUT_TYPES = ('text', 'pdf', 'image')
+OUTPUT_EXTENSIONS = {'text': '.txt', 'pdf': '.pdf', 'image': '.png'}
+
+
+def read_translate_params():
+    # target/output/preprocess settings shared by the translate, job and batch endpoints
+    params = {
+        'target': request.form.get('target', 'en'),
+        'output': request.form.get('output', 'pdf'),
+        'preprocess': request.form.get('preprocess'),
+    }
+    if params['output'] not in OUTPUT_TYPES:
+        raise PipelineError('unknown output type', status=400)
+    # rejected here rather than by the provider, once per segment batch
+    if not GOOGLE_PROVIDER.supports(params['target']):
+        raise PipelineError('unsupported target language', detail=params['target'], status=400)
+    try:
+        preprocess_options(params['preprocess'])
+    except ValueError as e:
+        raise PipelineError(str(e), status=400)
+    return params
+
+
+def upload_size(f):
+    # werkzeug has already buffered or spooled the upload, so its stream is seekable
+    f.stream.seek(0, os.SEEK_END)
+    size = f.stream.tell()
+    f.stream.seek(0)
+    return size
+
+
+def save_upload(f, filename, uid=None):
+    # save an upload under UPLOAD_DIR; returns (path, sha256 of its bytes), hashed while
+    # writing so the result store never reads the file back just to key it
+    save_path = os.path.join(UPLOAD_DIR, (uid or str(uuid.uuid4())) + '_' + filename)
+    return save_path, save_hashed(f.stream, save_path)
+
+
+def read_upload(f, filename, in_memory=True):
+    # an upload up to IN_MEMORY_MAX_BYTES as a BytesIO, anything larger saved under UPLOAD_DIR;
+    # returns (source, sha256 of a saved upload or None)
+    if in_memory and upload_size(f) <= IN_MEMORY_MAX_BYTES:
+        return BytesIO(f.read()), None
+    return save_upload(f, filename)
+
+
+@contextmanager
+def pdf_file(source):
+    # poppler runs out of process and reads PDFs from disk, so in-memory
+    # PDFs are spooled to a temporary file for the duration of the OCR
+    if not isinstance(source, BytesIO):
+        yield source
+        return
+    fd, path = tempfile.mkstemp(suffix='.pdf', dir=UPLOAD_DIR)
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(source.getbuffer())
+        yield path
+    finally:
+        os.remove(path)
+
+
+def read_upload_form(in_memory=False):
+    # validate a translate request's form and read its file; returns (upload id, params, source)
+    # or raises PipelineError. source is a saved path, or a BytesIO for small in_memory uploads
     f = request.files.get('file')
-    target = request.form.get('target', 'en')
-    output_type = request.form.get('output', 'pdf')
     if not f:
-        return jsonify({'error': 'no file uploaded'}), 400
+        raise PipelineError('no file uploaded', status=400)
     filename = secure_filename(f.filename)
     if not allowed_file(filename):
-        return jsonify({'error': 'file type not allowed'}), 400
+        raise PipelineError('file type not allowed', status=400)
+    params = read_translate_params()
+    UPLOAD_BYTES.observe(upload_size(f))
 
+    params['filename'] = filename
     uid = str(uuid.uuid4())
-    save_path = os.path.join(UPLOAD_DIR, uid + '_' + filename)
-    f.save(save_path)
+    if not in_memory:
+        source, digest = save_upload(f, filename, uid)
+    else:
+        source, digest = read_upload(f, filename)
+    if digest:
+        params['upload_sha256'] = digest
+    return uid, params, source
 
-    ext = os.path.splitext(filename)[1].lower()
-    # OCR
-    try:
-        if ext == '.pdf':
-            raw_text = ocr_pdf(save_path)
+
+def output_headers(pages, budget):
+    headers = {'X-Untranslated-Segments': str(budget.untranslated)}
+    if pages:
+        headers['X-OCR-Page-Timings'] = page_timings_header(pages)
+        headers['X-OCR-Skipped-Pages'] = ','.join(str(n) for n in skipped_pages(pages))
+        headers['X-OCR-Failed-Pages'] = ','.join(str(n) for n in failed_pages(pages))
+    return headers
+
+
+@contextmanager
+def ocr_slot(bounded):
+    # hold an admission slot; bounded callers (request handlers) may get Overloaded
+    waiting = time.perf_counter()
+    with ADMISSION.slot(bounded=bounded):
+        ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - waiting)
+        yield
+
+
+def overloaded_response(e):
+    response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+
+def no_progress(event, data):
+    pass
+
+
+@contextmanager
+def pipeline_stage(name, progress, **attrs):
+    # each stage is a trace span, a metrics observation and a pair of progress events
+    progress('stage', {'stage': name, 'status': 'started'})
+    with TRACER.span(name, **attrs) as span:
+        yield span
+    STAGE_SECONDS.observe(span.duration, stage=name)
+    progress('stage', {'stage': name, 'status': 'finished', 'seconds': round(span.duration, 3)})
+
+
+def process_document(source, params, out_name=None, on_progress=None, bounded=False):
+    # OCR, translate and render one upload; source is a file path or a BytesIO
+    # returns (output, response headers): the output is written to OUT_DIR as
+    # <out_name>_translated.<ext>, or kept in a BytesIO when out_name is None
+    # on_progress(event, data) receives 'stage', 'rasterized', 'page' and 'translated' events
+    # bounded: raise Overloaded instead of waiting indefinitely for an OCR slot
+    progress = on_progress or no_progress
+    raw_text, pages = ocr_document(source, params, progress, bounded)
+    return render_document(raw_text, pages, params, out_name, progress)
+
+
+def ocr_document(source, params, progress=no_progress, bounded=False):
+    # the OCR stage of process_document; returns (text, per-page results, empty for images)
+    # CPU-bound, so it only runs under the global admission limit
+    preprocessing = preprocess_options(params.get('preprocess'))
+    ext = os.path.splitext(params['filename'])[1].lower()
+    pages = []
+    with ocr_slot(bounded), pipeline_stage('ocr', progress, filename=params['filename']) as span:
+        started = time.perf_counter()
+        try:
+            if ext == '.pdf':
+                with pdf_file(source) as pdf_path:
+                    pages = ocr_pdf_with_timings(pdf_path, preprocessing=preprocessing, on_progress=progress)
+                raw_text = "\n\n".join(p['text'] for p in pages)
+            else:
+                raw_text = ocr_image(source, preprocessing=preprocessing)
+                progress('page', {'page': 1, 'pages': 1, 'ocr_seconds': round(time.perf_counter() - started, 3)})
+        except Exception as e:
+            raise PipelineError('ocr failed', str(e))
+        if pages:
+            # page work runs in worker processes; record its totals rather than a span per page
+            span.set(pages=len(pages),
+                     rasterize_seconds=round(sum(p['rasterize_seconds'] for p in pages), 3),
+                     page_ocr_seconds=round(sum(p['ocr_seconds'] for p in pages), 3),
+                     sources=sorted({p['source'] for p in pages}))
+    for page in pages:
+        # text layer pages are read in one call for the whole document, with no time of their own
+        if page['source'] != 'text_layer':
+            RASTERIZE_SECONDS.observe(page['rasterize_seconds'])
+            PAGE_OCR_SECONDS.observe(page['ocr_seconds'], source=page['source'])
+    if ext != '.pdf':
+        PAGE_OCR_SECONDS.observe(span.duration, source='image')
+    return raw_text, pages
+
+
+def render_document(raw_text, pages, params, out_name=None, progress=no_progress):
+    # the translate and render stages of process_document, same return value
+
+    # translate; segments the provider never translated are reported, not hidden
+    with pipeline_stage('translate', progress, target=params['target'], chars=len(raw_text)) as span:
+        budget = RetryBudget(TRANSLATION_RETRY_BUDGET)
+        translated = translate_text(raw_text, params['target'], budget, on_progress=progress)
+        span.set(untranslated=budget.untranslated, retries=budget.retries)
+        if budget.untranslated and TRANSLATION_FAIL_ON_UNTRANSLATED:
+            raise PipelineError('translation incomplete', {'untranslated_segments': budget.untranslated}, 502)
+
+    # produce output
+    output_type = params['output']
+    with pipeline_stage('render', progress, output=output_type) as span:
+        if out_name is None:
+            out_path = BytesIO()
         else:
-            raw_text = ocr_image(save_path)
+            out_path = os.path.join(OUT_DIR, out_name + '_translated' + OUTPUT_EXTENSIONS[output_type])
+
+        if output_type == 'text':
+            if out_name is None:
+                out_path.write(translated.encode('utf-8'))
+            else:
+                with open(out_path, 'w', encoding='utf-8') as fh:
+                    fh.write(translated)
+
+        elif output_type == 'pdf':
+            try:
+                text_to_pdf(translated, out_path)
+            except Exception as e:
+                raise PipelineError('pdf generation failed', str(e))
+
+        elif output_type == 'image':
+            # create a simple image with translated text
+            try:
+                # naive: create white canvas and draw text
+                img = Image.new('RGB', (1200, 1600), color='white')
+                d = ImageDraw.Draw(img)
+                # try to pick a default font
+                try:
+                    font = ImageFont.truetype('arial.ttf', 20)
+                except:
+                    font = ImageFont.load_default()
+
+                y = 10
+                for line in translated.split('\n'):
+                    d.text((10, y), line, fill=(0, 0, 0), font=font)
+                    y += 22
+                    if y > img.size[1] - 40:
+                        break
+                img.save(out_path, format='PNG')
+            except Exception as e:
+                raise PipelineError('image generation failed', str(e))
+    RENDER_SECONDS.observe(span.duration, output=output_type)
+
+    if out_name is None:
+        out_path.seek(0)
+    return out_path, output_headers(pages, budget)
+
+
+def process_document_once(source, params, out_name=None, on_progress=None, bounded=False):
+    # process_document, answered from RESULT_STORE when the same bytes were already
+    # processed with the same settings; concurrent identical calls share one run
+    # adds X-Result-Cache: hit|miss|shared to the headers
+    # an in-memory upload (BytesIO) gets its output in memory too: it is never written
+    # to the store, which would put the disk round trip back in
+    if not RESULT_STORE:
+        return process_document(source, params, out_name, on_progress, bounded)
+    in_memory = isinstance(source, BytesIO)
+    key = hash_upload(source, params['target'], params['output'],
+                      options_key(preprocess_options(params.get('preprocess'))), PIPELINE_VERSION,
+                      digest=params.get('upload_sha256'))
+
+    def run():
+        stored = RESULT_STORE.get(key)
+        if stored:
+            return stored[0], stored[1], 'hit'
+        output, headers = process_document(source, params, out_name, on_progress, bounded)
+        if in_memory:
+            # bytes, so every caller sharing the run reads its own copy
+            return output.getvalue(), headers, 'miss'
+        # stored even when incomplete, so every caller sharing the run gets a file path;
+        # incomplete results are just not reused by later requests
+        output = RESULT_STORE.put(key, output, OUTPUT_EXTENSIONS[params['output']], headers,
+                                  reusable=headers['X-Untranslated-Segments'] == '0'
+                                  and not headers.get('X-OCR-Failed-Pages'))
+        return output, headers, 'miss'
+
+    # a leader turned away by admission control doesn't fail the callers waiting
+    # on it: they try again under their own admission mode
+    flight = key + ':memory' if in_memory else key
+    (output, headers, result), shared = RESULT_FLIGHTS.do(flight, run, retry_on=(Overloaded,))
+    if isinstance(output, bytes):
+        output = BytesIO(output)
+    result = 'shared' if shared else result
+    RESULT_REQUESTS.inc(result=result)
+    if TRACER.current():
+        TRACER.current().set(result_cache=result)
+    return output, dict(headers, **{'X-Result-Cache': result})
+
+
+@app.route('/api/translate', methods=['POST'])
+def translate_endpoint():
+    # expects: file (multipart), target (e.g. 'hi'), output (text|pdf|image)
+    # small uploads are processed and returned from memory; larger ones spool through disk
+    try:
+        uid, params, source = read_upload_form(in_memory=True)
+        output, headers = process_document_once(source, params, None if isinstance(source, BytesIO) else uid,
+                                                bounded=True)
+    except PipelineError as e:
+        return jsonify(e.to_json()), e.status
+    except Overloaded as e:
+        return overloaded_response(e)
+    download_name = 'translated' + OUTPUT_EXTENSIONS[params['output']]
+    return send_output(output, headers, download_name)
+
+
+def document_json(document):
+    return {
+        'document_id': document['id'],
+        'filename': document['filename'],
+        'preprocess': document['preprocess'],
+        'pages': len(document['pages']) or 1,
+        'skipped_pages': skipped_pages(document['pages']),
+        'failed_pages': failed_pages(document['pages']),
+        'chars': len(document['text']),
+        'ocr_seconds': document['ocr_seconds'],
+        'created_at': document['created_at'],
+        'expires_at': document['expires_at'],
+        'status_url': f"/api/documents/{document['id']}",
+        'translate_url': f"/api/documents/{document['id']}/translate",
+    }
+
+
+@app.route('/api/documents', methods=['POST'])
+def create_document_endpoint():
+    # expects: file (multipart), preprocess; OCRs the upload once and returns 201 with its
+    # document id, which /api/documents/<id>/translate then takes instead of the file
+    try:
+        _, params, source = read_upload_form(in_memory=True)
+        started = time.perf_counter()
+        try:
+            text, pages = ocr_document(source, params, bounded=True)
+        finally:
+            if not isinstance(source, BytesIO):
+                os.remove(source)  # only the OCR output is kept
+    except PipelineError as e:
+        return jsonify(e.to_json()), e.status
+    except Overloaded as e:
+        return overloaded_response(e)
+    document = DOCUMENTS.create({
+        'filename': params['filename'],
+        'preprocess': params['preprocess'],
+        'text': text,
+        'pages': [{k: v for k, v in page.items() if k != 'text'} for page in pages],
+        'ocr_seconds': round(time.perf_counter() - started, 3),
+    })
+    response = jsonify(document_json(document))
+    response.status_code = 201
+    response.headers['Location'] = f"/api/documents/{document['id']}"
+    return response
+
+
+@app.route('/api/documents/<document_id>', methods=['GET', 'DELETE'])
+def document_endpoint(document_id):
+    if request.method == 'DELETE':
+        if not DOCUMENTS.delete(document_id):
+            return jsonify({'error': 'document not found'}), 404
+        return '', 204
+    document = DOCUMENTS.get(document_id)
+    if not document:
+        return jsonify({'error': 'document not found'}), 404
+    return jsonify(document_json(document))
+
+
+@app.route('/api/documents/<document_id>/translate', methods=['POST'])
+def translate_document_endpoint(document_id):
+    # expects: target, output (text|pdf|image); same response as /api/translate, without the OCR
+    document = DOCUMENTS.get(document_id)
+    if not document:
+        return jsonify({'error': 'document not found'}), 404
+    try:
+        params = dict(read_translate_params(), filename=document['filename'])
+        # no OCR, but rendering is CPU-bound as well: without a slot a burst of these
+        # would starve the documents that hold one
+        with ocr_slot(bounded=True):
+            output, headers = render_document(document['text'], [], params)
+    except PipelineError as e:
+        return jsonify(e.to_json()), e.status
+    except Overloaded as e:
+        return overloaded_response(e)
+    download_name = 'translated' + OUTPUT_EXTENSIONS[params['output']]
+    return send_output(output, dict(headers, **{'X-Document-Id': document_id}), download_name)
+
+
+def run_job(job, emit):
+    # continues the trace of the request that submitted the job
+    with TRACER.span('job', trace_id=job['params'].get('trace_id'), job_id=job['id'], attempt=job['attempts']):
+        return process_document_once(job['input_path'], job['params'], job['id'], emit)
+
+
+# Long documents go through the job API: the upload is persisted and
+# processed in the background, so requests return immediately and queued
+# work survives a restart
+JOB_QUEUE = JobQueue(JobStore(JOB_DB_PATH), run_job, workers=JOB_WORKERS, max_attempts=JOB_MAX_ATTEMPTS,
+                     lease_seconds=JOB_LEASE_SECONDS)
+
+
+def job_json(job):
+    body = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+        'status_url': f"/api/jobs/{job['id']}",
+        'result_url': f"/api/jobs/{job['id']}/result",
+    }
+    if job['error']:
+        body['error'] = job['error']
+    if job['result_meta']:
+        body['result'] = job['result_meta']
+    return body
+
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job_endpoint():
+    # same form as /api/translate; returns 202 with the job id straight away
+    # or 429 once the backlog of queued jobs is full
+    queued = JOB_QUEUE.store.counts().get('queued', 0)
+    if queued >= JOB_MAX_QUEUED:
+        return overloaded_response(Overloaded('job queue is full', ADMISSION.retry_after(queued)))
+    try:
+        _, params, save_path = read_upload_form()
+    except PipelineError as e:
+        return jsonify(e.to_json()), e.status
+    job = JOB_QUEUE.submit(dict(params, trace_id=g.trace.trace_id), save_path)
+    response = jsonify(job_json(job))
+    response.status_code = 202
+    response.headers['Location'] = f"/api/jobs/{job['id']}"
+    return response
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status_endpoint(job_id):
+    job = JOB_QUEUE.store.get(job_id)
+    if not job:
+        return jsonify({'error': 'job not found'}), 404
+    return jsonify(job_json(job))
+
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def job_result_endpoint(job_id):
+    job = JOB_QUEUE.store.get(job_id)
+    if not job:
+        return jsonify({'error': 'job not found'}), 404
+    if job['status'] == 'failed':
+        return jsonify(job_json(job)), 500
+    if job['status'] != 'done':
+        return jsonify(job_json(job)), 409
+    if not os.path.exists(job['result_path']):
+        return jsonify({'error': 'result no longer available'}), 410
+    os.utime(job['result_path'])  # recently downloaded results are the last to be evicted
+    return send_output(job['result_path'], job['result_meta'])
+
+
+# Files of one batch request are processed on this shared pool, so concurrent
+# batches queue behind each other instead of multiplying the load
+BATCH_POOL = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='batch')
+
+
+class CountingReader:
+    # read() of a stream, counting the bytes that come through and failing past ``limit``
+    def __init__(self, stream, limit):
+        self.stream, self.limit, self.count = stream, limit, 0
+
+    def read(self, size=-1):
+        chunk = self.stream.read(size)
+        self.count += len(chunk)
+        if self.count > self.limit:
+            raise PipelineError(f'archive too large when unpacked (max {BATCH_MAX_BYTES} bytes)', status=413)
+        return chunk
+
+
+def save_batch_uploads():
+    # save every uploaded file, unpacking ZIP archives; returns
+    # ([(name, save_path, sha256)], [manifest entries for skipped files])
+    uploads, skipped = [], []
+    unpacked_bytes = 0
+
+    def add(name, save):
+        filename = secure_filename(os.path.basename(name))
+        if not allowed_file(filename):
+            skipped.append({'file': name, 'status': 'skipped', 'error': 'file type not allowed'})
+            return
+        if len(uploads) >= BATCH_MAX_FILES:
+            raise PipelineError(f'too many files (max {BATCH_MAX_FILES})', status=413)
+        save_path = os.path.join(UPLOAD_DIR, str(uuid.uuid4()) + '_' + filename)
+        digest = save(save_path)
+        UPLOAD_BYTES.observe(os.path.getsize(save_path))
+        uploads.append((name, save_path, digest))
+
+    for f in request.files.getlist('files') + request.files.getlist('file'):
+        if not f.filename.lower().endswith('.zip'):
+            add(f.filename, lambda save_path, f=f: save_hashed(f.stream, save_path))
+            continue
+        try:
+            archive = zipfile.ZipFile(f.stream)
+        except zipfile.BadZipFile:
+            raise PipelineError(f'{f.filename} is not a valid ZIP archive', status=400)
+        with archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+
+                def extract(save_path, info=info):
+                    # zip bombs are stopped by the bytes actually unpacked, not the sizes the archive declares
+                    nonlocal unpacked_bytes
+                    try:
+                        with archive.open(info) as src:
+                            reader = CountingReader(src, BATCH_MAX_BYTES - unpacked_bytes)
+                            digest = save_hashed(reader, save_path)
+                    except (zipfile.BadZipFile, zlib.error, EOFError) as e:
+                        raise PipelineError(f'{info.filename} is corrupt in its ZIP archive', detail=str(e),
+                                            status=400)
+                    unpacked_bytes += reader.count
+                    return digest
+
+                add(info.filename, extract)
+    return uploads, skipped
+
+
+def process_batch_file(name, save_path, params, parent=None):
+    # one batch member; never raises, failures become manifest entries
+    BATCH_FILES_PENDING.dec()
+    start = time.perf_counter()
+    entry = {'file': name}
+    try:
+        with TRACER.span('batch_file', parent=parent, file=name):
+            out_path, headers = process_document_once(save_path,
+                                                      dict(params, filename=secure_filename(os.path.basename(name))),
+                                                      str(uuid.uuid4()))
+        entry.update(status='done', headers=headers)
+    except PipelineError as e:
+        out_path = None
+        entry.update(status='failed', error=e.error, detail=e.detail)
     except Exception as e:
-        return jsonify({'error': 'ocr failed', 'detail': str(e)}), 500
+        out_path = None
+        entry.update(status='failed', error=str(e))
+    entry['seconds'] = round(time.perf_counter() - start, 3)
+    return out_path, entry
 
-    # translate
-    translated = translate_text(raw_text, target)
 
-    # produce output
-    out_filename = uid + '_translated'
-    out_path = os.path.join(OUT_DIR, out_filename)
+@app.route('/api/batch', methods=['POST'])
+def batch_endpoint():
+    # expects: files (one or more, ZIP archives are unpacked), target, output, preprocess
+    # returns a ZIP streamed as files finish, ending with manifest.json
+    try:
+        params = read_translate_params()
+        uploads, skipped = save_batch_uploads()
+    except PipelineError as e:
+        return jsonify(e.to_json()), e.status
+    if not uploads:
+        return jsonify({'error': 'no supported files uploaded', 'skipped': skipped}), 400
 
-    if output_type == 'text':
-        out_path += '.txt'
-        with open(out_path, 'w', encoding='utf-8') as fh:
-            fh.write(translated)
-        return send_file(out_path, as_attachment=True)
+    started = time.perf_counter()
+    BATCH_FILES_PENDING.inc(len(uploads))
+    futures = [BATCH_POOL.submit(process_batch_file, name, path, dict(params, upload_sha256=digest), g.trace)
+               for name, path, digest in uploads]
+    print(f"Batch of {len(uploads)} files queued ({len(skipped)} skipped)")
 
-    if output_type == 'pdf':
-        out_path += '.pdf'
+    def members():
+        manifest = {'target': params['target'], 'output': params['output'], 'files': list(skipped)}
+        used_names = set()
         try:
-            text_to_pdf(translated, out_path)
-            return send_file(out_path, as_attachment=True)
-        except Exception as e:
-            return jsonify({'error': 'pdf generation failed', 'detail': str(e)}), 500
+            for future in as_completed(futures):
+                out_path, entry = future.result()
+                entry['completed_after'] = round(time.perf_counter() - started, 3)
+                if out_path:
+                    stem = os.path.splitext(os.path.basename(entry['file']))[0]
+                    arcname = name = f"{stem}_translated{os.path.splitext(out_path)[1]}"
+                    # files of the same name from different folders; a numbered name may be taken too
+                    copy = 1
+                    while arcname in used_names:
+                        arcname = f"{copy}_{name}"
+                        copy += 1
+                    used_names.add(arcname)
+                    entry['output'] = arcname
+                    yield arcname, out_path
+                manifest['files'].append(entry)
+        finally:
+            # the client went away: don't process files nobody will receive
+            for future in futures:
+                if future.cancel():
+                    BATCH_FILES_PENDING.dec()
+        manifest['seconds'] = round(time.perf_counter() - started, 3)
+        manifest['failed'] = sum(1 for entry in manifest['files'] if entry['status'] == 'failed')
+        yield 'manifest.json', json.dumps(manifest, indent=2).encode('utf-8')
 
-    if output_type == 'image':
-        # create a simple image with translated text
-        out_path += '.png'
+    return Response(stream_with_context(stream_zip(members())), mimetype='application/zip',
+                    headers={'Content-Disposition': 'attachment; filename=translations.zip'})
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events_endpoint(job_id):
+    # Server-Sent Events: replays the job's progress so far, then follows it
+    # live until the job is done or failed. Reconnecting clients resume after
+    # the Last-Event-ID header (or ?after=<id>).
+    if not JOB_QUEUE.store.get(job_id):
+        return jsonify({'error': 'job not found'}), 404
+    try:
+        after = int(request.headers.get('Last-Event-ID') or request.args.get('after', 0))
+    except ValueError:
+        return jsonify({'error': 'invalid event id'}), 400
+
+    def format_event(event):
+        event_id = f"id: {event['id']}\n" if event.get('id') else ''
+        return f"{event_id}event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+    def ended(job):
+        # the terminal event of a job that ended without one in its log (e.g. failed before
+        # terminal events were logged with the state change, or removed meanwhile)
+        if job is None:
+            return {'event': 'failed', 'data': {'error': 'job not found'}}
+        if job['status'] == 'done':
+            return {'event': 'done', 'data': {'result': job['result_meta']}}
+        return {'event': 'failed', 'data': {'error': job['error']}}
+
+    def stream(after):
+        yield "retry: 2000\n\n"
+        last_sent = time.monotonic()
+        timeout = 0.0  # on connect, replay and check the stored state without waiting
+        while True:
+            # wakes up at once for events from this process; polls for other processes' workers
+            events = JOB_QUEUE.store.events(job_id, after, timeout=timeout)
+            timeout = 1.0
+            if not events:
+                job = JOB_QUEUE.store.get(job_id)
+                if job is not None and job['status'] not in TERMINAL_EVENTS:
+                    if time.monotonic() - last_sent >= JOB_EVENTS_KEEPALIVE:
+                        last_sent = time.monotonic()
+                        yield ": keep-alive\n\n"
+                    continue
+                # ended: its state is committed together with its event, so this read has it
+                events = JOB_QUEUE.store.events(job_id, after)
+                if not any(event['event'] in TERMINAL_EVENTS for event in events):
+                    events.append(ended(job))
+            last_sent = time.monotonic()
+            for event in events:
+                after = event.get('id', after)
+                yield format_event(event)
+                if event['event'] in TERMINAL_EVENTS:
+                    return
+
+    return Response(stream_with_context(stream(after)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Warm-up: heavy modules are imported lazily so the process starts fast; this
+# loads them, registers the PDF font, checks the tesseract binary, spawns the
+# OCR workers and opens provider connections before /api/ready says so.
+# Provider and pool failures are reported but do not block readiness.
+WARMUP_STATE = {'status': 'pending' if WARMUP else 'disabled', 'seconds': None, 'steps': {}}
+WARMUP_REQUIRED = ('modules', 'pdf_font', 'tesseract')
+WARMUP_MODULES = ('numpy', 'PIL.ImageFont', 'pytesseract', 'pdf2image', 'reportlab.platypus', 'bs4',
+                  'deep_translator')
+_warm_up_started = threading.Event()
+
+
+def preload_modules():
+    import importlib
+    for name in WARMUP_MODULES:
+        importlib.import_module(name)
+    return list(WARMUP_MODULES)
+
+
+def start_ocr_pool():
+    # one trivial task per worker makes the pool spawn them and preload their engines
+    pool = get_pool(OCR_WORKERS, OCR_ENGINE, OCR_PRELOAD_LANGS)
+    return len({future.result() for future in [pool.submit(os.getpid) for _ in range(OCR_WORKERS)]})
+
+
+def warm_engines():
+    # warm engines in this process too, for image requests OCR'd on request threads
+    tesseract_engine.preload(OCR_PRELOAD_LANGS, OCR_ENGINE)
+    return tesseract_engine.resolve_engine(OCR_ENGINE)
+
+
+def connect_providers():
+    return {provider.name: provider.warm_up(WARMUP_TIMEOUT) for provider in TRANSLATION_ROUTER.providers}
+
+
+def warm_up():
+    start = time.perf_counter()
+    steps = [('modules', preload_modules), ('pdf_font', pdf_font_name), ('tesseract', tesseract_engine.version),
+             ('ocr_engines', warm_engines)]
+    if WARMUP_OCR_POOL and OCR_WORKERS > 1:
+        steps.append(('ocr_pool', start_ocr_pool))
+    if WARMUP_PROVIDERS:
+        steps.append(('providers', connect_providers))
+
+    for name, step in steps:
+        started = time.perf_counter()
         try:
-            # naive: create white canvas and draw text
-            img = Image.new('RGB', (1200, 1600), color='white')
-            d = ImageDraw.Draw(img)
-            # try to pick a default font
-            try:
-                font = ImageFont.truetype('arial.ttf', 20)
-            except:
-                font = ImageFont.load_default()
-
-            y = 10
-            for line in translated.split('\n'):
-                d.text((10, y), line, fill=(0, 0, 0), font=font)
-                y += 22
-                if y > img.size[1] - 40:
-                    break
-            img.save(out_path)
-            return send_file(out_path, as_attachment=True)
+            result = {'ok': True, 'detail': step()}
         except Exception as e:
-            return jsonify({'error': 'image generation failed', 'detail': str(e)}), 500
+            print(f"Warm-up step {name} failed: {e}")
+            result = {'ok': False, 'error': str(e)}
+        result['seconds'] = round(time.perf_counter() - started, 3)
+        WARMUP_STATE['steps'] = dict(WARMUP_STATE['steps'], **{name: result})
+
+    ready = all(WARMUP_STATE['steps'][name]['ok'] for name in WARMUP_REQUIRED)
+    WARMUP_STATE['seconds'] = round(time.perf_counter() - start, 3)
+    WARMUP_STATE['status'] = 'ready' if ready else 'failed'
+    print(f"Warm-up {WARMUP_STATE['status']} in {WARMUP_STATE['seconds']:.2f}s")
+
+
+def start_warm_up():
+    # runs once, in the background, so the server can answer liveness checks meanwhile
+    if WARMUP and not _warm_up_started.is_set():
+        _warm_up_started.set()
+        threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+
+_background_lock = threading.Lock()
+_background_started = False
+
+
+def start_background():
+    # Job consumers, the janitor and warm-up belong to the process that serves
+    # requests only. Nothing starts at import: the OCR workers and the
+    # reloader's watcher process import this module too.
+    global _background_started
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+    JANITOR.start()
+    JOB_QUEUE.start()
+    start_warm_up()
+    print(f"OCR engine: {tesseract_engine.describe(OCR_ENGINE)}")
+    if not FALLBACK_PROVIDERS:
+        print("Translation failover inactive: no TRANSLATION_FALLBACK provider configured")
+
+
+def create_app():
+    # WSGI entry point (see wsgi.py): the app with its background work running
+    start_background()
+    return app
 
-    return jsonify({'error': 'unknown output type'}), 400
 
 if __name__ == '__main__':
     # Set Tesseract path if on Windows
@@ -575,11 +1648,16 @@ if __name__ == '__main__':
             print(f"Error: Tesseract not found at {tesseract_path}")
             print("Please install Tesseract from: https://github.com/UB-Mannheim/tesseract/wiki")
             sys.exit(1)
-        pytesseract.pytesseract.tesseract_cmd = tesseract_path
+        tesseract_engine.pytesseract.pytesseract.tesseract_cmd = tesseract_path
     
     # Ensure upload and output directories exist
     os.makedirs(UPLOAD_DIR, exist_ok=True)
     os.makedirs(OUT_DIR, exist_ok=True)
+
+    # With the reloader on, this process only watches files and its child serves requests
+    debug = True
+    if not debug or is_running_from_reloader():
+        start_background()
     
     print("\n" + "="*50)
     print("OCR Translator API")
@@ -587,7 +1665,14 @@ if __name__ == '__main__':
     print("Available endpoints:")
     print("  - http://localhost:5000/")
     print("  - http://localhost:5000/api/test")
+    print("  - http://localhost:5000/api/ready (503 until warm-up is done)")
     print("  - http://localhost:5000/api/translate (POST)")
+    print("  - http://localhost:5000/api/jobs (POST), /api/jobs/<id>, /api/jobs/<id>/result")
+    print("  - http://localhost:5000/api/jobs/<id>/events (Server-Sent Events)")
+    print("  - http://localhost:5000/api/batch (POST, many files or a ZIP in, ZIP out)")
+    print("  - http://localhost:5000/api/storage/stats")
+    print("  - http://localhost:5000/metrics (Prometheus)")
+    print("  - http://localhost:5000/api/admin/traces/<id>, /api/admin/profiles/<id> (admin)")
     print("\nPress Ctrl+C to stop the server\n")
     
-    app.run(debug=True, port=5000, host='0.0.0.0')
+    app.run(debug=debug, port=5000, host='0.0.0.0')
@@ -12,16 +12,119 @@ BASE_DIR = Path(__file__).parent
 UPLOAD_FOLDER = BASE_DIR / 'uploads'
 OUTPUT_FOLDER = BASE_DIR / 'translations'
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+IN_MEMORY_MAX_BYTES = int(os.getenv('IN_MEMORY_MAX_BYTES', 8 * 1024 * 1024))  # larger uploads are spooled to disk; 0 always spools
+# Background cleanup of uploads and translations: idle files expire, then the
+# least recently used go until both directories fit the quota (0 disables either)
+UPLOAD_MAX_AGE_HOURS = float(os.getenv('UPLOAD_MAX_AGE_HOURS', 24))
+OUTPUT_MAX_AGE_HOURS = float(os.getenv('OUTPUT_MAX_AGE_HOURS', 24))
+DISK_QUOTA_MB = int(os.getenv('DISK_QUOTA_MB', 2048))
+JANITOR_INTERVAL = float(os.getenv('JANITOR_INTERVAL', 300))  # seconds between sweeps; 0 disables the janitor
+JANITOR_GRACE_SECONDS = float(os.getenv('JANITOR_GRACE_SECONDS', 600))  # newer files are never evicted for the quota
+# Document sessions (POST /api/documents): OCR output kept so one upload can be translated many times
+DOCUMENT_DIR = Path(os.getenv('DOCUMENT_DIR', BASE_DIR / 'cache' / 'documents'))
+DOCUMENT_TTL_HOURS = float(os.getenv('DOCUMENT_TTL_HOURS', 24))  # since last use; 0 keeps documents until evicted for the quota
 ALLOWED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.pdf'}
 
 # Tesseract OCR settings
 TESSERACT_CMD = os.getenv('TESSERACT_CMD', r'C:\Program Files\Tesseract-OCR\tesseract.exe')
 TESSERACT_LANGS = os.getenv('TESSERACT_LANGS', 'eng')
+OCR_ENGINE = os.getenv('OCR_ENGINE', 'auto')  # 'tesserocr' (warm engines), 'pytesseract' or 'auto'
+OCR_PRELOAD_LANGS = [lang for lang in os.getenv('OCR_PRELOAD_LANGS', TESSERACT_LANGS).split(',') if lang]
+OCR_PREPROCESS = os.getenv('OCR_PREPROCESS', 'none')  # default steps: 'none', 'all' or e.g. 'deskew,binarize'
+PREPROCESS_TARGET_DPI = int(os.getenv('PREPROCESS_TARGET_DPI', 300))
+PREPROCESS_LINE_HEIGHT = int(os.getenv('PREPROCESS_LINE_HEIGHT', 40))  # px per text line after downscaling
+SKIP_BLANK_PAGES = os.getenv('SKIP_BLANK_PAGES', 'true').lower() == 'true'
+BLANK_PAGE_INK_RATIO = float(os.getenv('BLANK_PAGE_INK_RATIO', 0.0002))  # share of pixels darker than the page background below which it is blank
+OCR_WORKERS = int(os.getenv('OCR_WORKERS', os.cpu_count() or 1))  # processes used for page-parallel PDF OCR
+# OpenMP threads per tesseract (OMP_THREAD_LIMIT); sized so the OCR workers together use each CPU once
+TESSERACT_THREADS = int(os.getenv('TESSERACT_THREADS', max(1, (os.cpu_count() or 1) // max(1, OCR_WORKERS))))
+# Admission control: documents OCR'd at once; further requests queue briefly, then get 429 + Retry-After
+OCR_MAX_ACTIVE = int(os.getenv('OCR_MAX_ACTIVE', os.cpu_count() or 1))
+OCR_MAX_WAITING = int(os.getenv('OCR_MAX_WAITING', 2 * OCR_MAX_ACTIVE))
+OCR_MAX_WAIT_SECONDS = float(os.getenv('OCR_MAX_WAIT_SECONDS', 30))
+PDF_DPI = int(os.getenv('PDF_DPI', 200))
+PDF_RASTER_WINDOW = int(os.getenv('PDF_RASTER_WINDOW', 4))  # pages rendered per pdftoppm call
+PDF_PAGE_BUDGET = int(os.getenv('PDF_PAGE_BUDGET', 2 * OCR_WORKERS))  # max rendered pages held at once
+PDF_TEXT_LAYER = os.getenv('PDF_TEXT_LAYER', 'true').lower() == 'true'  # read embedded text instead of OCR'ing
+PDF_TEXT_LAYER_MIN_CHARS = int(os.getenv('PDF_TEXT_LAYER_MIN_CHARS', 20))
+
+# OCR result cache settings
+OCR_CACHE_ITEMS = int(os.getenv('OCR_CACHE_ITEMS', 512))  # in-memory LRU entries
+OCR_CACHE_DIR = Path(os.getenv('OCR_CACHE_DIR', BASE_DIR / 'cache' / 'ocr'))
+OCR_CACHE_MAX_BYTES = int(os.getenv('OCR_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+# Finished documents keyed by upload bytes + target + output + preprocessing; repeats are served from here
+RESULT_CACHE = os.getenv('RESULT_CACHE', 'true').lower() == 'true'
+RESULT_CACHE_DIR = Path(os.getenv('RESULT_CACHE_DIR', BASE_DIR / 'cache' / 'results'))
+RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+PIPELINE_VERSION = os.getenv('PIPELINE_VERSION', '1')  # bump when output changes so stored results are not reused
+
+# Translation memory: translated segments persisted across requests and restarts
+TRANSLATION_MEMORY = os.getenv('TRANSLATION_MEMORY', 'true').lower() == 'true'
+TRANSLATION_MEMORY_PATH = Path(os.getenv('TRANSLATION_MEMORY_PATH', BASE_DIR / 'cache' / 'translation_memory.sqlite3'))
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv('TRANSLATION_MEMORY_MAX_ENTRIES', 100000))
+
+# Background jobs (POST /api/jobs); state is persisted so queued work survives a restart
+JOB_DB_PATH = Path(os.getenv('JOB_DB_PATH', BASE_DIR / 'cache' / 'jobs.sqlite3'))
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))  # documents processed at once
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))  # restarts a job may be interrupted by
+# A running job is picked up by another process once its owner stops renewing it for this long
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', 60))
+JOB_MAX_QUEUED = int(os.getenv('JOB_MAX_QUEUED', 1000))  # new jobs get 429 beyond this backlog
+JOB_EVENTS_KEEPALIVE = float(os.getenv('JOB_EVENTS_KEEPALIVE', 15))  # seconds between SSE keep-alive comments
+JOB_TTL_HOURS = float(os.getenv('JOB_TTL_HOURS', 24))  # finished jobs and their events are purged after this; 0 keeps them
+
+# Bulk translation (POST /api/batch)
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', 4))  # files processed at once, shared by all batches
+BATCH_MAX_FILES = int(os.getenv('BATCH_MAX_FILES', 500))
+BATCH_MAX_BYTES = int(os.getenv('BATCH_MAX_BYTES', 1024 * 1024 * 1024))  # total unpacked size of uploaded ZIPs
+
+# Request tracing: spans of every request appended to a JSONL file, rotated past TRACE_MAX_BYTES
+# The janitor expires files in its directory, so give it a directory of its own
+TRACING = os.getenv('TRACING', 'true').lower() == 'true'
+TRACE_PATH = Path(os.getenv('TRACE_PATH', BASE_DIR / 'cache' / 'traces' / 'traces.jsonl'))
+TRACE_MAX_BYTES = int(os.getenv('TRACE_MAX_BYTES', 50 * 1024 * 1024))
+TRACE_MAX_AGE_HOURS = float(os.getenv('TRACE_MAX_AGE_HOURS', 168))
+# Profiles captured for admin requests with ?profile=cprofile|sample
+PROFILE_DIR = Path(os.getenv('PROFILE_DIR', BASE_DIR / 'cache' / 'profiles'))
+PROFILE_MAX_AGE_HOURS = float(os.getenv('PROFILE_MAX_AGE_HOURS', 24))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', 0.005))  # seconds between stack samples
+
+# Warm-up before /api/ready reports the instance as ready
+WARMUP = os.getenv('WARMUP', 'true').lower() == 'true'
+WARMUP_OCR_POOL = os.getenv('WARMUP_OCR_POOL', 'true').lower() == 'true'  # spawn OCR workers up front
+WARMUP_PROVIDERS = os.getenv('WARMUP_PROVIDERS', 'true').lower() == 'true'  # open provider connections up front
+WARMUP_TIMEOUT = float(os.getenv('WARMUP_TIMEOUT', 5))  # seconds per provider connection
+
+# Admin endpoints and request profiling require this token in X-Admin-Token; without one they are disabled (404)
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
 
 # Translation settings
 TRANSLATION_SERVICE = os.getenv('TRANSLATION_SERVICE', 'libretranslate')
 LIBRETRANSLATE_URL = os.getenv('LIBRETRANSLATE_URL', 'https://libretranslate.com/translate')
 DEEPL_API_KEY = os.getenv('DEEPL_API_KEY', '')
+LIBRETRANSLATE_API_KEY = os.getenv('LIBRETRANSLATE_API_KEY', '')
+# Provider app.py fails over to while Google's circuit is open: 'libretranslate', 'deepl' (needs
+# DEEPL_API_KEY) or '' for none, in which case failover is inactive and Google failures only fail fast
+TRANSLATION_FALLBACK = os.getenv('TRANSLATION_FALLBACK', '').lower()
+# Most requests in flight per provider, shared by every document being translated
+GOOGLE_CONCURRENCY = int(os.getenv('GOOGLE_CONCURRENCY', 4))
+LIBRETRANSLATE_CONCURRENCY = int(os.getenv('LIBRETRANSLATE_CONCURRENCY', 4))
+DEEPL_CONCURRENCY = int(os.getenv('DEEPL_CONCURRENCY', 8))
+# Provider sessions keep one pooled connection per request in flight; failed connects are retried
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', 0.5))  # seconds, doubled per retry
+# Sustained requests per second per provider; halved on 429/5xx and recovered on success
+GOOGLE_RATE = float(os.getenv('GOOGLE_RATE', 5))
+LIBRETRANSLATE_RATE = float(os.getenv('LIBRETRANSLATE_RATE', 2))
+DEEPL_RATE = float(os.getenv('DEEPL_RATE', 10))
+TRANSLATION_RETRY_BUDGET = int(os.getenv('TRANSLATION_RETRY_BUDGET', 20))  # retries per document
+# Circuit breaker per provider: open after this many failed or slow calls in a row, retry after a cool-down
+BREAKER_FAILURES = int(os.getenv('BREAKER_FAILURES', 5))
+BREAKER_SLOW_SECONDS = float(os.getenv('BREAKER_SLOW_SECONDS', 10))
+BREAKER_OPEN_SECONDS = float(os.getenv('BREAKER_OPEN_SECONDS', 30))
+# Fail the request instead of returning a document with untranslated segments
+TRANSLATION_FAIL_ON_UNTRANSLATED = os.getenv('TRANSLATION_FAIL_ON_UNTRANSLATED', 'false').lower() == 'true'
 
 # Application settings
 SECRET_KEY = os.getenv('SECRET_KEY', 'dev-key-change-in-production')
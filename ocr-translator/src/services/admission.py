@@ -0,0 +1,107 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+MAX_RETRY_AFTER = 300
+
+
+class Overloaded(Exception):
+    """The server is saturated; the client should retry after ``retry_after`` seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Global limit on CPU-heavy work with a bounded wait queue
+
+    At most ``max_active`` callers hold a slot at once. Request handlers
+    (``bounded=True``) wait in a queue of at most ``max_waiting`` for up to
+    ``max_wait`` seconds and are turned away with Overloaded beyond that,
+    so a burst gets fast 429s instead of every request slowing down.
+    Background work (jobs, batch files) is already queued elsewhere and
+    waits for a slot as long as it takes.
+
+    The Retry-After hint is derived from a moving average of how long
+    slots are held.
+    """
+
+    def __init__(self, max_active: int, max_waiting: int, max_wait: float = 30.0):
+        self.max_active = max(1, max_active)
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.avg_seconds = 1.0
+        self._cond = threading.Condition()
+
+    def retry_after(self, backlog: Optional[int] = None) -> int:
+        """Seconds until ``backlog`` queued items (default: the current queue) should have drained"""
+        with self._cond:
+            return self._estimate(self.waiting if backlog is None else backlog)
+
+    @contextmanager
+    def slot(self, bounded: bool = True) -> Iterator[None]:
+        """
+        Hold one slot for the duration of the block
+
+        Raises:
+            Overloaded: when ``bounded`` and the queue is full or the wait timed out
+        """
+        self._acquire(bounded)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - start)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'active': self.active,
+                'waiting': self.waiting,
+                'max_active': self.max_active,
+                'max_waiting': self.max_waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'avg_seconds': round(self.avg_seconds, 3),
+            }
+
+    def _acquire(self, bounded: bool) -> None:
+        with self._cond:
+            if self.active >= self.max_active:
+                if bounded and self.waiting >= self.max_waiting:
+                    self.rejected += 1
+                    raise Overloaded('server busy, wait queue is full', self._estimate(self.waiting))
+                self.waiting += 1
+                deadline = time.monotonic() + self.max_wait if bounded else None
+                try:
+                    while self.active >= self.max_active:
+                        remaining = deadline - time.monotonic() if deadline is not None else None
+                        if remaining is not None and remaining <= 0:
+                            self.rejected += 1
+                            raise Overloaded('server busy, timed out waiting for a slot',
+                                             self._estimate(self.waiting))
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.active += 1
+            self.admitted += 1
+
+    def _release(self, seconds: float) -> None:
+        with self._cond:
+            self.active -= 1
+            self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * seconds
+            # waiters may have given up meanwhile, so wake them all to re-check
+            self._cond.notify_all()
+
+    def _estimate(self, backlog: int) -> int:
+        seconds = self.avg_seconds * (backlog + 1) / self.max_active
+        return max(1, min(MAX_RETRY_AFTER, math.ceil(seconds)))
@@ -0,0 +1,213 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional, Sequence, TypeVar
+
+from .rate_limiter import ProviderError
+
+T = TypeVar('T')
+
+
+# 4xx statuses that mean the provider won't serve us right now (credentials, quota,
+# rate), rather than that the request was bad; these count against the provider
+PROVIDER_FAULT_STATUS = frozenset({401, 403, 429, 456})
+
+
+class ProviderUnavailable(ProviderError):
+    """Every provider in a route is open-circuited or failed"""
+
+    @property
+    def retryable(self) -> bool:
+        # the breakers are already failing fast; retrying would only wait out their backoff
+        return False
+
+
+def is_caller_error(error: Exception) -> bool:
+    """
+    Whether a failed call was the caller's fault rather than the provider's
+
+    A ValueError (bad input, an unsupported language, a mangled response)
+    or a 4xx answer to a bad request would fail on any provider and says
+    nothing about this one's health.
+    """
+    if isinstance(error, ValueError):
+        return True
+    return (isinstance(error, ProviderError) and error.status is not None
+            and 400 <= error.status < 500 and error.status not in PROVIDER_FAULT_STATUS)
+
+
+class CircuitBreaker:
+    """
+    Tracks one provider's health and stops calling it while it is failing
+
+    ``failure_threshold`` consecutive failures, or calls slower than
+    ``slow_seconds``, open the circuit: calls are refused for
+    ``open_seconds`` instead of each waiting out a timeout. After that a
+    single trial call is let through (half-open); success closes the
+    circuit again, failure re-opens it. Latencies of the last ``window``
+    calls are kept for routing and stats.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, slow_seconds: float = 10.0,
+                 open_seconds: float = 30.0, window: int = 100):
+        self.failure_threshold = failure_threshold
+        self.slow_seconds = slow_seconds
+        self.open_seconds = open_seconds
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.successes = 0
+        self.failures = 0
+        self._latencies = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._last_call = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may be made now; a half-open circuit admits one trial call"""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+                return True
+            return self.state == self.CLOSED
+
+    def record_success(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+            self._last_call = time.monotonic()
+            self.successes += 1
+            if seconds > self.slow_seconds:
+                self._failed()
+            else:
+                self.consecutive_failures = 0
+                self.state = self.CLOSED
+                self._trial_in_flight = False
+
+    def record_failure(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+            self._last_call = time.monotonic()
+            self.failures += 1
+            self._failed()
+
+    def latency(self, quantile: float) -> Optional[float]:
+        """Latency quantile over the rolling window, or None before any call"""
+        with self._lock:
+            if not self._latencies:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(quantile * len(latencies)))]
+
+    @property
+    def degraded(self) -> bool:
+        """
+        Recent p95 latency is past the slow-call threshold
+
+        A degraded provider gets little traffic, so its window would never
+        recover; after ``open_seconds`` without calls the old samples are
+        dropped and it is tried again.
+        """
+        p95 = self.latency(0.95)
+        if p95 is None or p95 <= self.slow_seconds:
+            return False
+        with self._lock:
+            if time.monotonic() - self._last_call < self.open_seconds:
+                return True
+            self._latencies.clear()
+            return False
+
+    def stats(self) -> dict:
+        p50, p95 = self.latency(0.5), self.latency(0.95)
+        with self._lock:
+            return {
+                'state': self.state,
+                'successes': self.successes,
+                'failures': self.failures,
+                'consecutive_failures': self.consecutive_failures,
+                'trips': self.trips,
+                'p50_seconds': p50,
+                'p95_seconds': p95,
+            }
+
+    def _failed(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+                print(f"Circuit opened after {self.consecutive_failures} failed or slow calls")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+
+class ProviderRouter:
+    """
+    Sends each call to the first healthy provider, failing over down the list
+
+    Providers are tried in preference order, except that one whose recent
+    p95 latency is past its slow-call threshold drops behind the healthy
+    ones. Open circuits are skipped without waiting, so a degraded upstream
+    costs one fast failover instead of a timeout per request. Batches should
+    be packed to ``max_items``/``max_chars``, which every provider accepts,
+    and sent at most ``concurrency`` at a time, the smallest cap of any
+    provider, so a failover doesn't pile a document's batches onto a
+    smaller provider.
+    """
+
+    def __init__(self, providers: Sequence, failure_threshold: int = 5, slow_seconds: float = 10.0,
+                 open_seconds: float = 30.0):
+        self.providers = list(providers)
+        self.breakers = {
+            provider.name: CircuitBreaker(failure_threshold, slow_seconds, open_seconds)
+            for provider in self.providers
+        }
+        self.max_items = min(provider.max_items for provider in self.providers)
+        self.max_chars = min(provider.max_chars for provider in self.providers)
+        self.concurrency = min(getattr(provider, 'concurrency', 1) for provider in self.providers)
+
+    def ordered(self) -> List:
+        """Providers in the order they would be tried now"""
+        return sorted(self.providers, key=lambda provider: self.breakers[provider.name].degraded)
+
+    def call(self, fn: Callable[..., T]) -> T:
+        """
+        Call ``fn(provider)`` on the best available provider
+
+        Caller errors (see ``is_caller_error``) are raised straight away
+        without counting against the provider or trying the next one.
+
+        Raises:
+            ProviderUnavailable: when no provider is available or all of them failed
+        """
+        errors = []
+        for provider in self.ordered():
+            breaker = self.breakers[provider.name]
+            if not breaker.allow():
+                errors.append(f"{provider.name}: circuit open")
+                continue
+            start = time.monotonic()
+            try:
+                result = fn(provider)
+            except Exception as e:
+                if is_caller_error(e):
+                    breaker.record_success(time.monotonic() - start)
+                    raise
+                breaker.record_failure(time.monotonic() - start)
+                print(f"{provider.name} failed ({e}), trying next provider")
+                errors.append(f"{provider.name}: {e}")
+                continue
+            breaker.record_success(time.monotonic() - start)
+            return result
+        raise ProviderUnavailable(f"no translation provider available ({'; '.join(errors)})")
+
+    def stats(self) -> dict:
+        return {name: breaker.stats() for name, breaker in self.breakers.items()}
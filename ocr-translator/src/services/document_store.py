@@ -0,0 +1,82 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, Union
+
+_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class DocumentStore:
+    """
+    OCR output of uploaded documents, kept for repeated translation
+
+    Each document is one JSON file named by its id, so the FileJanitor
+    can expire and quota-evict documents along with uploads and results.
+    A document expires ``ttl`` seconds after it was last used; reading it
+    refreshes that. ``get`` enforces the TTL itself as well, so a document
+    never outlives it between janitor sweeps.
+    """
+
+    def __init__(self, directory: Union[str, Path], ttl: float = 24 * 3600):
+        """
+        Args:
+            directory: Where document files are kept
+            ttl: Seconds a document is kept after its last use; 0 keeps it until removed
+        """
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def create(self, document: dict) -> dict:
+        """
+        Store a new document
+
+        Args:
+            document: JSON-serialisable fields, e.g. the OCR text and page results
+
+        Returns:
+            The stored document with its ``id``, ``created_at`` and ``expires_at``
+        """
+        document = dict(document, id=uuid.uuid4().hex, created_at=time.time())
+        path = self._path(document['id'])
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(document, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp_path, path)
+        return self._with_expiry(document, document['created_at'])
+
+    def get(self, document_id: str) -> Optional[dict]:
+        """Return a document and mark it as used, or None if it is unknown or expired"""
+        if not _ID_PATTERN.match(document_id):
+            return None
+        path = self._path(document_id)
+        now = time.time()
+        try:
+            stat = path.stat()
+            if self.ttl and now - max(stat.st_atime, stat.st_mtime) > self.ttl:
+                path.unlink()
+                return None
+            document = json.loads(path.read_text(encoding='utf-8'))
+            os.utime(path, (now, now))
+        except (OSError, ValueError):
+            return None
+        return self._with_expiry(document, now)
+
+    def delete(self, document_id: str) -> bool:
+        if not _ID_PATTERN.match(document_id):
+            return False
+        try:
+            self._path(document_id).unlink()
+            return True
+        except OSError:
+            return False
+
+    def _path(self, document_id: str) -> Path:
+        return self.directory / f"{document_id}.json"
+
+    def _with_expiry(self, document: dict, last_used: float) -> dict:
+        document['expires_at'] = last_used + self.ttl if self.ttl else None
+        return document
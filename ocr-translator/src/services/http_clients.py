@@ -0,0 +1,52 @@
+import threading
+from typing import Dict, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# One session per provider and pool settings, created on first use and reused across requests and threads
+_sessions: Dict[Tuple[str, int, int, float], requests.Session] = {}
+_lock = threading.Lock()
+
+
+def build_session(pool_size: int, retries: int = 2, backoff: float = 0.5) -> requests.Session:
+    """
+    Session with a keep-alive pool of ``pool_size`` connections per host
+
+    Failed connection attempts are retried here with exponential backoff,
+    since nothing has reached the provider yet. 429/5xx responses and
+    timeouts are left to the provider's rate limiter (see rate_limiter).
+    """
+    retry = Retry(total=retries, connect=retries, read=0, status=0, other=0, backoff_factor=backoff,
+                  respect_retry_after_header=False, raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, pool_size), max_retries=retry, pool_block=True)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(provider: str, pool_size: int, retries: int = 2, backoff: float = 0.5) -> requests.Session:
+    """
+    Shared session for a provider
+
+    The pool size should match the provider's concurrency cap so every
+    request in flight has a warm connection to reuse. Callers asking for
+    other settings get a session of their own rather than whichever pool
+    the first caller happened to size.
+    """
+    key = (provider, max(1, pool_size), retries, backoff)
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = build_session(pool_size, retries, backoff)
+        return session
+
+
+def close_sessions() -> None:
+    """Close every shared session, e.g. at shutdown"""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class FileJanitor:
+    """
+    Keeps working directories within an age limit and a shared disk quota
+
+    Each directory has its own maximum age; files idle for longer are
+    removed. If the directories together still exceed ``quota_bytes``, the
+    least recently used files are removed until they fit. A file's last use
+    is the later of its access and modification times, so readers can
+    ``os.utime`` a file to keep it. Files younger than ``grace_seconds`` are
+    never removed for the quota, since they probably belong to a request
+    that is still running. Files named by ``keep`` are never removed at
+    all, however old: they belong to work that has not finished yet.
+    Each sweep also calls ``purge``, to expire records that outlive their
+    files in the same tick, e.g. finished jobs.
+    """
+
+    def __init__(self, max_age: Dict[str, float], quota_bytes: int = 0, grace_seconds: float = 600.0,
+                 interval: float = 300.0, keep: Optional[Callable[[], Iterable[str]]] = None,
+                 purge: Optional[Callable[[], int]] = None):
+        """
+        Args:
+            max_age: Directory path -> maximum idle seconds (0 keeps files forever)
+            quota_bytes: Total size allowed across all directories; 0 disables the quota
+            grace_seconds: Minimum age before a file may be evicted for the quota
+            interval: Seconds between background sweeps
+            keep: Returns the paths still in use, e.g. inputs of queued jobs; called once per sweep
+            purge: Deletes expired records and returns how many; called once per sweep
+        """
+        self.max_age = dict(max_age)
+        self.quota_bytes = quota_bytes
+        self.grace_seconds = grace_seconds
+        self.interval = interval
+        self.keep = keep
+        self.purge = purge
+
+        self.sweeps = 0
+        self.removed = {'expired': 0, 'quota': 0}
+        self.reclaimed_bytes = {'expired': 0, 'quota': 0}
+        self.records_purged = 0
+        self.last_sweep_seconds = 0.0
+        self.disk_bytes = {directory: 0 for directory in self.max_age}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Sweep every ``interval`` seconds on a daemon thread"""
+        with self._lock:
+            if self._thread or self.interval <= 0:
+                return
+            self._thread = threading.Thread(target=self._loop, name='janitor', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def sweep(self) -> dict:
+        """
+        Remove expired files, then evict least recently used files over the quota
+
+        Returns:
+            Files and bytes removed by this sweep, per reason, and the records purged
+        """
+        start = time.perf_counter()
+        now = time.time()
+        removed = {'expired': [0, 0], 'quota': [0, 0]}
+        kept: List[Tuple[float, int, str, str]] = []
+        sizes = {directory: 0 for directory in self.max_age}
+        in_use = {os.path.abspath(path) for path in self.keep()} if self.keep else set()
+
+        for directory, max_age in self.max_age.items():
+            for last_used, size, path in self._scan(directory):
+                if os.path.abspath(path) in in_use:
+                    sizes[directory] += size  # counts toward the quota, but can't be removed
+                    continue
+                if max_age and now - last_used > max_age:
+                    if self._remove(path):
+                        removed['expired'][0] += 1
+                        removed['expired'][1] += size
+                    continue
+                kept.append((last_used, size, path, directory))
+                sizes[directory] += size
+
+        total = sum(sizes.values())
+        if self.quota_bytes and total > self.quota_bytes:
+            for last_used, size, path, directory in sorted(kept):
+                if total <= self.quota_bytes:
+                    break
+                if now - last_used < self.grace_seconds:
+                    break
+                if self._remove(path):
+                    removed['quota'][0] += 1
+                    removed['quota'][1] += size
+                    total -= size
+                    sizes[directory] -= size
+
+        purged = self.purge() if self.purge else 0
+
+        with self._lock:
+            self.sweeps += 1
+            self.records_purged += purged
+            for reason, (count, size) in removed.items():
+                self.removed[reason] += count
+                self.reclaimed_bytes[reason] += size
+            self.disk_bytes = sizes
+            self.last_sweep_seconds = time.perf_counter() - start
+
+        if removed['expired'][0] or removed['quota'][0]:
+            print(f"Janitor removed {removed['expired'][0]} expired and {removed['quota'][0]} over-quota files "
+                  f"({(removed['expired'][1] + removed['quota'][1]) / 1024 / 1024:.1f} MB)")
+        if purged:
+            print(f"Janitor purged {purged} expired records")
+        result = {reason: {'files': count, 'bytes': size} for reason, (count, size) in removed.items()}
+        result['records_purged'] = purged
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'sweeps': self.sweeps,
+                'files_removed': dict(self.removed),
+                'bytes_reclaimed': dict(self.reclaimed_bytes),
+                'records_purged': self.records_purged,
+                'disk_bytes': {os.path.basename(directory): size for directory, size in self.disk_bytes.items()},
+                'quota_bytes': self.quota_bytes,
+                'last_sweep_seconds': round(self.last_sweep_seconds, 3),
+            }
+
+    def _loop(self) -> None:
+        # the first sweep runs straight away to clear what a previous run left behind
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Janitor sweep failed: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    @staticmethod
+    def _scan(directory: str) -> List[Tuple[float, int, str]]:
+        files = []
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return files
+        for entry in entries:
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue  # removed while scanning
+            files.append((max(stat.st_atime, stat.st_mtime), stat.st_size, entry.path))
+        return files
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,373 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Union
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    stage TEXT,
+    params TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    result_path TEXT,
+    result_meta TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    heartbeat_at REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    event TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_events_job ON job_events (job_id, id);
+"""
+
+# Events after which a job's event stream ends; each is logged together with
+# the state change it reports, so a job that ended always has one
+TERMINAL_EVENTS = (DONE, FAILED)
+INTERRUPTED_ERROR = 'interrupted too many times'
+
+_COLUMNS = ('id', 'status', 'stage', 'params', 'input_path', 'result_path', 'result_meta', 'error',
+            'attempts', 'owner', 'heartbeat_at', 'created_at', 'started_at', 'finished_at')
+
+
+def make_owner() -> str:
+    """Identify this process as the owner of the jobs it runs: host, pid and a nonce"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _owner_gone(owner: Optional[str]) -> bool:
+    # Whether the owner is known to be dead without waiting for its lease to
+    # run out: a process on this host that no longer exists, or an earlier
+    # process that had our pid (the caller has already ruled out ourselves)
+    try:
+        host, pid, nonce = owner.split(':')
+        pid = int(pid)
+    except (AttributeError, ValueError):
+        return True
+    if host != socket.gethostname():
+        return False
+    if pid == os.getpid():
+        return True
+    if os.name == 'nt':
+        return False  # os.kill(pid, 0) would terminate the process on Windows
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        return False
+    return False
+
+
+class JobStore:
+    """
+    SQLite-backed job records
+
+    Every state change is committed before it takes effect, so a restart
+    knows which jobs were queued or interrupted and can pick them up again.
+    A running job records its owner process, which renews a lease on it
+    while it runs; only jobs whose owner is gone are picked up again.
+    Progress events are appended to a per-job log that readers can follow
+    from any process; readers in this process are woken as soon as an
+    event is added.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Condition()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (('owner', 'TEXT'), ('heartbeat_at', 'REAL')):
+            if column not in columns:  # databases created before jobs had owners
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.commit()
+
+    def create(self, params: dict, input_path: str) -> dict:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, stage, params, input_path, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, QUEUED, json.dumps(params), input_path, time.time()),
+            )
+            self._conn.commit()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def claim(self, job_id: str, owner: Optional[str] = None) -> Optional[dict]:
+        """Move a queued job to running under ``owner``; None if another worker got it first"""
+        now = time.time()
+        with self._lock:
+            claimed = self._conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, attempts = attempts + 1, owner = ?, heartbeat_at = ?, "
+                "started_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, RUNNING, owner, now, now, job_id, QUEUED),
+            ).rowcount
+            self._conn.commit()
+        return self.get(job_id) if claimed else None
+
+    def heartbeat(self, owner: str) -> int:
+        """Renew the lease on every job ``owner`` is running; returns how many"""
+        with self._lock:
+            renewed = self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = ?", (time.time(), owner, RUNNING),
+            ).rowcount
+            self._conn.commit()
+        return renewed
+
+    def set_stage(self, job_id: str, stage: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET stage = ? WHERE id = ?", (stage, job_id))
+            self._conn.commit()
+
+    def finish(self, job_id: str, result_path: str, result_meta: dict, event_data: Optional[dict] = None) -> bool:
+        """Mark a running job done and log its 'done' event; False if it was not running"""
+        data = dict(event_data or {'result': result_meta})
+        with self._lock:
+            finished = self._conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, result_path = ?, result_meta = ?, finished_at = ? "
+                "WHERE id = ? AND status = ?",
+                (DONE, DONE, result_path, json.dumps(result_meta), time.time(), job_id, RUNNING),
+            ).rowcount
+            if finished:
+                self._insert_event(job_id, DONE, data)
+            self._conn.commit()
+            self._lock.notify_all()
+        return bool(finished)
+
+    def fail(self, job_id: str, error: str, event_data: Optional[dict] = None) -> bool:
+        """Mark a job failed and log its 'failed' event; False if it had already ended"""
+        data = dict(event_data or {'error': error})
+        with self._lock:
+            failed = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+                (FAILED, error, time.time(), job_id, QUEUED, RUNNING),
+            ).rowcount
+            if failed:
+                self._insert_event(job_id, FAILED, data)
+            self._conn.commit()
+            self._lock.notify_all()
+        return bool(failed)
+
+    def recover(self, max_attempts: int, lease_seconds: float = 60.0, owner: Optional[str] = None) -> List[str]:
+        """
+        Requeue running jobs whose owner is gone and return their ids
+
+        An owner is gone when its lease has not been renewed for
+        ``lease_seconds``, or at once when it was a process on this host
+        that has exited. Jobs of live owners, and of the calling ``owner``,
+        are left alone. Jobs that were
+        already interrupted ``max_attempts`` times are failed instead, so a
+        document that crashes the worker cannot loop forever.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, owner, heartbeat_at, attempts FROM jobs WHERE status = ?", (RUNNING,),
+            ).fetchall()
+            requeued = []
+            for job_id, job_owner, heartbeat_at, attempts in rows:
+                if job_owner is not None and job_owner == owner:
+                    continue
+                if (heartbeat_at or 0) > now - lease_seconds and not _owner_gone(job_owner):
+                    continue
+                if attempts >= max_attempts:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND status = ?",
+                        (FAILED, INTERRUPTED_ERROR, now, job_id, RUNNING),
+                    )
+                    self._insert_event(job_id, FAILED, {'error': INTERRUPTED_ERROR})
+                else:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, stage = ?, owner = NULL WHERE id = ? AND status = ?",
+                        (QUEUED, QUEUED, job_id, RUNNING),
+                    )
+                    self._insert_event(job_id, QUEUED, {'job_id': job_id, 'requeued': True})
+                    requeued.append(job_id)
+            self._conn.commit()
+            self._lock.notify_all()
+        return requeued
+
+    def active_inputs(self) -> List[str]:
+        """Input paths of queued and running jobs, which must be kept until they finish"""
+        with self._lock:
+            rows = self._conn.execute("SELECT input_path FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING))
+            return [row[0] for row in rows.fetchall()]
+
+    def purge(self, max_age: float) -> int:
+        """
+        Delete jobs that ended more than ``max_age`` seconds ago, with their events
+
+        Queued and running jobs are never purged. Returns how many jobs were deleted.
+        """
+        cutoff = time.time() - max_age
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM job_events WHERE job_id IN "
+                "(SELECT id FROM jobs WHERE status IN (?, ?) AND finished_at < ?)",
+                (DONE, FAILED, cutoff),
+            )
+            purged = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (DONE, FAILED, cutoff),
+            ).rowcount
+            self._conn.commit()
+        return purged
+
+    def queued(self) -> List[str]:
+        """Ids of every queued job, oldest first"""
+        with self._lock:
+            rows = self._conn.execute("SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,))
+            return [row[0] for row in rows.fetchall()]
+
+    def add_event(self, job_id: str, event: str, data: dict) -> None:
+        with self._lock:
+            self._insert_event(job_id, event, data)
+            self._conn.commit()
+            self._lock.notify_all()
+
+    def _insert_event(self, job_id: str, event: str, data: dict) -> None:
+        # part of the caller's transaction, so a state change and its event are committed together
+        self._conn.execute(
+            "INSERT INTO job_events (job_id, event, data, created_at) VALUES (?, ?, ?, ?)",
+            (job_id, event, json.dumps(data), time.time()),
+        )
+
+    def events(self, job_id: str, after: int = 0, timeout: float = 0.0) -> List[dict]:
+        """
+        Events logged for a job after event id ``after``
+
+        With a ``timeout``, waits up to that long for new events first.
+        Events written by other processes are seen on the next poll.
+        """
+        with self._lock:
+            rows = self._read_events(job_id, after)
+            if not rows and timeout:
+                self._lock.wait(timeout)
+                rows = self._read_events(job_id, after)
+        return [{'id': row[0], 'event': row[1], 'data': json.loads(row[2])} for row in rows]
+
+    def _read_events(self, job_id: str, after: int):
+        return self._conn.execute(
+            "SELECT id, event, data FROM job_events WHERE job_id = ? AND id > ? ORDER BY id",
+            (job_id, after),
+        ).fetchall()
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    @staticmethod
+    def _to_dict(row) -> dict:
+        job = dict(zip(_COLUMNS, row))
+        job['params'] = json.loads(job['params'])
+        job['result_meta'] = json.loads(job['result_meta']) if job['result_meta'] else None
+        return job
+
+
+class JobQueue:
+    """
+    Runs persisted jobs on a pool of background threads
+
+    ``handler(job, emit)`` does the work and returns
+    ``(result_path, result_meta)``; any exception fails the job with its
+    message. ``emit(event, data)`` logs a progress event, stamped with the
+    seconds since the job started; a 'stage' event also updates the job's
+    stage. ``start`` must be called once, in the process that serves
+    requests, to resume jobs left over from a previous run. It also starts
+    a thread that renews this process's job leases every third of
+    ``lease_seconds`` and picks up jobs of owners that went away since.
+    """
+
+    def __init__(self, store: JobStore, handler: Callable, workers: int = 2, max_attempts: int = 3,
+                 lease_seconds: float = 60.0):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.owner = make_owner()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.store.recover(self.max_attempts, self.lease_seconds, self.owner)
+        queued = self.store.queued()
+        if queued:
+            print(f"Resuming {len(queued)} queued jobs")
+        for job_id in queued:
+            self._executor.submit(self._run, job_id)
+        threading.Thread(target=self._heartbeat, name='job-lease', daemon=True).start()
+
+    def _heartbeat(self) -> None:
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            try:
+                self.store.heartbeat(self.owner)
+                for job_id in self.store.recover(self.max_attempts, self.lease_seconds, self.owner):
+                    print(f"Resuming job {job_id} of a worker that went away")
+                    self._executor.submit(self._run, job_id)
+            except Exception as e:
+                print(f"Job lease renewal failed: {e}")
+
+    def submit(self, params: dict, input_path: str) -> dict:
+        """Persist a job and queue it; returns the job record"""
+        self.start()
+        job = self.store.create(params, input_path)
+        self.store.add_event(job['id'], QUEUED, {'job_id': job['id']})
+        self._executor.submit(self._run, job['id'])
+        return job
+
+    def _run(self, job_id: str) -> None:
+        job = self.store.claim(job_id, self.owner)
+        if job is None:
+            return
+        start = time.perf_counter()
+
+        def elapsed():
+            return round(time.perf_counter() - start, 3)
+
+        def emit(event, data):
+            if event == 'stage' and data.get('status') == 'started':
+                self.store.set_stage(job_id, data['stage'])
+            self.store.add_event(job_id, event, dict(data, elapsed=elapsed()))
+
+        emit(RUNNING, {'attempt': job['attempts']})
+        try:
+            result_path, result_meta = self.handler(job, emit)
+            # inside the try: a result that can't be stored fails the job rather than leaving it running
+            self.store.finish(job_id, result_path, result_meta, {'result': result_meta, 'elapsed': elapsed()})
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            self.store.fail(job_id, str(e), {'error': str(e), 'elapsed': elapsed()})
+            return
+        print(f"Job {job_id} done in {time.perf_counter() - start:.2f}s")
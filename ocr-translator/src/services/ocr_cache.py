@@ -0,0 +1,148 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+from PIL import Image
+
+
+class OCRCache:
+    """
+    Content-addressed cache of OCR results
+
+    Entries are keyed by a hash of the page pixels plus the OCR language,
+    config and engine (with its version), so the same page uploaded again (or rendered from the same PDF)
+    is never OCR'd twice. Lookups go through an in-memory LRU tier first,
+    then a size-capped on-disk tier shared by every process using the same
+    directory.
+    """
+
+    def __init__(self, max_items: int = 512, disk_dir: Optional[Union[str, Path]] = None,
+                 disk_max_bytes: int = 256 * 1024 * 1024):
+        self.max_items = max_items
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._disk_bytes = 0
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(f.stat().st_size for f in self.disk_dir.glob('*/*.txt'))
+
+    @staticmethod
+    def make_key(image: Image.Image, lang: Optional[str] = None, config: str = '', engine: str = '') -> str:
+        """Hash an image's pixels together with the OCR language, config and engine identity"""
+        digest = hashlib.sha256()
+        digest.update(f"{image.mode}|{image.size}|{lang or ''}|{config}|{engine}|".encode('utf-8'))
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached text for a key, or None on a miss"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+        text = self._read_disk(key)
+        with self._lock:
+            if text is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, text)
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """Store OCR text under a key in both tiers"""
+        with self._lock:
+            self._remember(key, text)
+        self._write_disk(key, text)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'memory_items': len(self._memory),
+                'disk_bytes': self._disk_bytes,
+            }
+
+    def _remember(self, key: str, text: str) -> None:
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.txt"
+
+    def _read_disk(self, key: str) -> Optional[str]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            text = path.read_text(encoding='utf-8')
+            os.utime(path)  # mark as recently used for eviction
+            return text
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, text: str) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            previous = path.stat().st_size  # overwritten below, so it stops counting
+        except OSError:
+            previous = 0
+        try:
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(text, encoding='utf-8')
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"OCR cache write failed: {e}")
+            return
+        with self._lock:
+            self._disk_bytes += path.stat().st_size - previous
+            over_budget = self._disk_bytes > self.disk_max_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        # Drop least recently used files until the tier is back under 90% of its cap
+        files = []
+        for path in self.disk_dir.glob('*/*.txt'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        target = int(self.disk_max_bytes * 0.9)
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_bytes = total
@@ -1,41 +1,73 @@
 import pytesseract
 from PIL import Image
-from pdf2image import convert_from_path
 from pathlib import Path
-from ..config import TESSERACT_CMD, TESSERACT_LANGS
+from ..config import (TESSERACT_CMD, TESSERACT_LANGS, OCR_WORKERS, PDF_DPI,
+                      PDF_RASTER_WINDOW, PDF_PAGE_BUDGET, PDF_TEXT_LAYER, PDF_TEXT_LAYER_MIN_CHARS,
+                      OCR_CACHE_ITEMS, OCR_CACHE_DIR, OCR_CACHE_MAX_BYTES,
+                      OCR_ENGINE, OCR_PRELOAD_LANGS,
+                      OCR_PREPROCESS, PREPROCESS_TARGET_DPI, PREPROCESS_LINE_HEIGHT,
+                      SKIP_BLANK_PAGES, BLANK_PAGE_INK_RATIO)
+from .parallel_ocr import ocr_pdf_pages
+from .ocr_cache import OCRCache
+from . import tesseract_engine
+from .preprocess import preprocess, parse_steps, make_options, options_key, is_blank
 
 class OCRService:
     def __init__(self):
         """Initialize OCR service with Tesseract configuration"""
-        pytesseract.pytesseract.tesseract_cmd = TESSERACT_MD
+        pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+        self.cache = OCRCache(max_items=OCR_CACHE_ITEMS, disk_dir=OCR_CACHE_DIR,
+                              disk_max_bytes=OCR_CACHE_MAX_BYTES)
         
-    def extract_text_from_image(self, image_path, lang=None):
+    @staticmethod
+    def preprocess_options(steps=None):
+        """Preprocessing settings for a step string ('none', 'all', 'deskew,binarize', ...)"""
+        return make_options(parse_steps(steps if steps is not None else OCR_PREPROCESS),
+                            PREPROCESS_TARGET_DPI, PREPROCESS_LINE_HEIGHT)
+
+    def extract_text_from_image(self, image_path, lang=None, preprocess_steps=None):
         """Extract text from an image file"""
         try:
             img = Image.open(image_path)
-            return pytesseract.image_to_string(img, lang=lang or TESSERACT_LANGS)
+            lang = lang or TESSERACT_LANGS
+            options = self.preprocess_options(preprocess_steps)
+            if SKIP_BLANK_PAGES and is_blank(img, BLANK_PAGE_INK_RATIO):
+                return ''
+            key = self.cache.make_key(img, lang, options_key(options), tesseract_engine.identity(OCR_ENGINE))
+            text = self.cache.get(key)
+            if text is None:
+                img, _ = preprocess(img, options)
+                text = tesseract_engine.image_to_string(img, lang=lang, engine=OCR_ENGINE)
+                self.cache.put(key, text)
+            return text
         except Exception as e:
             raise Exception(f"Failed to process image: {str(e)}")
     
-    def extract_text_from_pdf(self, pdf_path, lang=None):
-        """Extract text from a PDF file"""
+    def extract_pages_from_pdf(self, pdf_path, lang=None, workers=None, preprocess_steps=None):
+        """Extract text and timings for each page of a PDF, using its text layer where present"""
         try:
-            pages = convert_from_path(pdf_path)
-            texts = []
-            for page in pages:
-                text = pytesseract.image_to_string(page, lang=lang or TESSERACT_LANGS)
-                texts.append(text)
-            return "\n\n".join(texts)
+            return ocr_pdf_pages(pdf_path, lang=lang or TESSERACT_LANGS,
+                                 workers=workers or OCR_WORKERS, dpi=PDF_DPI,
+                                 window=PDF_RASTER_WINDOW, page_budget=PDF_PAGE_BUDGET,
+                                 use_text_layer=PDF_TEXT_LAYER, min_text_chars=PDF_TEXT_LAYER_MIN_CHARS,
+                                 cache=self.cache, engine=OCR_ENGINE, preload_langs=OCR_PRELOAD_LANGS,
+                                 preprocess_options=self.preprocess_options(preprocess_steps),
+                                 blank_ink_ratio=BLANK_PAGE_INK_RATIO if SKIP_BLANK_PAGES else None)
         except Exception as e:
             raise Exception(f"Failed to process PDF: {str(e)}")
+
+    def extract_text_from_pdf(self, pdf_path, lang=None, workers=None, preprocess_steps=None):
+        """Extract text from a PDF file"""
+        pages = self.extract_pages_from_pdf(pdf_path, lang, workers, preprocess_steps)
+        return "\n\n".join(page['text'] for page in pages)
     
-    def extract_text(self, file_path, lang=None):
+    def extract_text(self, file_path, lang=None, preprocess_steps=None):
         """Extract text from a file (supports image or PDF)"""
         file_path = Path(file_path)
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
             
         if file_path.suffix.lower() == '.pdf':
-            return self.extract_text_from_pdf(file_path, lang)
+            return self.extract_text_from_pdf(file_path, lang, preprocess_steps=preprocess_steps)
         else:
-            return self.extract_text_from_image(file_path, lang)
+            return self.extract_text_from_image(file_path, lang, preprocess_steps)
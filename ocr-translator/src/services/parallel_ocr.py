@@ -0,0 +1,313 @@
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, List, Optional
+
+from PIL import Image
+
+from .pdf_rasterizer import StreamingRasterizer, count_pdf_pages, DEFAULT_WINDOW, DEFAULT_PAGE_BUDGET
+from .pdf_text_layer import extract_text_layer, has_text_layer, DEFAULT_MIN_CHARS
+from .ocr_cache import OCRCache
+from . import tesseract_engine
+from .preprocess import preprocess, options_key, is_blank
+
+DEFAULT_DPI = 200
+
+# One pool per worker count and engine, created on first use and reused across requests
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def default_workers() -> int:
+    """Number of OCR worker processes to use when none is configured"""
+    return os.cpu_count() or 1
+
+
+def _init_worker(tesseract_cmd: str, engine: str, preload_langs: tuple) -> None:
+    """Propagate the parent's Tesseract binary path and warm up OCR engines in a worker process"""
+    import pytesseract
+    pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    tesseract_engine.preload(preload_langs, engine)
+
+
+def get_pool(workers: int, engine: str = 'auto', preload_langs: Iterable[str] = ()) -> ProcessPoolExecutor:
+    """
+    Return the shared process pool for the given worker count and engine
+
+    Workers are long-lived and keep one warm engine per language; engines
+    for ``preload_langs`` are initialized when the pool starts, others on
+    first use.
+    """
+    import pytesseract
+    with _pools_lock:
+        pool = _pools.get((workers, engine))
+        if pool is None:
+            # 'spawn' keeps workers independent of the threaded Flask parent
+            # and behaves the same on Windows and Linux
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(pytesseract.pytesseract.tesseract_cmd, engine, tuple(preload_langs)),
+            )
+            _pools[(workers, engine)] = pool
+        return pool
+
+
+def shutdown_pools() -> None:
+    """Shut down every OCR process pool"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+def ocr_page_image(source, page_number: int, lang: Optional[str] = None, engine: str = 'auto',
+                   preprocess_options: Optional[dict] = None, blank_ink_ratio: Optional[float] = None) -> dict:
+    """
+    OCR one rendered page (runs inside a worker process when parallel)
+
+    Args:
+        source: PIL image, or path to a spilled page image
+        page_number: 1-based page number, echoed back in the result
+        lang: Tesseract language string
+        engine: OCR engine, see tesseract_engine.resolve_engine
+        preprocess_options: Optional preprocessing settings (preprocess.make_options)
+        blank_ink_ratio: Skip OCR for pages with less ink than this; None disables
+
+    Returns:
+        Dict with the page number, its text, its source ('ocr' or 'blank'),
+        and the preprocessing and OCR times
+    """
+    image = Image.open(source) if isinstance(source, str) else source
+    if blank_ink_ratio is not None and is_blank(image, blank_ink_ratio):
+        return blank_page_result(page_number)
+
+    image, report = preprocess(image, preprocess_options)
+    start = time.perf_counter()
+    text = tesseract_engine.image_to_string(image, lang=lang, engine=engine)
+    return {
+        'page': page_number,
+        'text': text,
+        'source': 'ocr',
+        'preprocess_seconds': report['seconds'],
+        'ocr_seconds': time.perf_counter() - start,
+    }
+
+
+def blank_page_result(page_number: int) -> dict:
+    """Result dict for a page skipped as blank"""
+    return {'page': page_number, 'text': '', 'source': 'blank', 'preprocess_seconds': 0.0, 'ocr_seconds': 0.0}
+
+
+def failed_page_result(page_number: int, error: Exception) -> dict:
+    """Result dict for a page whose OCR raised; the rest of the document goes on"""
+    return {'page': page_number, 'text': '', 'source': 'failed', 'error': str(error) or type(error).__name__,
+            'preprocess_seconds': 0.0, 'ocr_seconds': 0.0}
+
+
+def cached_page_result(page_number: int, text: str) -> dict:
+    """Result dict for a page served from the OCR cache"""
+    return {'page': page_number, 'text': text, 'source': 'cache', 'ocr_seconds': 0.0}
+
+
+def page_event(result: dict, page_count: int) -> dict:
+    """Progress event payload for a finished page"""
+    return {
+        'page': result['page'],
+        'pages': page_count,
+        'source': result['source'],
+        'rasterize_seconds': result.get('rasterize_seconds', 0.0),
+        'preprocess_seconds': result.get('preprocess_seconds', 0.0),
+        'ocr_seconds': result['ocr_seconds'],
+    }
+
+
+def text_layer_pages(pdf_path, page_count: int, min_chars: int = DEFAULT_MIN_CHARS) -> dict:
+    """
+    Results for the pages whose embedded text layer can be used instead of OCR
+
+    Returns:
+        Dict of page number to result dict, empty if there is no usable layer.
+        The layer is extracted in one pdftotext call, so there is no time per
+        page: the pages report 0 and the total is logged.
+    """
+    start = time.perf_counter()
+    layer = extract_text_layer(pdf_path, page_count)
+    if layer is None:
+        return {}
+    results = {
+        number: {
+            'page': number,
+            'text': text,
+            'source': 'text_layer',
+            'rasterize_seconds': 0.0,
+            'ocr_seconds': 0.0,
+        }
+        for number, text in enumerate(layer, start=1)
+        if has_text_layer(text, min_chars)
+    }
+    print(f"Text layer read in {time.perf_counter() - start:.2f}s, used for {len(results)}/{page_count} pages")
+    return results
+
+
+def ocr_pdf_pages(pdf_path, lang: Optional[str] = None, workers: Optional[int] = None,
+                  dpi: int = DEFAULT_DPI, window: int = DEFAULT_WINDOW,
+                  page_budget: int = DEFAULT_PAGE_BUDGET, use_text_layer: bool = True,
+                  min_text_chars: int = DEFAULT_MIN_CHARS,
+                  cache: Optional[OCRCache] = None, engine: str = 'auto',
+                  preload_langs: Iterable[str] = (), preprocess_options: Optional[dict] = None,
+                  blank_ink_ratio: Optional[float] = None,
+                  on_progress: Optional[Callable[[str, dict], None]] = None) -> List[dict]:
+    """
+    OCR every page of a PDF while it is still being rasterized
+
+    Born-digital pages with an embedded text layer are read directly and
+    never rasterized; only the remaining (scanned) pages go through OCR.
+    With a ``cache``, rendered pages whose pixels were OCR'd before (with the
+    same language) are answered from it instead.
+    Pages are rendered in windows by a StreamingRasterizer, so at most
+    ``page_budget`` rendered pages are held at once. With more than one
+    worker, pages are spilled to disk and their paths fanned out to the
+    process pool.
+
+    Args:
+        pdf_path: Path to the PDF file
+        lang: Tesseract language string (e.g. 'eng', 'eng+hin')
+        workers: Number of worker processes; 1 runs in-process
+        dpi: Rasterization resolution
+        window: Pages rendered per pdftoppm call
+        page_budget: Maximum number of rendered pages held at once
+        use_text_layer: Read embedded text instead of OCR'ing where present
+        min_text_chars: Alphanumeric characters a page's text layer needs
+        cache: Optional OCRCache consulted before OCR'ing a rendered page
+        engine: OCR engine; pool workers keep a warm engine per language
+        preload_langs: Languages to initialize when the worker pool starts
+        preprocess_options: Optional preprocessing applied to each page before OCR
+        blank_ink_ratio: Skip OCR for blank pages below this ink ratio; None disables
+        on_progress: Called as ('rasterized', ...) when a page is rendered and
+            ('page', page_event(...)) when its text is ready
+
+    Returns:
+        One dict per page with 'page', 'text', 'source' ('ocr', 'cache',
+        'blank', 'text_layer' or 'failed', which also has the 'error'),
+        'rasterize_seconds' and 'ocr_seconds', in page order
+
+    Raises:
+        RuntimeError: If OCR failed on every page
+    """
+    workers = workers or default_workers()
+    page_count = count_pdf_pages(pdf_path)
+    results = text_layer_pages(pdf_path, page_count, min_text_chars) if use_text_layer else {}
+    to_ocr = [number for number in range(1, page_count + 1) if number not in results]
+
+    progress = on_progress or (lambda event, data: None)
+    for number in sorted(results):
+        progress('page', page_event(results[number], page_count))
+
+    def rasterized(page):
+        progress('rasterized', {'page': page['page'], 'pages': page_count,
+                                'rasterize_seconds': page['rasterize_seconds']})
+
+    # done callbacks run after future.result() returns, so the pages collected below
+    # wait on this too; otherwise the last events could arrive after we've returned
+    reported = threading.Semaphore(0)
+
+    def page_done(future, page):
+        # free the page's budget slot as soon as its OCR finishes, and report it
+        try:
+            rasterizer.release(page)
+            error = future.exception()
+            result = failed_page_result(page['page'], error) if error else future.result()
+            progress('page', page_event(dict(result, rasterize_seconds=page['rasterize_seconds']), page_count))
+        finally:
+            reported.release()
+
+    def checked(pages):
+        # a page that can't be read is reported and left empty; only when no page at all
+        # could be read (e.g. tesseract is missing, or the pool died) does the document fail
+        failed = [page for page in pages if page['source'] == 'failed']
+        for page in failed:
+            print(f"OCR of page {page['page']} failed: {page['error']}")
+        if failed and len(failed) == len(pages):
+            raise RuntimeError(f"OCR failed on every page: {failed[0]['error']}")
+        return pages
+
+    rasterizer = StreamingRasterizer(pdf_path, dpi=dpi, window=window, page_budget=page_budget,
+                                     spill_to_disk=workers > 1, pages=to_ocr, page_count=page_count)
+    parallel = workers > 1 and len(to_ocr) > 1
+
+    cache_config = options_key(preprocess_options)
+    cache_engine = tesseract_engine.identity(engine) if cache else ''
+
+    with rasterizer:
+        if not parallel:
+            for page in rasterizer:
+                rasterized(page)
+                try:
+                    image = rasterizer.load_image(page)
+                    # blank pages are skipped before paying for the cache key's hash
+                    if blank_ink_ratio is not None and is_blank(image, blank_ink_ratio):
+                        result = blank_page_result(page['page'])
+                    else:
+                        key = cache.make_key(image, lang, cache_config, cache_engine) if cache else None
+                        text = cache.get(key) if cache else None
+                        if text is not None:
+                            result = cached_page_result(page['page'], text)
+                        else:
+                            result = ocr_page_image(image, page['page'], lang, engine, preprocess_options)
+                            if cache:
+                                cache.put(key, result['text'])
+                except Exception as e:
+                    result = failed_page_result(page['page'], e)
+                finally:
+                    rasterizer.release(page)
+                result['rasterize_seconds'] = page['rasterize_seconds']
+                results[page['page']] = result
+                progress('page', page_event(result, page_count))
+            return checked([results[number] for number in sorted(results)])
+
+        pool = get_pool(workers, engine, preload_langs)
+        pending = []
+        for page in rasterizer:
+            rasterized(page)
+            key = None
+            if cache:
+                # the page is decoded here anyway for its cache key, so the blank
+                # check comes first and blank pages skip the hash and the pool
+                image = rasterizer.load_image(page)
+                if blank_ink_ratio is not None and is_blank(image, blank_ink_ratio):
+                    rasterizer.release(page)
+                    results[page['page']] = dict(blank_page_result(page['page']),
+                                                 rasterize_seconds=page['rasterize_seconds'])
+                    progress('page', page_event(results[page['page']], page_count))
+                    continue
+                key = cache.make_key(image, lang, cache_config, cache_engine)
+                text = cache.get(key)
+                if text is not None:
+                    rasterizer.release(page)
+                    results[page['page']] = dict(cached_page_result(page['page'], text),
+                                                 rasterize_seconds=page['rasterize_seconds'])
+                    progress('page', page_event(results[page['page']], page_count))
+                    continue
+            future = pool.submit(ocr_page_image, page['path'], page['page'], lang, engine, preprocess_options,
+                                 blank_ink_ratio)
+            future.add_done_callback(lambda done, page=page: page_done(done, page))
+            pending.append((page, key, future))
+
+        # every page is waited for, even after one fails: the spilled pages the others
+        # still read are removed when the rasterizer closes
+        for page, key, future in pending:
+            try:
+                result = future.result()
+            except Exception as e:
+                result = failed_page_result(page['page'], e)
+            result['rasterize_seconds'] = page['rasterize_seconds']
+            results[page['page']] = result
+            if cache and result['source'] == 'ocr':
+                cache.put(key, result['text'])
+        for _ in pending:
+            reported.acquire()
+        return checked([results[number] for number in sorted(results)])
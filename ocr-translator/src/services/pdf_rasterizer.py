@@ -0,0 +1,161 @@
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from typing import Iterator, List, Optional
+
+from PIL import Image
+
+DEFAULT_WINDOW = 4
+DEFAULT_PAGE_BUDGET = 8
+
+_DONE = object()
+
+
+def count_pdf_pages(pdf_path) -> int:
+    """Return the number of pages in a PDF"""
+    from pdf2image import pdfinfo_from_path
+    return int(pdfinfo_from_path(str(pdf_path))['Pages'])
+
+
+class StreamingRasterizer:
+    """
+    Render PDF pages in small windows on a background thread
+
+    At most ``page_budget`` rendered pages exist at any time: the renderer
+    blocks until consumers call ``release()`` on pages they are done with.
+    Peak memory is therefore bounded by the budget rather than by document
+    length, and consumers can start on page 1 while later windows render.
+
+    With ``spill_to_disk`` pages are written as PPM files to a private temp
+    directory and yielded as paths, so only the page being OCR'd is decoded.
+    ``pages`` restricts rendering to a subset of 1-based page numbers.
+
+    Usage:
+        with StreamingRasterizer(path) as rasterizer:
+            for page in rasterizer:
+                ...
+                rasterizer.release(page)
+    """
+
+    def __init__(self, pdf_path, dpi: int = 200, window: int = DEFAULT_WINDOW,
+                 page_budget: int = DEFAULT_PAGE_BUDGET, spill_to_disk: bool = False,
+                 temp_dir: Optional[str] = None, pages: Optional[List[int]] = None,
+                 page_count: Optional[int] = None):
+        self.pdf_path = str(pdf_path)
+        self.dpi = dpi
+        self.window = max(1, window)
+        self.page_budget = max(page_budget, self.window)
+        self.spill_to_disk = spill_to_disk
+        self.page_count = page_count or count_pdf_pages(self.pdf_path)
+        self.pages = sorted(pages) if pages is not None else list(range(1, self.page_count + 1))
+
+        self._temp_root = temp_dir
+        self._spill_dir = None
+        self._queue = queue.Queue()
+        self._slots = threading.Semaphore(self.page_budget)
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if self.spill_to_disk:
+            self._spill_dir = tempfile.mkdtemp(prefix='raster_', dir=self._temp_root)
+        self._thread = threading.Thread(target=self._render, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self) -> None:
+        """Stop rendering and remove any spilled page files"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._spill_dir:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+    def __iter__(self) -> Iterator[dict]:
+        """
+        Yield pages in order as they are rendered
+
+        Each page is a dict with its 1-based ``page`` number, either an
+        ``image`` (in memory) or a ``path`` (spilled), and ``rasterize_seconds``.
+        """
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def release(self, page: dict) -> None:
+        """Free a consumed page so the renderer can move on"""
+        path = page.get('path')
+        if path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        page['image'] = None
+        self._slots.release()
+
+    @staticmethod
+    def load_image(page: dict) -> Image.Image:
+        """Return the PIL image for a rendered page"""
+        return page['image'] if page.get('image') is not None else Image.open(page['path'])
+
+    def _acquire_slot(self) -> bool:
+        while not self._stopped.is_set():
+            if self._slots.acquire(timeout=0.1):
+                return True
+        return False
+
+    def _windows(self) -> Iterator[List[int]]:
+        # Runs of consecutive pages, each at most `window` long
+        window = []
+        for number in self.pages:
+            if window and (number != window[-1] + 1 or len(window) == self.window):
+                yield window
+                window = []
+            window.append(number)
+        if window:
+            yield window
+
+    def _render(self) -> None:
+        from pdf2image import convert_from_path
+        try:
+            for window in self._windows():
+                first, last = window[0], window[-1]
+                for _ in window:
+                    if not self._acquire_slot():
+                        return
+
+                start = time.perf_counter()
+                rendered = convert_from_path(
+                    self.pdf_path,
+                    dpi=self.dpi,
+                    first_page=first,
+                    last_page=last,
+                    output_folder=self._spill_dir,
+                    paths_only=self.spill_to_disk,
+                    fmt='ppm',
+                )
+                per_page = (time.perf_counter() - start) / max(1, len(rendered))
+
+                for offset, item in enumerate(rendered):
+                    page = {'page': first + offset, 'image': None, 'path': None, 'rasterize_seconds': per_page}
+                    if self.spill_to_disk:
+                        page['path'] = item
+                    else:
+                        page['image'] = item
+                    self._queue.put(page)
+        except Exception as e:
+            self._queue.put(e)
+        finally:
+            self._queue.put(_DONE)
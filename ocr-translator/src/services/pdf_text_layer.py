@@ -0,0 +1,40 @@
+import shutil
+import subprocess
+from typing import List, Optional
+
+DEFAULT_MIN_CHARS = 20
+
+
+def extract_text_layer(pdf_path, page_count: int, timeout: int = 60) -> Optional[List[str]]:
+    """
+    Extract the embedded text layer of every page with poppler's pdftotext
+
+    The whole document is extracted in one call; pdftotext separates pages
+    with form feeds.
+
+    Returns:
+        One string per page, or None if pdftotext is unavailable or fails
+    """
+    pdftotext = shutil.which('pdftotext')
+    if not pdftotext:
+        return None
+
+    try:
+        completed = subprocess.run(
+            [pdftotext, '-enc', 'UTF-8', '-q', str(pdf_path), '-'],
+            capture_output=True,
+            timeout=timeout,
+            check=True,
+        )
+    except (subprocess.SubprocessError, OSError) as e:
+        print(f"Text layer extraction failed: {e}")
+        return None
+
+    pages = completed.stdout.decode('utf-8', 'replace').split('\f')
+    pages += [''] * (page_count - len(pages))
+    return pages[:page_count]
+
+
+def has_text_layer(text: str, min_chars: int = DEFAULT_MIN_CHARS) -> bool:
+    """Whether a page's embedded text is substantial enough to skip OCR"""
+    return sum(1 for char in text if char.isalnum()) >= min_chars
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from PIL import Image
+
+# numpy is imported inside the functions that use it, so importing this module
+# for its option helpers does not pay for numpy
+if TYPE_CHECKING:
+    import numpy as np
+
+# Steps always run in this order, whatever order they were requested in.
+# Every step works on grayscale, so any step implies 'grayscale'.
+STEPS = ('grayscale', 'deskew', 'downscale', 'binarize')
+
+DEFAULT_TARGET_DPI = 300
+DEFAULT_LINE_HEIGHT = 40  # px per text band, roughly the 25-30px x-height Tesseract reads best
+DEFAULT_BLANK_INK_RATIO = 0.0002  # pages with less ink than this fraction are treated as blank
+DEFAULT_INK_CONTRAST = 32  # gray levels below the page background that count as ink
+MAX_SKEW_DEGREES = 5.0
+SKEW_STEP_DEGREES = 0.5
+
+_LUMA = (0.299, 0.587, 0.114)
+
+
+def parse_steps(value: Optional[str]) -> Tuple[str, ...]:
+    """
+    Parse a per-request preprocessing setting
+
+    Args:
+        value: 'none', 'all', or a comma separated list of STEPS
+
+    Returns:
+        The requested steps in pipeline order
+    """
+    value = (value or '').strip().lower()
+    if value in ('', 'none', 'false', '0'):
+        return ()
+    if value in ('all', 'true', '1'):
+        return STEPS
+    steps = {step.strip() for step in value.split(',') if step.strip()}
+    unknown = steps - set(STEPS)
+    if unknown:
+        raise ValueError(f"Unknown preprocessing step(s): {', '.join(sorted(unknown))}")
+    return tuple(step for step in STEPS if step in steps)
+
+
+def make_options(steps=(), target_dpi: int = DEFAULT_TARGET_DPI,
+                 line_height: int = DEFAULT_LINE_HEIGHT) -> dict:
+    """Bundle preprocessing settings; an empty ``steps`` disables preprocessing"""
+    return {'steps': tuple(steps), 'target_dpi': target_dpi, 'line_height': line_height}
+
+
+def options_key(options: Optional[dict]) -> str:
+    """Canonical string for the options, used in OCR cache keys"""
+    if not options or not options['steps']:
+        return ''
+    return f"{','.join(options['steps'])};dpi={options['target_dpi']};lh={options['line_height']}"
+
+
+def to_grayscale(image: Image.Image) -> np.ndarray:
+    """Luma-weighted grayscale as a uint8 array"""
+    import numpy as np
+    if image.mode == 'L':
+        return np.asarray(image, dtype=np.uint8)
+    rgb = np.asarray(image.convert('RGB'), dtype=np.float32)
+    return (rgb @ np.array(_LUMA, dtype=np.float32)).clip(0, 255).astype(np.uint8)
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Global Otsu threshold computed from the histogram"""
+    import numpy as np
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = weight_bg[-1] - weight_bg
+    mass_bg = np.cumsum(hist * levels)
+    mean_bg = mass_bg / np.maximum(weight_bg, 1)
+    mean_fg = (mass_bg[-1] - mass_bg) / np.maximum(weight_fg, 1)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+
+def adaptive_binarize(gray: np.ndarray, window: Optional[int] = None, sensitivity: float = 0.15) -> np.ndarray:
+    """
+    Bradley local-mean binarization using separable box sums
+
+    A pixel is ink when it is more than ``sensitivity`` darker than the mean
+    of the window around it, which copes with shadows and uneven lighting
+    that defeat a single global threshold.
+
+    Sums are kept in uint32 (uint64 only for windows too large for it) in
+    three page-sized buffers reused across the passes. Running sums may wrap
+    around, but a window's sum is a difference of two of them and comes out
+    exact as long as it fits.
+
+    Returns:
+        uint8 array, 0 for ink and 255 for background
+    """
+    import numpy as np
+    height, width = gray.shape
+    window = window or max(15, (min(height, width) // 16) | 1)
+    half = window // 2
+    keep = int(100 * (1 - sensitivity))
+    # the comparison below scales a window's sum by up to 100
+    dtype = np.uint32 if 255 * 100 * window * window < 2 ** 32 else np.uint64
+
+    rows = np.arange(height)
+    cols = np.arange(width)
+    top, bottom = np.clip(rows - half, 0, height), np.clip(rows + half + 1, 0, height)
+    left, right = np.clip(cols - half, 0, width), np.clip(cols + half + 1, 0, width)
+
+    scratch = np.empty((height + 1) * (width + 1), dtype=dtype)
+    sums = np.empty((height, width), dtype=dtype)
+    other = np.empty((height, width), dtype=dtype)
+
+    cumulative = scratch[:height * (width + 1)].reshape(height, width + 1)
+    cumulative[:, 0] = 0
+    np.cumsum(gray, axis=1, dtype=dtype, out=cumulative[:, 1:])
+    np.take(cumulative, right, axis=1, out=sums, mode='clip')
+    np.subtract(sums, np.take(cumulative, left, axis=1, out=other, mode='clip'), out=sums)
+
+    cumulative = scratch[:(height + 1) * width].reshape(height + 1, width)
+    cumulative[0] = 0
+    np.cumsum(sums, axis=0, dtype=dtype, out=cumulative[1:])
+    np.take(cumulative, bottom, axis=0, out=sums, mode='clip')
+    np.subtract(sums, np.take(cumulative, top, axis=0, out=other, mode='clip'), out=sums)
+    del scratch, cumulative
+
+    # gray * pixels in the window * 100 <= window sum * keep
+    counts = other
+    np.multiply((bottom - top).astype(dtype)[:, None], (right - left).astype(dtype)[None, :], out=counts)
+    np.multiply(counts, gray, out=counts)
+    np.multiply(counts, dtype(100), out=counts)
+    np.multiply(sums, dtype(keep), out=sums)
+    return np.where(counts <= sums, np.uint8(0), np.uint8(255))
+
+
+def estimate_line_height(ink: np.ndarray) -> Optional[float]:
+    """Median height of horizontal text bands in a boolean ink mask"""
+    import numpy as np
+    inked_rows = ink.mean(axis=1) > 0.002
+    edges = np.diff(np.concatenate(([0], inked_rows.astype(np.int8), [0])))
+    heights = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+    heights = heights[heights >= 3]
+    return float(np.median(heights)) if heights.size else None
+
+
+def estimate_skew(ink: np.ndarray, max_degrees: float = MAX_SKEW_DEGREES,
+                  step: float = SKEW_STEP_DEGREES) -> float:
+    """
+    Skew angle (degrees, counter-clockwise) that best aligns text rows
+
+    Each candidate rotation of a reduced ink mask is scored by how sharply
+    its row profile alternates between text lines and gaps.
+    """
+    import numpy as np
+    mask = Image.fromarray(np.where(ink, 255, 0).astype(np.uint8))
+    mask.thumbnail((1000, 1000))
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-max_degrees, max_degrees + step / 2, step):
+        profile = np.asarray(mask.rotate(float(angle), resample=Image.NEAREST), dtype=np.float32).sum(axis=1)
+        score = float(np.square(np.diff(profile)).sum())
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def ink_ratio(image: Image.Image, max_side: int = 1024, contrast: int = DEFAULT_INK_CONTRAST) -> float:
+    """
+    Fraction of pixels clearly darker than the page, on a reduced copy of it
+
+    Ink is measured against the page's own background (its median gray)
+    rather than an absolute level, so faded or light-gray print still
+    counts. Reducing averages away scanner noise and keeps the check to a
+    few milliseconds per page; it also blends thin strokes into the paper,
+    which is why the reduction stays mild.
+    """
+    import numpy as np
+    factor = max(1, max(image.size) // max_side)
+    gray = to_grayscale(image.reduce(factor) if factor > 1 else image)
+    hist = np.bincount(gray.ravel(), minlength=256)
+    background = int(np.searchsorted(np.cumsum(hist), gray.size / 2))
+    return float(hist[:max(0, background - contrast)].sum()) / gray.size
+
+
+def is_blank(image: Image.Image, max_ink_ratio: float = DEFAULT_BLANK_INK_RATIO) -> bool:
+    """Whether a page is blank or near-empty and not worth OCR'ing"""
+    return ink_ratio(image) < max_ink_ratio
+
+
+def preprocess(image: Image.Image, options: Optional[dict]) -> Tuple[Image.Image, dict]:
+    """
+    Normalize an image before OCR
+
+    Args:
+        image: Input PIL image
+        options: Settings from make_options
+
+    Returns:
+        (processed image, report) where the report lists the applied steps,
+        the downscale factor, the detected skew and the time taken
+    """
+    import numpy as np
+    start = time.perf_counter()
+    steps = options['steps'] if options else ()
+    report = {'steps': list(steps), 'scale': 1.0, 'skew_degrees': 0.0, 'original_size': image.size}
+    if not steps:
+        report.update(size=image.size, seconds=0.0)
+        return image, report
+
+    gray = to_grayscale(image)
+
+    if 'deskew' in steps:
+        angle = estimate_skew(gray < otsu_threshold(gray))
+        if abs(angle) >= SKEW_STEP_DEGREES:
+            gray = np.asarray(Image.fromarray(gray).rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255))
+            report['skew_degrees'] = angle
+
+    if 'downscale' in steps:
+        scale = 1.0
+        dpi = image.info.get('dpi')
+        if dpi and dpi[0] > options['target_dpi']:
+            scale = options['target_dpi'] / float(dpi[0])
+        line_height = estimate_line_height(gray < otsu_threshold(gray))
+        if line_height and line_height * scale > options['line_height'] * 1.25:
+            scale = options['line_height'] / line_height
+        if scale < 0.95:
+            size = (max(1, round(gray.shape[1] * scale)), max(1, round(gray.shape[0] * scale)))
+            gray = np.asarray(Image.fromarray(gray).resize(size, Image.LANCZOS))
+            report['scale'] = scale
+
+    if 'binarize' in steps:
+        gray = adaptive_binarize(gray)
+
+    result = Image.fromarray(gray)
+    report.update(size=result.size, seconds=time.perf_counter() - start)
+    return result, report
@@ -0,0 +1,79 @@
+import cProfile
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Dict, Type
+
+
+class CProfileCapture:
+    """
+    Deterministic profile of the calling thread, saved as a pstats file
+
+    Only the thread that started it is profiled; work on other threads and
+    in OCR worker processes shows up as time spent waiting on them.
+    """
+
+    extension = '.prof'
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self, path_base: str) -> str:
+        self.profile.disable()
+        path = path_base + self.extension
+        self.profile.dump_stats(path)
+        return path
+
+
+class SamplingCapture:
+    """
+    Statistical profile of every thread in the process, saved as folded stacks
+
+    A background thread records each thread's stack every ``interval``
+    seconds. The output has one ``frame;frame;... count`` line per distinct
+    stack, the input format of flamegraph.pl and speedscope. Threads that
+    are idle at the time (other requests, pool workers waiting for work)
+    are sampled as well.
+    """
+
+    extension = '.folded'
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self._stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self, path_base: str) -> str:
+        self._stop.set()
+        self._thread.join()
+        path = path_base + self.extension
+        with open(path, 'w', encoding='utf-8') as fh:
+            for stack, count in self._stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+        return path
+
+
+PROFILERS: Dict[str, Type] = {'cprofile': CProfileCapture, 'sample': SamplingCapture}
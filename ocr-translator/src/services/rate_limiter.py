@@ -0,0 +1,162 @@
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import requests
+
+# Statuses worth retrying after backing off; anything else fails immediately
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+MAX_RETRY_AFTER = 60.0  # never stall a document longer than this on one Retry-After
+
+
+class ProviderError(Exception):
+    """A provider call that failed, with the HTTP status and Retry-After if there was one"""
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status is None or self.status in RETRYABLE_STATUS
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket shared by every request to one provider
+
+    Tokens refill at ``rate`` per second up to ``burst``. A 429 or 5xx
+    halves the rate (down to ``min_rate``) and pauses the bucket for the
+    provider's Retry-After, or one token interval without one; each success
+    then wins back a twentieth of the configured rate. Under a burst this
+    settles just below the provider's real limit instead of hammering it.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, min_rate: Optional[float] = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 16
+        self.burst = max(1, burst)
+        self.backoffs = 0
+
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._updated - now, 0.0) + (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def success(self) -> None:
+        """Record a successful call, recovering the rate additively"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def backoff(self, retry_after: Optional[float] = None) -> None:
+        """Record a rate-limited or failed call, cutting the rate and pausing the bucket"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            # tokens only start refilling again once the pause is over
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = max(self._updated, now + pause)
+            self.backoffs += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'rate': self.rate, 'max_rate': self.max_rate, 'backoffs': self.backoffs}
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+
+class RetryBudget:
+    """
+    Retries one document may spend across all of its provider calls
+
+    Also counts segments that ended up untranslated, so callers can report
+    them instead of silently returning source text.
+    """
+
+    def __init__(self, max_retries: int):
+        self.max_retries = max_retries
+        self.retries = 0
+        self.untranslated = 0
+        self._lock = threading.Lock()
+
+    def spend(self) -> bool:
+        """Take one retry from the budget; False once it is exhausted"""
+        with self._lock:
+            if self.retries >= self.max_retries:
+                return False
+            self.retries += 1
+            return True
+
+    def record_untranslated(self, count: int = 1) -> None:
+        with self._lock:
+            self.untranslated += count
+
+
+def send_with_retries(send: Callable[[], requests.Response], limiter: AdaptiveRateLimiter,
+                      budget: Optional[RetryBudget] = None) -> requests.Response:
+    """
+    Send a provider request under its rate limiter, retrying on 429/5xx/timeouts
+
+    Args:
+        send: Performs the request and returns the response
+        limiter: The provider's rate limiter
+        budget: The document's retry budget; without one nothing is retried
+
+    Returns:
+        The first response with a non-retryable status
+
+    Raises:
+        ProviderError: when the call still fails after the budget runs out
+    """
+    while True:
+        limiter.acquire()
+        try:
+            response = send()
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = ProviderError(f"{type(e).__name__}: {e}")
+        else:
+            if response.status_code not in RETRYABLE_STATUS:
+                limiter.success()
+                return response
+            error = ProviderError(f"HTTP {response.status_code}", response.status_code,
+                                  parse_retry_after(response.headers.get('Retry-After')))
+            response.close()
+
+        limiter.backoff(error.retry_after)
+        if budget is None or not budget.spend():
+            raise error
+        print(f"Provider call failed ({error}), retrying at {limiter.rate:.2f} req/s")
@@ -0,0 +1,249 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Optional, Tuple, TypeVar, Union
+
+T = TypeVar('T')
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(source: Union[str, BytesIO]) -> str:
+    """SHA-256 of an upload's bytes, from its saved path or a BytesIO"""
+    digest = hashlib.sha256()
+    if isinstance(source, BytesIO):
+        digest.update(source.getbuffer())
+    else:
+        with open(source, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_hashed(stream: BinaryIO, path: Union[str, Path]) -> str:
+    """
+    Write a stream to ``path``, hashing it on the way
+
+    Returns:
+        The file_digest of what was written, so a saved upload never has
+        to be read back just to be hashed
+    """
+    digest = hashlib.sha256()
+    with open(path, 'wb') as fh:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+            fh.write(chunk)
+    return digest.hexdigest()
+
+
+def hash_upload(source: Union[str, BytesIO], *parts: str, digest: Optional[str] = None) -> str:
+    """
+    Hash an upload's bytes together with the settings that shape its result
+
+    Args:
+        source: path of the saved upload, or the upload itself as a BytesIO
+        parts: target language, output type, pipeline version, ...
+        digest: the upload's file_digest when already known, e.g. from save_hashed
+
+    Returns:
+        Hex digest used as the result key
+    """
+    key = '|'.join((digest or file_digest(source),) + parts)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+class ResultStore:
+    """
+    Content-addressed store of finished documents
+
+    Each entry is the rendered output plus a small JSON file with the
+    response headers that went with it, so a repeat request is answered
+    exactly like the original. Files are written under a temporary name
+    and renamed into place, the metadata last, so readers in this or
+    another process never see a partial entry. Least recently used
+    entries are dropped once the store grows past ``max_bytes``, except
+    entries used within the last ``pin_seconds``: a path handed out by
+    ``get`` or ``put`` stays valid at least that long.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int = 1024 * 1024 * 1024,
+                 pin_seconds: float = 300):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.pin_seconds = pin_seconds
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self._bytes = sum(f.stat().st_size for f in self.directory.glob('*/*') if not f.name.endswith('.tmp'))
+
+    def get(self, key: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        """Return (output path, response headers) for a key, or None on a miss"""
+        meta_path = self._meta_path(key)
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            if not meta.get('reusable', True):
+                raise KeyError(key)
+            path = meta_path.with_suffix(meta['ext'])
+            os.utime(path)
+            os.utime(meta_path)  # mark as recently used for eviction
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return str(path), meta['headers']
+
+    def put(self, key: str, output: Union[str, BytesIO], ext: str, headers: Dict[str, str],
+            reusable: bool = True) -> str:
+        """
+        Store a finished document
+
+        Args:
+            key: result key from ``hash_upload``
+            output: rendered file, which is moved into the store, or a BytesIO, which is copied
+            ext: output file extension, e.g. '.pdf'
+            headers: response headers to replay on a hit
+            reusable: False keeps the entry from being served by ``get``, e.g. for an
+                incomplete result that is only handed to the callers waiting on it
+
+        Returns:
+            Path of the stored output
+        """
+        meta_path = self._meta_path(key)
+        path = meta_path.with_suffix(ext)
+        meta_path.parent.mkdir(exist_ok=True)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp_path = path.with_name(path.name + suffix)
+        tmp_meta = meta_path.with_name(meta_path.name + suffix)
+        replaced = sum(f.stat().st_size for f in (path, meta_path) if f.exists())
+        if isinstance(output, BytesIO):
+            tmp_path.write_bytes(output.getbuffer())
+        else:
+            shutil.move(output, tmp_path)
+        os.replace(tmp_path, path)
+        tmp_meta.write_text(json.dumps({'ext': ext, 'headers': headers, 'reusable': reusable}), encoding='utf-8')
+        os.replace(tmp_meta, meta_path)
+
+        with self._lock:
+            self.stored += 1
+            self._bytes += path.stat().st_size + meta_path.stat().st_size - replaced
+            over_budget = self._bytes > self.max_bytes
+        if over_budget:
+            self._evict()
+        return str(path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stored': self.stored,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'disk_bytes': self._bytes,
+            }
+
+    def _meta_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _evict(self) -> None:
+        # Drop least recently used entries until the store is back under 90% of its cap;
+        # entries used within pin_seconds may still be on their way to a client
+        pinned_after = time.time() - self.pin_seconds
+        entries = []
+        for meta_path in self.directory.glob('*/*.json'):
+            files = [f for f in meta_path.parent.glob(meta_path.stem + '.*') if not f.name.endswith('.tmp')]
+            try:
+                size = sum(f.stat().st_size for f in files)
+                entries.append((meta_path.stat().st_mtime, size, meta_path, files))
+            except OSError:
+                continue
+        entries.sort(key=lambda entry: entry[0])
+
+        total = sum(size for _, size, _, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for used_at, size, meta_path, files in entries:
+            if total <= target or used_at > pinned_after:
+                break
+            try:
+                # metadata first, so a concurrent get never finds it without its output
+                meta_path.unlink()
+                for f in files:
+                    if f != meta_path:
+                        f.unlink()
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._bytes = total
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait and receive the same result, or the same exception. An
+    exception listed in ``retry_on`` is not shared: the waiting callers
+    call again instead, one of them running the function itself.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], T], retry_on: Tuple[type, ...] = ()) -> Tuple[T, bool]:
+        """Return (result, shared); ``shared`` is True when another caller did the work"""
+        while True:
+            call, leader = self._join(key)
+            if leader:
+                break
+            call.done.wait()
+            if call.error is None:
+                return call.result, True
+            if not isinstance(call.error, retry_on):
+                raise call.error
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def _join(self, key: str) -> Tuple[_Call, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        return call, leader
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,145 @@
+import importlib
+import importlib.util
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+# pytesseract (which pulls in numpy) and tesserocr are imported on first use,
+# so the web process starts without them; tesserocr is optional and needs
+# the libtesseract C library
+_TESSEROCR_INSTALLED = importlib.util.find_spec('tesserocr') is not None
+
+DEFAULT_LANG = 'eng'
+
+# Warm engines are pooled per language and checked out for one call at a time:
+# a PyTessBaseAPI must not be used by two threads at once, and the web server
+# starts a thread per request, so engines kept per thread would never be reused.
+# At most _max_engines exist per language; further callers wait for one.
+_max_engines = os.cpu_count() or 1
+_pool_lock = threading.Lock()
+_idle: Dict[str, List] = {}
+_slots: Dict[str, threading.BoundedSemaphore] = {}
+_identities: Dict[str, str] = {}
+
+
+def __getattr__(name: str):
+    # tesseract_engine.pytesseract / .tesserocr still work, importing the module on access
+    if name == 'pytesseract':
+        return importlib.import_module('pytesseract')
+    if name == 'tesserocr':
+        return importlib.import_module('tesserocr') if _TESSEROCR_INSTALLED else None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def version() -> str:
+    """Version of the tesseract binary; raises if it cannot be run"""
+    import pytesseract
+    return str(pytesseract.get_tesseract_version())
+
+
+def resolve_engine(engine: str = 'auto') -> str:
+    """
+    Pick the OCR engine to use
+
+    Args:
+        engine: 'tesserocr', 'pytesseract' or 'auto' (tesserocr when installed)
+    """
+    if engine == 'auto':
+        return 'tesserocr' if _TESSEROCR_INSTALLED else 'pytesseract'
+    if engine == 'tesserocr' and not _TESSEROCR_INSTALLED:
+        raise ValueError("OCR engine 'tesserocr' requested but tesserocr is not installed")
+    return engine
+
+
+def describe(engine: str = 'auto') -> str:
+    """One line naming the engine ``engine`` resolves to, for startup logs and benchmarks"""
+    try:
+        resolved = resolve_engine(engine)
+    except ValueError as e:
+        return f"unavailable ({e})"
+    if resolved == 'tesserocr':
+        import tesserocr
+        return (f"tesserocr {tesserocr.__version__} ({tesserocr.tesseract_version().splitlines()[0]}), "
+                f"up to {_max_engines} warm engines per language")
+    hint = '; pip install tesserocr for warm engines' if engine == 'auto' else ''
+    return f"pytesseract (a tesseract process per call{hint})"
+
+
+def identity(engine: str = 'auto') -> str:
+    """
+    Engine and tesseract version that OCR with ``engine`` would use
+
+    Part of OCR cache keys, so text read by another engine or an older
+    tesseract is not served after an upgrade. Looked up once per engine.
+    """
+    resolved = resolve_engine(engine)
+    with _pool_lock:
+        known = _identities.get(resolved)
+    if known:
+        return known
+    if resolved == 'tesserocr':
+        import tesserocr
+        known = f"tesserocr {tesserocr.__version__}/{tesserocr.tesseract_version().splitlines()[0]}"
+    else:
+        try:
+            known = f"pytesseract/tesseract {version()}"
+        except Exception:
+            return 'pytesseract/tesseract unknown'  # not remembered: OCR fails anyway until it can run
+    with _pool_lock:
+        _identities[resolved] = known
+    return known
+
+
+def configure(max_engines: int) -> None:
+    """Set how many warm engines may exist per language; call before the first OCR"""
+    global _max_engines
+    with _pool_lock:
+        _max_engines = max(1, max_engines)
+
+
+@contextmanager
+def checkout(lang: Optional[str] = None):
+    """Borrow a warm tesserocr engine for a language, creating it on first use"""
+    lang = lang or DEFAULT_LANG
+    with _pool_lock:
+        slots = _slots.get(lang)
+        if slots is None:
+            slots = _slots[lang] = threading.BoundedSemaphore(_max_engines)
+    with slots:
+        with _pool_lock:
+            idle = _idle.setdefault(lang, [])
+            api = idle.pop() if idle else None
+        if api is None:
+            import tesserocr
+            api = tesserocr.PyTessBaseAPI(lang=lang)
+        try:
+            yield api
+        finally:
+            with _pool_lock:
+                _idle[lang].append(api)
+
+
+def preload(langs: Iterable[str], engine: str = 'auto') -> None:
+    """Initialize engines ahead of the first request so traineddata is loaded once"""
+    if resolve_engine(engine) != 'tesserocr':
+        return
+    for lang in langs:
+        with checkout(lang):
+            pass
+
+
+def image_to_string(image, lang: Optional[str] = None, engine: str = 'auto') -> str:
+    """
+    OCR an in-memory PIL image
+
+    With tesserocr the image goes straight to a warm engine; with
+    pytesseract every call spawns a tesseract process and round-trips the
+    image through temp files.
+    """
+    if resolve_engine(engine) == 'tesserocr':
+        with checkout(lang) as api:
+            api.SetImage(image)
+            return api.GetUTF8Text()
+    import pytesseract
+    return pytesseract.image_to_string(image, lang=lang)
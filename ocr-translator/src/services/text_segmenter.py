@@ -0,0 +1,101 @@
+import re
+from typing import List, Sequence, Tuple
+
+# Sentence punctuation (Latin, CJK, Devanagari) plus any closing quotes or brackets
+_SENTENCE_END = re.compile(r'[.!?…。！？।]+["\'”’»)\]]*(\s+|$)')
+_PARAGRAPH_BREAK = re.compile(r'\n[ \t]*\n\s*')
+_LAST_WORD = re.compile(r'(\S+)$')
+
+# Words whose trailing period does not end a sentence
+ABBREVIATIONS = {
+    'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'vs', 'etc', 'e.g', 'i.e',
+    'no', 'nr', 'fig', 'p', 'pp', 'vol', 'approx', 'inc', 'ltd', 'co', 'corp',
+}
+
+
+def _is_abbreviation(text: str, end: int) -> bool:
+    # The period at text[end - 1] follows a known abbreviation or an initial
+    match = _LAST_WORD.search(text, 0, end - 1)
+    if not match:
+        return False
+    word = match.group(1).lstrip('("\'“‘').lower()
+    return word in ABBREVIATIONS or (len(word) == 1 and word.isalpha())
+
+
+def _split_sentences(paragraph: str) -> List[Tuple[str, str]]:
+    pieces = []
+    start = 0
+    for match in _SENTENCE_END.finditer(paragraph):
+        end = match.start(1)
+        following = paragraph[match.end():match.end() + 1]
+        if following and following.islower():
+            continue
+        if paragraph[end - 1] == '.' and _is_abbreviation(paragraph, end):
+            continue
+        pieces.append((paragraph[start:end], match.group(1)))
+        start = match.end()
+    if start < len(paragraph):
+        rest = paragraph[start:]
+        sentence = rest.rstrip()
+        pieces.append((sentence, rest[len(sentence):]))
+    return pieces
+
+
+def _split_long(segment: str, max_chars: int) -> List[Tuple[str, str]]:
+    # Break an over-long sentence at the last whitespace that fits, never mid-word
+    pieces = []
+    while len(segment) > max_chars:
+        cut = segment.rfind(' ', 0, max_chars + 1)
+        if cut <= 0:
+            cut = max(segment.rfind('\n', 0, max_chars + 1), 0) or max_chars
+        head, segment = segment[:cut], segment[cut:]
+        gap = len(segment) - len(segment.lstrip())
+        pieces.append((head, segment[:gap]))
+        segment = segment[gap:]
+    pieces.append((segment, ''))
+    return pieces
+
+
+def segment_text(text: str, max_chars: int) -> List[Tuple[str, str]]:
+    """
+    Split text into translation segments on paragraph and sentence boundaries
+
+    Segments are sentences, so the same sentence always produces the same
+    segment (and translation memory key) whatever surrounds it. A sentence
+    longer than ``max_chars`` is split at word boundaries.
+
+    Args:
+        text: Text to split
+        max_chars: Longest segment the provider accepts in one request
+
+    Returns:
+        (segment, whitespace that followed it) pairs; leading whitespace is
+        returned as an empty segment. ``join_segments`` restores the text.
+    """
+    pieces = []
+    lead = len(text) - len(text.lstrip())
+    if lead:
+        pieces.append(('', text[:lead]))
+
+    position = lead
+    for paragraph_break in list(_PARAGRAPH_BREAK.finditer(text, lead)) + [None]:
+        end = paragraph_break.start() if paragraph_break else len(text)
+        paragraph = text[position:end]
+        if paragraph:
+            for sentence, gap in _split_sentences(paragraph):
+                split = _split_long(sentence, max_chars)
+                split[-1] = (split[-1][0], gap)
+                pieces.extend(split)
+        if paragraph_break:
+            if pieces:
+                segment, gap = pieces[-1]
+                pieces[-1] = (segment, gap + paragraph_break.group())
+            else:
+                pieces.append(('', paragraph_break.group()))
+            position = paragraph_break.end()
+    return pieces
+
+
+def join_segments(segments: Sequence[str], gaps: Sequence[str]) -> str:
+    """Reassemble (translated) segments with the whitespace that separated them"""
+    return ''.join(segment + gap for segment, gap in zip(segments, gaps))
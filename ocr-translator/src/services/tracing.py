@@ -0,0 +1,152 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+# Incoming trace ids are only adopted when they look like ours
+TRACE_ID_PATTERN = re.compile(r'^[0-9a-f]{8,32}$')
+
+_current: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+class Span:
+    """One timed operation within a trace; ``attrs`` are exported with it"""
+
+    __slots__ = ('tracer', 'name', 'trace_id', 'span_id', 'parent_id', 'attrs', 'start', '_started', 'duration')
+
+    def __init__(self, tracer: 'Tracer', name: str, trace_id: str, parent_id: Optional[str], attrs: dict):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.duration: Optional[float] = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._started
+        if error is not None:
+            self.attrs['error'] = f"{type(error).__name__}: {error}"
+        self.tracer.export(self)
+
+    def to_json(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': round(self.start, 6),
+            'seconds': round(self.duration, 6) if self.duration is not None else None,
+            'thread': threading.current_thread().name,
+            'attrs': self.attrs,
+        }
+
+
+class Tracer:
+    """
+    Minimal span API with export to a local JSONL file
+
+    Spans nest through a context variable, so a ``span`` opened inside
+    another becomes its child. Work handed to other threads does not
+    inherit that context; pass ``parent`` explicitly there. Each finished
+    span is appended to ``path`` as one JSON line; the file is rotated to
+    ``<path>.1`` once it passes ``max_bytes``.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, max_bytes: int = 50 * 1024 * 1024,
+                 enabled: bool = True):
+        self.path = Path(path) if path else None
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.exported = 0
+        self._lock = threading.Lock()
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def current() -> Optional[Span]:
+        return _current.get()
+
+    def start_span(self, name: str, parent: Optional[Span] = None, trace_id: Optional[str] = None,
+                   activate: bool = False, **attrs) -> Span:
+        """
+        Start a span that the caller must ``end``
+
+        Without ``parent`` the current span is used; without either a new
+        trace is started, with ``trace_id`` if given. ``activate`` makes the
+        span current for this thread until ``deactivate`` is called.
+        """
+        parent = parent or _current.get()
+        trace_id = trace_id or (parent.trace_id if parent else new_trace_id())
+        span = Span(self, name, trace_id, parent.span_id if parent else None, attrs)
+        if activate:
+            _current.set(span)
+        return span
+
+    @staticmethod
+    def deactivate() -> None:
+        _current.set(None)
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, trace_id: Optional[str] = None,
+             **attrs) -> Iterator[Span]:
+        """Time the block as a child of ``parent`` or the current span"""
+        span = self.start_span(name, parent, trace_id, **attrs)
+        token = _current.set(span)
+        error = None
+        try:
+            yield span
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current.reset(token)
+            span.end(error)
+
+    def export(self, span: Span) -> None:
+        if not self.enabled or not self.path:
+            return
+        line = json.dumps(span.to_json(), ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            try:
+                if self.path.exists() and self.path.stat().st_size > self.max_bytes:
+                    os.replace(self.path, self.path.with_name(self.path.name + '.1'))
+                with open(self.path, 'a', encoding='utf-8') as fh:
+                    fh.write(line)
+                self.exported += 1
+            except OSError as e:
+                print(f"Could not export span {span.name}: {e}")
+
+    def read(self, trace_id: str) -> List[dict]:
+        """Exported spans of one trace, oldest first, from the current and rotated file"""
+        if not self.path:
+            return []
+        spans = []
+        with self._lock:
+            for path in (self.path.with_name(self.path.name + '.1'), self.path):
+                if not path.exists():
+                    continue
+                with open(path, encoding='utf-8') as fh:
+                    for line in fh:
+                        if trace_id in line:
+                            span = json.loads(line)
+                            if span['trace_id'] == trace_id:
+                                spans.append(span)
+        return sorted(spans, key=lambda span: span['start'])
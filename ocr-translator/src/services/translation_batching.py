@@ -0,0 +1,184 @@
+import itertools
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional, Sequence
+
+from .circuit_breaker import ProviderUnavailable
+from .rate_limiter import ProviderError, RetryBudget
+
+# Batches of every document run on one shared pool; each document keeps at most
+# its `concurrency` batches in flight there, so a long one can't starve the rest
+EXECUTOR_WORKERS = 32
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+class Translations(list):
+    """
+    Translations in order, with the name of the provider behind each one
+
+    ``providers[i]`` is None for a text that was left as it was. A
+    ``translate_many`` call can return one for its batch, e.g.
+    ``Translations.by(provider.name, texts)``; ``translate_in_batches``
+    always returns one.
+    """
+
+    def __init__(self, texts=(), providers: Optional[Sequence[Optional[str]]] = None):
+        super().__init__(texts)
+        self.providers = list(providers) if providers is not None else [None] * len(self)
+
+    @classmethod
+    def by(cls, provider: str, texts: Sequence[str]) -> 'Translations':
+        return cls(texts, [provider] * len(texts))
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """The pool batches are translated on, shared by every document"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix='translate')
+        return _executor
+
+
+def _providers(translated: List[str]) -> List[Optional[str]]:
+    # who answered each text of a translate_many result, if it says
+    return list(getattr(translated, 'providers', None) or [None] * len(translated))
+
+
+def pack_batches(segments: Sequence[str], max_items: int, max_chars: int,
+                 separator_chars: int = 0) -> List[List[int]]:
+    """
+    Greedily pack segments into provider-sized batches
+
+    Args:
+        segments: Texts to pack, in document order
+        max_items: Most segments a single provider call accepts
+        max_chars: Most characters a single provider call accepts
+        separator_chars: Characters added between segments when a provider
+            needs them joined into one string
+
+    Returns:
+        Lists of segment indices; every batch keeps document order and a
+        segment longer than ``max_chars`` gets a batch of its own
+    """
+    batches = []
+    current, size = [], 0
+    for index, segment in enumerate(segments):
+        added = len(segment) + (separator_chars if current else 0)
+        if current and (len(current) >= max_items or size + added > max_chars):
+            batches.append(current)
+            current, size = [], 0
+            added = len(segment)
+        current.append(index)
+        size += added
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _translate_batch(texts: List[str], translate_many: Callable[[List[str]], List[str]],
+                     budget: Optional[RetryBudget] = None) -> Translations:
+    # One provider call for the batch. Throttling, 5xx and timeouts were already
+    # retried by the provider (send_with_retries), and with every circuit open no
+    # provider will take the batch, so both leave it untranslated. A batch that
+    # fails as a whole (a mangled separator, one segment the provider rejects) is
+    # split in half and each half sent again, every split costing one retry from
+    # the budget; a segment that still fails on its own, or once the budget is
+    # spent, keeps its text
+    try:
+        translated = translate_many(texts)
+        if len(translated) != len(texts):
+            raise ValueError(f"expected {len(texts)} translations, got {len(translated)}")
+        return Translations(translated, _providers(translated))
+    except ProviderError as batch_error:
+        print(f"Batch translation error ({len(texts)} segments): {batch_error}")
+        if batch_error.retryable or isinstance(batch_error, ProviderUnavailable):
+            # splitting the batch up would only hit a struggling provider harder
+            if budget:
+                budget.record_untranslated(len(texts))
+            return Translations(texts)
+    except Exception as batch_error:
+        print(f"Batch translation error ({len(texts)} segments): {batch_error}")
+
+    if len(texts) == 1 or (budget is not None and not budget.spend()):
+        if budget:
+            budget.record_untranslated(len(texts))
+        return Translations(texts)
+    middle = len(texts) // 2
+    first = _translate_batch(texts[:middle], translate_many, budget)
+    second = _translate_batch(texts[middle:], translate_many, budget)
+    return Translations(first + second, first.providers + second.providers)
+
+
+def translate_in_batches(segments: Sequence[str], translate_many: Callable[[List[str]], List[str]],
+                         max_items: int, max_chars: int, separator_chars: int = 0,
+                         concurrency: int = 1, budget: Optional[RetryBudget] = None,
+                         progress: Optional[Callable[[int], None]] = None) -> Translations:
+    """
+    Translate segments with as few provider calls as the limits allow
+
+    Batches are sent concurrently, at most ``concurrency`` at a time, on a
+    pool shared by every document. Blank segments are passed through
+    untouched. A batch the provider throttled or could not serve, after its
+    own retries, or that no provider is available for, is left as it was.
+    If a batch call fails otherwise it is split
+    in half and the halves are retried, each split spending one retry from
+    ``budget``, so one bad segment never discards a whole batch and costs
+    a few calls rather than one per segment. Segments that still fail keep
+    their original text and are counted on ``budget``.
+
+    Args:
+        segments: Texts to translate, in document order
+        translate_many: Provider call translating a list of texts in order
+        max_items, max_chars, separator_chars: Provider limits, see pack_batches
+        concurrency: Most batches in flight at once for this document
+        budget: The document's retry budget, shared by every batch
+        progress: Called with the number of segments in each batch as it finishes
+
+    Returns:
+        Translations in the same order as ``segments``, with the provider
+        that answered each one when ``translate_many`` reports it
+    """
+    results = Translations(segments)
+    pending = [index for index, segment in enumerate(segments) if segment.strip()]
+    texts = [segments[index] for index in pending]
+    batches = pack_batches(texts, max_items, max_chars, separator_chars)
+    if batches:
+        print(f"Translating {len(texts)} segments in {len(batches)} requests")
+
+    def run(texts):
+        translated = _translate_batch(texts, translate_many, budget)
+        if progress:
+            progress(len(texts))
+        return translated
+
+    batch_texts = [[texts[i] for i in batch] for batch in batches]
+    if concurrency > 1 and len(batches) > 1:
+        translations = _run_windowed(run, batch_texts, concurrency)
+    else:
+        translations = [run(texts) for texts in batch_texts]
+
+    for batch, translated in zip(batches, translations):
+        for i, text, provider in zip(batch, translated, translated.providers):
+            if text and text.strip():
+                results[pending[i]] = text
+                results.providers[pending[i]] = provider
+            elif budget:
+                budget.record_untranslated()
+    return results
+
+
+def _run_windowed(fn: Callable, items: List, concurrency: int) -> List:
+    # fn over items on the shared executor, with at most `concurrency` submitted at once
+    executor = get_executor()
+    results = [None] * len(items)
+    remaining = iter(enumerate(items))
+    futures = {executor.submit(fn, item): index for index, item in itertools.islice(remaining, concurrency)}
+    while futures:
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            results[futures.pop(future)] = future.result()
+            for index, item in itertools.islice(remaining, 1):
+                futures[executor.submit(fn, item)] = index
+    return results
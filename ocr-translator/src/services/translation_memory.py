@@ -0,0 +1,244 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+_WHITESPACE = re.compile(r'\s+')
+
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    source_lang TEXT NOT NULL,
+    target_lang TEXT NOT NULL,
+    source_text TEXT NOT NULL,
+    translated_text TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_last_used ON segments (last_used);
+"""
+
+
+def normalize_segment(text: str) -> str:
+    """Collapse runs of whitespace so reflowed copies of a segment share an entry"""
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+class TranslationMemory:
+    """
+    Persistent segment-level translation cache
+
+    Translations are stored in SQLite keyed by the normalized source segment,
+    the source and target language and the provider, so boilerplate and
+    repeat documents are only sent to (and billed by) a provider once. The
+    database is shared by every process pointing at the same file; least
+    recently used entries are evicted once it grows past ``max_entries``.
+    """
+
+    def __init__(self, path: Union[str, Path], max_entries: int = 100000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    @staticmethod
+    def make_key(text: str, source_lang: str, target_lang: str, provider: str) -> str:
+        """Hash a normalized segment together with its language pair and provider"""
+        normalized = normalize_segment(text)
+        raw = f"{provider}|{(source_lang or 'auto').lower()}|{target_lang.lower()}|{normalized}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, str]:
+        """Return stored translations for the keys that are present"""
+        unique = list(dict.fromkeys(keys))
+        found = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(unique), _LOOKUP_CHUNK):
+                chunk = unique[start:start + _LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, translated_text FROM segments WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update(rows)
+            if found:
+                self._conn.executemany(
+                    "UPDATE segments SET hits = hits + 1, last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, entries: Sequence[tuple]) -> None:
+        """
+        Store translations
+
+        Args:
+            entries: (key, provider, source_lang, target_lang, source_text, translated_text) tuples
+        """
+        if not entries:
+            return
+        now = time.time()
+        rows = [(key, provider, (source_lang or 'auto').lower(), target_lang.lower(),
+                 normalize_segment(source_text), translated_text, now, now)
+                for key, provider, source_lang, target_lang, source_text, translated_text in entries]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO segments "
+                "(key, provider, source_lang, target_lang, source_text, translated_text, hits, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self._evict()
+
+    def translate(self, segments: Sequence[str], translate_missing: Callable[[List[str]], List[str]],
+                  provider: Union[str, Sequence[str]], target_lang: str, source_lang: str = 'auto') -> List[str]:
+        """
+        Translate segments, sending only the ones not already in memory
+
+        Each distinct missing segment is sent once, however often it repeats.
+        A translation is stored under the provider that produced it: the one
+        ``translate_missing`` names per text (see
+        ``translation_batching.Translations``), or else the first of
+        ``provider``. A translation identical to its source is not stored,
+        since that is also what a failed segment looks like.
+
+        Args:
+            segments: Texts to translate, in document order
+            translate_missing: Provider call translating a list of texts in order
+            provider: Provider name, or the names of a route in order of
+                preference; an entry of an earlier provider wins on lookup
+            target_lang: Target language code
+            source_lang: Source language code (default: 'auto')
+
+        Returns:
+            Translations in the same order as ``segments``
+        """
+        providers = [provider] if isinstance(provider, str) else list(provider)
+        results = list(segments)
+        keys = {}  # segment index -> key under each provider, in order of preference
+        for index, segment in enumerate(segments):
+            if segment.strip():
+                keys[index] = [self.make_key(segment, source_lang, target_lang, name) for name in providers]
+        if not keys:
+            return results
+
+        found = self.get_many([key for candidates in keys.values() for key in candidates])
+        missing = {}  # primary key -> first index of a segment nobody has translated yet
+        for index, candidates in keys.items():
+            key = next((key for key in candidates if key in found), None)
+            if key:
+                results[index] = found[key]
+            else:
+                missing.setdefault(candidates[0], index)
+
+        if missing:
+            first_indices = list(missing.values())
+            translated = translate_missing([segments[index] for index in first_indices])
+            answered_by = getattr(translated, 'providers', None) or [None] * len(translated)
+            by_key = dict(zip(missing, translated))
+            entries = []
+            for index, text, name in zip(first_indices, translated, answered_by):
+                name = name or providers[0]
+                if text.strip() and normalize_segment(text) != normalize_segment(segments[index]):
+                    entries.append((self.make_key(segments[index], source_lang, target_lang, name),
+                                    name, source_lang, target_lang, segments[index], text))
+            self.put_many(entries)
+            for index, candidates in keys.items():
+                if candidates[0] in by_key:
+                    results[index] = by_key[candidates[0]]
+        return results
+
+    def entries(self, limit: int = 50, offset: int = 0, provider: Optional[str] = None,
+                target_lang: Optional[str] = None, search: Optional[str] = None) -> List[dict]:
+        """Most recently used entries, optionally filtered, for inspection"""
+        where, params = self._filters(provider, target_lang, search)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT provider, source_lang, target_lang, source_text, translated_text, hits, created_at, last_used "
+                f"FROM segments{where} ORDER BY last_used DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        columns = ('provider', 'source_lang', 'target_lang', 'source_text', 'translated_text',
+                   'hits', 'created_at', 'last_used')
+        return [dict(zip(columns, row)) for row in rows]
+
+    def purge(self, provider: Optional[str] = None, target_lang: Optional[str] = None,
+              search: Optional[str] = None, older_than: Optional[float] = None) -> int:
+        """
+        Delete entries matching every given filter; no filters empties the memory
+
+        Args:
+            older_than: Only delete entries unused for this many seconds
+
+        Returns:
+            Number of deleted entries
+        """
+        where, params = self._filters(provider, target_lang, search)
+        if older_than is not None:
+            where += (' AND' if where else ' WHERE') + ' last_used < ?'
+            params.append(time.time() - older_than)
+        with self._lock:
+            deleted = self._conn.execute(f"DELETE FROM segments{where}", params).rowcount
+            self._conn.commit()
+        return deleted
+
+    def stats(self) -> dict:
+        """Hit/miss counters and the number of stored entries"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': entries,
+                'max_entries': self.max_entries,
+                'evicted': self.evicted,
+                'db_bytes': self.path.stat().st_size if self.path.exists() else 0,
+            }
+
+    def _filters(self, provider, target_lang, search):
+        clauses, params = [], []
+        if provider:
+            clauses.append('provider = ?')
+            params.append(provider)
+        if target_lang:
+            clauses.append('target_lang = ?')
+            params.append(target_lang.lower())
+        if search:
+            clauses.append('source_text LIKE ?')
+            params.append(f"%{search}%")
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def _evict(self) -> None:
+        # Drop least recently used entries until the memory is back under 90% of its cap
+        count = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            "DELETE FROM segments WHERE key IN (SELECT key FROM segments ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self._conn.commit()
+        self.evicted += excess
@@ -0,0 +1,224 @@
+import re
+import threading
+from typing import List, Optional
+
+import requests
+
+from .rate_limiter import AdaptiveRateLimiter, ProviderError, RetryBudget, send_with_retries
+
+
+class GoogleProvider:
+    """
+    Google Translate through deep_translator's web endpoint
+
+    deep_translator opens a new connection for every call, so requests go
+    through our pooled session instead; GoogleTranslator instances are
+    kept per language pair and only used to validate and map language
+    codes and to find the endpoint. deep_translator and BeautifulSoup are
+    imported on first use.
+
+    The endpoint takes a single string, so a batch is joined with a
+    separator line and split apart again after translation. If Google
+    mangles a separator the segment count no longer matches and the call
+    raises a ValueError, letting the caller split the batch and retry.
+
+    ``concurrency`` caps requests in flight to Google across all callers and
+    ``rate`` (requests per second) feeds its adaptive rate limiter.
+    """
+
+    name = 'google'
+    max_items = 100
+    max_chars = 5000
+    separator = '\n|||\n'
+    _separator_pattern = re.compile(r'\s*\|\s*\|\s*\|\s*')
+
+    def __init__(self, session: requests.Session, concurrency: int = 4, timeout: int = 30, rate: float = 5.0):
+        self.session = session
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.limiter = AdaptiveRateLimiter(rate, burst=concurrency)
+        self._translators = {}
+        self._translators_lock = threading.Lock()
+
+    def translator(self, source_lang: str, target_lang: str):
+        """
+        GoogleTranslator for a language pair, created once and reused
+
+        Raises:
+            ValueError: when Google does not support one of the languages
+        """
+        from deep_translator import GoogleTranslator
+        from deep_translator.exceptions import LanguageNotSupportedException
+        with self._translators_lock:
+            translator = self._translators.get((source_lang, target_lang))
+            if translator is None:
+                try:
+                    translator = GoogleTranslator(source=source_lang, target=target_lang)
+                except LanguageNotSupportedException as e:
+                    raise ValueError(f"unsupported language: {e}") from e
+                self._translators[(source_lang, target_lang)] = translator
+            return translator
+
+    def supports(self, target_lang: str) -> bool:
+        """Whether Google translates into ``target_lang`` (a language code or name)"""
+        try:
+            self.translator('auto', target_lang)
+        except ValueError:
+            return False
+        return True
+
+    def translate_batch(self, texts: List[str], target_lang: str, source_lang: str = 'auto',
+                        budget: Optional[RetryBudget] = None) -> List[str]:
+        """Translate texts in one request, returning translations in order"""
+        if len(texts) == 1:
+            return [self._translate(texts[0], target_lang, source_lang, budget)]
+
+        translated = self._translate(self.separator.join(texts), target_lang, source_lang, budget)
+        parts = self._separator_pattern.split(translated.strip())
+        if len(parts) != len(texts):
+            raise ValueError(f"separators lost in translation ({len(parts)} parts for {len(texts)} segments)")
+        return parts
+
+    def warm_up(self, timeout: float = 5.0) -> int:
+        """Open a pooled connection to the endpoint ahead of the first request; returns the HTTP status"""
+        return self.session.head(self.translator('auto', 'en')._base_url, timeout=timeout).status_code
+
+    def _translate(self, text: str, target_lang: str, source_lang: str, budget: Optional[RetryBudget]) -> str:
+        translator = self.translator(source_lang, target_lang)
+        text = text.strip()
+        if not text or translator._source == translator._target:
+            return text
+
+        params = {'sl': translator._source, 'tl': translator._target, 'q': text}
+
+        def send():
+            with self.slots:
+                return self.session.get(translator._base_url, params=params, timeout=self.timeout)
+
+        response = send_with_retries(send, self.limiter, budget)
+        if response.status_code != 200:
+            raise ProviderError(f"Google returned HTTP {response.status_code}", response.status_code)
+
+        from bs4 import BeautifulSoup
+        from deep_translator.exceptions import TranslationNotFound
+        soup = BeautifulSoup(response.text, 'html.parser')
+        element = soup.find('div', {'class': 't0'}) or soup.find('div', {'class': 'result-container'})
+        if not element:
+            raise TranslationNotFound(text)
+        return element.get_text(strip=True)
+
+
+class LibreTranslateProvider:
+    """
+    LibreTranslate API; 'q' accepts a list of texts
+
+    ``concurrency`` caps requests in flight to the instance across all callers and
+    ``rate`` (requests per second) feeds its adaptive rate limiter.
+    """
+
+    name = 'libretranslate'
+
+    def __init__(self, session: requests.Session, url: str, api_key: str = '',
+                 max_items: int = 50, max_chars: int = 5000, timeout: int = 30,
+                 concurrency: int = 4, rate: float = 2.0):
+        # Accept both the instance root and its /translate endpoint
+        base_url = url.rstrip('/')
+        if base_url.endswith('/translate'):
+            base_url = base_url[:-len('/translate')]
+        self.base_url = base_url
+        self.session = session
+        self.api_key = api_key
+        self.max_items = max_items
+        self.max_chars = max_chars
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.limiter = AdaptiveRateLimiter(rate, burst=concurrency)
+
+    def translate_batch(self, texts: List[str], target_lang: str, source_lang: str = 'auto',
+                        budget: Optional[RetryBudget] = None) -> List[str]:
+        """Translate texts in one request, returning translations in order"""
+        payload = {
+            'q': texts,
+            'source': source_lang,
+            'target': target_lang,
+            'format': 'text',
+        }
+        if self.api_key:
+            payload['api_key'] = self.api_key
+
+        def send():
+            with self.slots:
+                return self.session.post(f"{self.base_url}/translate", json=payload, timeout=self.timeout)
+
+        response = send_with_retries(send, self.limiter, budget)
+        if response.status_code != 200:
+            raise ProviderError(f"LibreTranslate returned HTTP {response.status_code}", response.status_code)
+        translated = response.json()['translatedText']
+        return translated if isinstance(translated, list) else [translated]
+
+    def warm_up(self, timeout: float = 5.0) -> int:
+        """Open a pooled connection to the instance ahead of the first request; returns the HTTP status"""
+        return self.session.get(f"{self.base_url}/languages", timeout=timeout).status_code
+
+
+class DeepLProvider:
+    """
+    DeepL API; 'text' accepts up to 50 texts per request
+
+    ``concurrency`` caps requests in flight to DeepL across all callers and
+    ``rate`` (requests per second) feeds its adaptive rate limiter.
+    """
+
+    name = 'deepl'
+
+    def __init__(self, session: requests.Session, api_key: str,
+                 url: str = 'https://api-free.deepl.com/v2/translate',
+                 max_items: int = 50, max_chars: int = 20000, timeout: int = 30,
+                 concurrency: int = 4, rate: float = 10.0):
+        # max_chars keeps the JSON body (non-ASCII is \\u-escaped) under DeepL's 128 KiB limit
+        self.session = session
+        self.api_key = api_key
+        self.url = url
+        self.max_items = max_items
+        self.max_chars = max_chars
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.limiter = AdaptiveRateLimiter(rate, burst=concurrency)
+
+    def translate_batch(self, texts: List[str], target_lang: str, source_lang: Optional[str] = 'auto',
+                        budget: Optional[RetryBudget] = None) -> List[str]:
+        """Translate texts in one request, returning translations in order"""
+        if not self.api_key:
+            # the provider's fault, not the request's: counts against DeepL so the route fails over
+            raise ProviderError("DeepL API key not configured", 401)
+
+        headers = {
+            "Authorization": f"DeepL-Auth-Key {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        data = {
+            "text": texts,
+            "target_lang": target_lang.upper(),
+            "source_lang": source_lang.upper() if source_lang and source_lang != 'auto' else None
+        }
+
+        def send():
+            with self.slots:
+                return self.session.post(
+                    self.url,
+                    headers=headers,
+                    json={k: v for k, v in data.items() if v is not None},
+                    timeout=self.timeout
+                )
+
+        response = send_with_retries(send, self.limiter, budget)
+        if response.status_code != 200:
+            raise ProviderError(f"DeepL returned HTTP {response.status_code}", response.status_code)
+        return [item['text'] for item in response.json()['translations']]
+
+    def warm_up(self, timeout: float = 5.0) -> int:
+        """Open a pooled connection to the API ahead of the first request; returns the HTTP status"""
+        return self.session.head(self.url, timeout=timeout).status_code
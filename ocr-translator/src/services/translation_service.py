@@ -1,15 +1,38 @@
-import requests
-from typing import Optional
-from ..config import LIBRETRANSLATE_URL, DEEPL_API_KEY, TRANSLATION_SERVICE
+from typing import List, Optional
+from ..config import (LIBRETRANSLATE_URL, DEEPL_API_KEY, TRANSLATION_SERVICE,
+                      LIBRETRANSLATE_CONCURRENCY, DEEPL_CONCURRENCY, HTTP_RETRIES, HTTP_RETRY_BACKOFF,
+                      LIBRETRANSLATE_RATE, DEEPL_RATE, TRANSLATION_RETRY_BUDGET,
+                      BREAKER_FAILURES, BREAKER_SLOW_SECONDS, BREAKER_OPEN_SECONDS,
+                      TRANSLATION_MEMORY, TRANSLATION_MEMORY_PATH, TRANSLATION_MEMORY_MAX_ENTRIES)
+from .translation_batching import translate_in_batches, Translations
+from .translation_providers import LibreTranslateProvider, DeepLProvider
+from .translation_memory import TranslationMemory
+from .http_clients import get_session
+from .rate_limiter import RetryBudget
+from .circuit_breaker import ProviderRouter
+from .text_segmenter import segment_text, join_segments
 
 class TranslationService:
     """Handles text translation using different translation providers"""
     
     def __init__(self):
         self.provider = TRANSLATION_SERVICE.lower()
-        self.session = requests.Session()
+        # Keep-alive pools shared by every TranslationService, one per provider
+        self.libretranslate = LibreTranslateProvider(
+            get_session('libretranslate', LIBRETRANSLATE_CONCURRENCY, HTTP_RETRIES, HTTP_RETRY_BACKOFF),
+            LIBRETRANSLATE_URL, concurrency=LIBRETRANSLATE_CONCURRENCY, rate=LIBRETRANSLATE_RATE)
+        self.deepl = DeepLProvider(
+            get_session('deepl', DEEPL_CONCURRENCY, HTTP_RETRIES, HTTP_RETRY_BACKOFF),
+            DEEPL_API_KEY, concurrency=DEEPL_CONCURRENCY, rate=DEEPL_RATE)
+        # DeepL first when configured; LibreTranslate takes over while its circuit is open
+        providers = [self.deepl, self.libretranslate] if self.provider == 'deepl' and DEEPL_API_KEY \
+            else [self.libretranslate]
+        self.router = ProviderRouter(providers, BREAKER_FAILURES, BREAKER_SLOW_SECONDS, BREAKER_OPEN_SECONDS)
+        self.memory = (TranslationMemory(TRANSLATION_MEMORY_PATH, max_entries=TRANSLATION_MEMORY_MAX_ENTRIES)
+                       if TRANSLATION_MEMORY else None)
         
-    def translate(self, text: str, target_lang: str, source_lang: str = 'auto') -> str:
+    def translate(self, text: str, target_lang: str, source_lang: str = 'auto',
+                  budget: Optional[RetryBudget] = None) -> str:
         """
         Translate text to target language
         
@@ -17,72 +40,67 @@ class TranslationService:
             text: Text to translate
             target_lang: Target language code (e.g., 'es', 'fr')
             source_lang: Source language code (default: 'auto' for auto-detection)
+            budget: Retry budget for this document; also counts untranslated segments
             
         Returns:
-            Translated text
+            Translated text, split and translated sentence by sentence
         """
         if not text.strip():
             return text
-            
-        if self.provider == 'deepl' and DEEPL_API_KEY:
-            return self._translate_deepl(text, target_lang, source_lang)
-        else:
-            return self._translate_libretranslate(text, target_lang, source_lang)
-    
-    def _translate_libretranslate(self, text: str, target_lang: str, source_lang: str) -> str:
-        """Translate using LibreTranslate API"""
-        try:
-            payload = {
-                'q': text,
-                'source': source_lang,
-                'target': target_lang,
-                'format': 'text',
-                'api_key': ''  # Add API key if required
-            }
-            
-            response = self.session.post(
-                f"{LIBRETRANSLATE_URL}/translate",
-                json=payload,
-                timeout=30
+        pieces = segment_text(text, self.router.max_chars)
+        translated = self.translate_batch([segment for segment, _ in pieces], target_lang, source_lang, budget)
+        return join_segments(translated, [gap for _, gap in pieces])
+
+    def translate_batch(self, texts: List[str], target_lang: str, source_lang: str = 'auto',
+                        budget: Optional[RetryBudget] = None) -> List[str]:
+        """
+        Translate many segments, packing them into as few provider calls as
+        the provider's payload limits allow and sending those concurrently
+
+        Args:
+            texts: Segments to translate, in order
+            target_lang: Target language code (e.g., 'es', 'fr')
+            source_lang: Source language code (default: 'auto' for auto-detection)
+            budget: Retry budget shared by every call for this document
+
+        Returns:
+            Translations in the same order; segments that fail keep their original
+            text and are counted on the budget
+        """
+        budget = budget or RetryBudget(TRANSLATION_RETRY_BUDGET)
+
+        # Segments already in the translation memory are not sent at all; each new
+        # translation is remembered under the provider that answered it
+        if self.memory:
+            translated = self.memory.translate(
+                texts,
+                lambda missing: self._translate_routed(missing, target_lang, source_lang, budget),
+                [provider.name for provider in self.router.providers], target_lang, source_lang,
             )
-            response.raise_for_status()
-            return response.json().get('translatedText', text)
-            
-        except Exception as e:
-            print(f"Translation error: {str(e)}")
-            return text  # Fallback to original text
+        else:
+            translated = self._translate_routed(texts, target_lang, source_lang, budget)
+        if budget.untranslated:
+            print(f"WARNING: {budget.untranslated} segments left untranslated")
+        return translated
     
-    def _translate_deepl(self, text: str, target_lang: str, source_lang: str) -> str:
-        """Translate using DeepL API"""
-        if not DEEPL_API_KEY:
-            raise ValueError("DeepL API key not configured")
-            
-        try:
-            url = "https://api-free.deepl.com/v2/translate"
-            headers = {
-                "Authorization": f"DeepL-Auth-Key {DEEPL_API_KEY}",
-                "Content-Type": "application/json"
-            }
-            
-            data = {
-                "text": [text],
-                "target_lang": target_lang.upper(),
-                "source_lang": source_lang.upper() if source_lang != 'auto' else None
-            }
-            
-            response = self.session.post(
-                url,
-                headers=headers,
-                json={k: v for k, v in data.items() if v is not None},
-                timeout=30
-            )
-            response.raise_for_status()
-            return response.json()['translations'][0]['text']
-            
-        except Exception as e:
-            print(f"DeepL translation error: {str(e)}")
-            # Fallback to LibreTranslate
-            return self._translate_libretranslate(text, target_lang, source_lang)
+    def _translate_routed(self, texts: List[str], target_lang: str, source_lang: str,
+                          budget: Optional[RetryBudget] = None) -> List[str]:
+        """Translate with the healthiest provider, failing over per batch"""
+        router = self.router
+        return translate_in_batches(
+            texts,
+            lambda batch: router.call(
+                lambda provider: Translations.by(
+                    provider.name, provider.translate_batch(batch, target_lang, source_lang, budget))),
+            router.max_items,
+            router.max_chars,
+            concurrency=router.providers[0].concurrency,
+            budget=budget,
+        )
+
+    def provider_health(self) -> dict:
+        """Circuit state and rolling latency per provider"""
+        return self.router.stats()
     
     def get_supported_languages(self) -> list:
         """Get list of supported languages"""
@@ -94,7 +112,7 @@ class TranslationService:
     def _get_libretranslate_languages(self) -> list:
         """Get supported languages from LibreTranslate"""
         try:
-            response = self.session.get(f"{LIBRETRANSLATE_URL}/languages", timeout=10)
+            response = self.libretranslate.session.get(f"{self.libretranslate.base_url}/languages", timeout=10)
             response.raise_for_status()
             return response.json()
         except Exception:
@@ -0,0 +1,69 @@
+import io
+import os
+import time
+import zipfile
+from typing import Iterable, Iterator, Tuple, Union
+
+CHUNK_SIZE = 64 * 1024
+
+# Already-compressed outputs are stored as-is; deflating them again only costs CPU
+STORED_EXTENSIONS = {'.pdf', '.png', '.jpg', '.jpeg', '.zip'}
+
+
+class _ChunkSink(io.RawIOBase):
+    # Write-only, unseekable target for ZipFile; bytes are collected until drained
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(members: Iterable[Tuple[str, Union[str, bytes]]], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Build a ZIP archive incrementally, yielding its bytes as they are produced
+
+    Members are pulled from ``members`` one at a time, so a generator can
+    hand over each file as soon as it is ready. File members are copied in
+    ``chunk_size`` pieces and never held in memory whole; because the target
+    is not seekable, sizes and CRCs go into data descriptors after each
+    member.
+
+    Args:
+        members: (name in the archive, file path or bytes) pairs
+
+    Yields:
+        Consecutive chunks of the archive
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w') as archive:
+        for arcname, source in members:
+            info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+            stored = os.path.splitext(arcname)[1].lower() in STORED_EXTENSIONS
+            info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+            info.file_size = len(source) if isinstance(source, bytes) else os.path.getsize(source)
+
+            with archive.open(info, 'w') as dest:
+                if isinstance(source, bytes):
+                    dest.write(source)
+                else:
+                    with open(source, 'rb') as src:
+                        for chunk in iter(lambda: src.read(chunk_size), b''):
+                            dest.write(chunk)
+                            data = sink.drain()
+                            if data:
+                                yield data
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
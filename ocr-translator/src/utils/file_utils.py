@@ -1,4 +1,5 @@
 import os
+import time
 import uuid
 from pathlib import Path
 from werkzeug.utils import secure_filename
@@ -20,14 +21,18 @@ def get_secure_filepath(filename):
     return UPLOAD_FOLDER / f"{unique_id}_{filename}"
 
 def cleanup_file(filepath, max_age_hours=24):
-    """Cleanup old files from upload and output directories"""
-    if not filepath or not filepath.exists():
-        return
-    
+    """Delete an upload or output file once it is older than max_age_hours; 0 deletes it regardless of age"""
+    if not filepath:
+        return False
+    filepath = Path(filepath)
+
     try:
+        if max_age_hours and time.time() - filepath.stat().st_mtime < max_age_hours * 3600:
+            return False
         filepath.unlink()
+        return True
     except OSError:
-        pass
+        return False
 
 def get_output_path(file_id, output_type):
     """Generate output file path based on type"""
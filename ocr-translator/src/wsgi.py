@@ -0,0 +1,7 @@
+# WSGI entry point, e.g. from this directory:
+#   gunicorn --workers 1 --threads 8 wsgi:app
+# Don't use --preload: the background threads would start in the master,
+# which never serves requests.
+from app import create_app
+
+app = create_app()
@@ -0,0 +1,82 @@
+"""
+Measure how long a fresh app process takes to become useful
+
+Each run starts a new interpreter and records:
+  - import: time to import app (what a WSGI server pays before serving)
+  - eager import: the same with every heavy dependency imported up front,
+    i.e. what startup cost before those imports were made lazy
+  - first request: a /api/test round trip right after import
+  - warm-up: time until /api/ready would answer 200, per warm-up step
+
+Usage:
+    python tests/benchmark_cold_start.py [runs]   # default: 5
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+HEAVY = ('numpy', 'pytesseract', 'pdf2image', 'reportlab', 'bs4', 'deep_translator')
+
+# Runs in a fresh interpreter inside src/ and prints one JSON line
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+if sys.argv[1] == 'eager':
+    for name in {heavy!r}:
+        __import__(name)
+import app
+imported = time.perf_counter()
+app.app.test_client().get('/api/test')
+first_request = time.perf_counter()
+result = {{
+    'import': imported - start,
+    'first_request': first_request - imported,
+    'loaded': [name for name in {heavy!r} if name in sys.modules],
+}}
+if sys.argv[1] == 'warm':
+    app.warm_up()
+    result['warm_up'] = time.perf_counter() - first_request
+    result['steps'] = {{name: step['seconds'] for name, step in app.WARMUP_STATE['steps'].items()}}
+    result['status'] = app.WARMUP_STATE['status']
+print(json.dumps(result))
+"""
+
+
+def probe(mode):
+    # WARMUP=false so the import itself is measured; the warm mode runs it explicitly
+    env = dict(os.environ, WARMUP='false')
+    completed = subprocess.run(
+        [sys.executable, '-c', PROBE.format(heavy=HEAVY), mode],
+        cwd=SRC, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    probe('lazy')  # populate the bytecode and OS file caches once
+
+    lazy = [probe('lazy') for _ in range(runs)]
+    eager = [probe('eager') for _ in range(runs)]
+    warm = probe('warm')
+
+    def median(results, key):
+        return statistics.median(result[key] for result in results)
+
+    print(f"{'':<22}{'median':>10}")
+    print(f"{'import':<22}{median(lazy, 'import') * 1000:>8.0f}ms")
+    print(f"{'eager import':<22}{median(eager, 'import') * 1000:>8.0f}ms")
+    print(f"{'first /api/test':<22}{median(lazy, 'first_request') * 1000:>8.0f}ms")
+    print(f"\nheavy modules loaded by import: {', '.join(lazy[0]['loaded']) or 'none'}")
+
+    print(f"\nwarm-up: {warm['warm_up']:.2f}s ({warm['status']})")
+    for name, seconds in warm['steps'].items():
+        print(f"  {name:<20}{seconds:>8.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Measure how much OCR time the preprocessing stage saves
+
+OCRs each sample with and without preprocessing. By default the samples
+are synthetic: a small, deterministic set rendered here (an oversized
+phone-style photo with a shadow and skew, a noisy scan, and a clean page)
+with a built-in font and simulated defects. They show the trend, not
+what real scans gain; pass a directory of real scans or photos to measure
+those instead. No scans are bundled with the repository.
+
+Usage:
+    python tests/benchmark_preprocess.py [steps] [scan_dir]   # default: all, synthetic samples
+"""
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services import tesseract_engine  # noqa: E402
+from services.preprocess import preprocess, parse_steps, make_options  # noqa: E402
+
+# Set Tesseract path if on Windows
+if os.name == 'nt':  # Windows
+    tesseract_engine.pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+SCAN_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp')
+
+TEXT = [
+    "Dear customer, thank you for your order.",
+    "Your parcel will be delivered on Monday.",
+    "Please keep this receipt for your records.",
+    "Questions? Contact support at any time.",
+]
+
+
+def render_page(size, font_size, margin):
+    image = Image.new('L', size, color=255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=font_size)
+    y = margin
+    while y < size[1] - margin - font_size:
+        for line in TEXT:
+            draw.text((margin, y), line, fill=0, font=font)
+            y += int(font_size * 1.6)
+    return image
+
+
+def make_samples():
+    rng = np.random.default_rng(0)
+
+    # phone photo: huge, skewed, with a lighting gradient
+    photo = render_page((3000, 4000), 90, 150).rotate(2.5, expand=True, fillcolor=255)
+    pixels = np.asarray(photo, dtype=np.float32)
+    shadow = np.linspace(0.55, 1.0, pixels.shape[1], dtype=np.float32)[None, :]
+    photo = Image.fromarray((pixels * shadow).astype(np.uint8)).convert('RGB')
+
+    # noisy scan at 300 DPI
+    scan = np.asarray(render_page((2480, 3508), 42, 200), dtype=np.int16)
+    scan = scan + rng.normal(0, 40, scan.shape).astype(np.int16)
+    scan = Image.fromarray(scan.clip(0, 255).astype(np.uint8))
+
+    clean = render_page((1240, 1754), 24, 100)
+    return {'phone_photo': photo, 'noisy_scan': scan, 'clean_page': clean}
+
+
+def load_samples(directory):
+    # every image in the directory, by file name
+    samples = {}
+    for name in sorted(os.listdir(directory)):
+        if os.path.splitext(name)[1].lower() in SCAN_EXTENSIONS:
+            samples[os.path.splitext(name)[0][:13]] = Image.open(os.path.join(directory, name))
+    if not samples:
+        sys.exit(f"No images ({', '.join(SCAN_EXTENSIONS)}) in {directory}")
+    return samples
+
+
+def timed_ocr(image):
+    start = time.perf_counter()
+    text = tesseract_engine.image_to_string(image, lang='eng')
+    return text, time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    options = make_options(parse_steps(sys.argv[1] if len(sys.argv) > 1 else 'all'))
+    scan_dir = sys.argv[2] if len(sys.argv) > 2 else None
+    samples = load_samples(scan_dir) if scan_dir else make_samples()
+    print(f"Preprocessing steps: {', '.join(options['steps']) or 'none'}")
+    print(f"Samples: {scan_dir or 'synthetic (pass a directory of real scans to measure those)'}")
+    print(f"OCR engine: {tesseract_engine.describe()}")
+    print(f"{'sample':<14}{'raw ocr':>10}{'prep':>8}{'prep ocr':>10}{'saved':>9}{'words raw/prep':>17}")
+    print("-" * 68)
+
+    total_raw = total_prep = 0.0
+    for name, image in samples.items():
+        raw_text, raw_seconds = timed_ocr(image)
+        processed, report = preprocess(image, options)
+        prep_text, prep_seconds = timed_ocr(processed)
+        total_raw += raw_seconds
+        total_prep += report['seconds'] + prep_seconds
+        saved = raw_seconds - (report['seconds'] + prep_seconds)
+        print(f"{name:<14}{raw_seconds:>9.2f}s{report['seconds']:>7.2f}s{prep_seconds:>9.2f}s{saved:>8.2f}s"
+              f"{len(raw_text.split()):>9}/{len(prep_text.split())}")
+
+    print("-" * 68)
+    print(f"Total: {total_raw:.2f}s raw vs {total_prep:.2f}s with preprocessing "
+          f"({(1 - total_prep / total_raw) * 100:.0f}% saved)")
@@ -0,0 +1,90 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.admission import MAX_RETRY_AFTER, AdmissionController, Overloaded  # noqa: E402
+
+
+class TestAdmissionController(unittest.TestCase):
+    def hold(self, controller, release, bounded=True):
+        # occupy one slot from another thread until `release` is set
+        entered = threading.Event()
+
+        def worker():
+            with controller.slot(bounded):
+                entered.set()
+                release.wait()
+        thread = threading.Thread(target=worker)
+        thread.start()
+        entered.wait(1)
+        return thread
+
+    def test_admits_up_to_max_active(self):
+        controller = AdmissionController(max_active=2, max_waiting=0)
+        release = threading.Event()
+        threads = [self.hold(controller, release) for _ in range(2)]
+        self.assertEqual(controller.stats()['active'], 2)
+        with self.assertRaises(Overloaded) as raised:
+            with controller.slot():
+                pass
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(controller.stats()['rejected'], 1)
+        with controller.slot():
+            self.assertEqual(controller.stats()['active'], 1)
+
+    def test_waiter_times_out(self):
+        controller = AdmissionController(max_active=1, max_waiting=1, max_wait=0.05)
+        release = threading.Event()
+        thread = self.hold(controller, release)
+        start = time.monotonic()
+        with self.assertRaises(Overloaded):
+            with controller.slot():
+                pass
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(controller.stats()['waiting'], 0)
+        release.set()
+        thread.join()
+
+    def test_waiter_gets_a_freed_slot(self):
+        controller = AdmissionController(max_active=1, max_waiting=1, max_wait=5)
+        release = threading.Event()
+        thread = self.hold(controller, release)
+        threading.Timer(0.05, release.set).start()
+        with controller.slot():
+            self.assertEqual(controller.stats()['active'], 1)
+        thread.join()
+        self.assertEqual(controller.stats()['admitted'], 2)
+
+    def test_unbounded_callers_wait_past_the_queue_limit(self):
+        controller = AdmissionController(max_active=1, max_waiting=0, max_wait=0.01)
+        release = threading.Event()
+        thread = self.hold(controller, release)
+        threading.Timer(0.05, release.set).start()
+        with controller.slot(bounded=False):
+            pass
+        thread.join()
+        self.assertEqual(controller.stats()['rejected'], 0)
+
+    def test_slot_is_released_on_error(self):
+        controller = AdmissionController(max_active=1, max_waiting=0)
+        with self.assertRaises(RuntimeError):
+            with controller.slot():
+                raise RuntimeError('boom')
+        self.assertEqual(controller.stats()['active'], 0)
+
+    def test_retry_after_scales_with_backlog(self):
+        controller = AdmissionController(max_active=2, max_waiting=10)
+        controller.avg_seconds = 4.0
+        self.assertEqual(controller.retry_after(0), 2)
+        self.assertEqual(controller.retry_after(3), 8)
+        self.assertEqual(controller.retry_after(10 ** 6), MAX_RETRY_AFTER)
+
+
+if __name__ == '__main__':
+    unittest.main()
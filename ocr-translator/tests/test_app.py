@@ -0,0 +1,263 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+
+from PIL import Image
+
+# app builds its stores at import: point them at a scratch directory first
+_scratch = tempfile.TemporaryDirectory()
+for _name, _path in (('JOB_DB_PATH', 'jobs.sqlite3'), ('RESULT_CACHE_DIR', 'results'), ('OCR_CACHE_DIR', 'ocr'),
+                     ('TRANSLATION_MEMORY_PATH', 'memory.sqlite3'), ('DOCUMENT_DIR', 'documents')):
+    os.environ[_name] = os.path.join(_scratch.name, _path)
+os.environ['WARMUP'] = 'false'
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import app  # noqa: E402
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    Image.new('L', (60, 40), color=255).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class AppTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.uploads = os.path.join(self.tmp.name, 'uploads')
+        self.outputs = os.path.join(self.tmp.name, 'translations')
+        os.makedirs(self.uploads)
+        os.makedirs(self.outputs)
+        results = app.ResultStore(os.path.join(self.tmp.name, 'results'))
+        for patcher in (mock.patch.object(app, 'UPLOAD_DIR', self.uploads),
+                        mock.patch.object(app, 'OUT_DIR', self.outputs),
+                        mock.patch.object(app, 'RESULT_STORE', results),
+                        mock.patch.object(app, 'ocr_image', return_value='Hello.'),
+                        mock.patch.object(app, 'translate_text', return_value='Hola.'),
+                        mock.patch.object(app.GOOGLE_PROVIDER, 'supports', return_value=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.results = results
+        self.client = app.app.test_client()
+
+    def files(self):
+        return [os.path.join(root, name) for directory in (self.uploads, self.outputs, self.results.directory)
+                for root, _, names in os.walk(directory) for name in names]
+
+    def translate(self, data=None):
+        return self.client.post('/api/translate', data={'file': (io.BytesIO(data or png_bytes()), 'scan.png'),
+                                                        'target': 'es', 'output': 'text'})
+
+
+class TestInMemoryTranslate(AppTestCase):
+    def test_small_upload_never_touches_the_disk(self):
+        response = self.translate()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, b'Hola.')
+        self.assertEqual(response.headers['X-Result-Cache'], 'miss')
+        self.assertEqual(self.files(), [])
+
+    def test_large_upload_is_stored_under_its_saved_hash(self):
+        data = png_bytes()
+        with mock.patch.object(app, 'IN_MEMORY_MAX_BYTES', 0), \
+                mock.patch.object(app, 'hash_upload', wraps=app.hash_upload) as hash_upload:
+            self.assertEqual(self.translate(data).headers['X-Result-Cache'], 'miss')
+            self.assertEqual(self.translate(data).headers['X-Result-Cache'], 'hit')
+        # hashed while saving, never by reading the saved file back
+        self.assertTrue(all(call.kwargs['digest'] for call in hash_upload.call_args_list))
+        self.assertEqual(self.results.stats()['stored'], 1)
+
+
+class TestAdminToken(AppTestCase):
+    TRACE = '/api/admin/traces/' + '0' * 32
+
+    def test_admin_endpoints_do_not_exist_without_a_token(self):
+        with mock.patch.object(app, 'ADMIN_TOKEN', ''):
+            # a proxied request looks local; that alone must not be enough
+            response = self.client.get(self.TRACE, environ_base={'REMOTE_ADDR': '127.0.0.1'})
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response.get_json(), {'error': 'not found'})
+            self.assertEqual(self.client.get('/api/admin/translation-memory').status_code, 404)
+
+    def test_wrong_or_missing_token_is_forbidden(self):
+        with mock.patch.object(app, 'ADMIN_TOKEN', 'secret'):
+            self.assertEqual(self.client.get(self.TRACE).status_code, 403)
+            self.assertEqual(self.client.get(self.TRACE, headers={'X-Admin-Token': 'guess'}).status_code, 403)
+            # past the check: the trace just doesn't exist
+            response = self.client.get(self.TRACE, headers={'X-Admin-Token': 'secret'})
+            self.assertEqual(response.get_json(), {'error': 'trace not found'})
+
+    def test_profiling_needs_the_token(self):
+        with mock.patch.object(app, 'ADMIN_TOKEN', ''):
+            response = self.client.get('/api/storage/stats?profile=cprofile')
+            self.assertNotIn('X-Profile-Id', response.headers)
+        with mock.patch.object(app, 'ADMIN_TOKEN', 'secret'):
+            response = self.client.get('/api/storage/stats?profile=cprofile')
+            self.assertNotIn('X-Profile-Id', response.headers)
+
+
+class TestDocuments(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(app, 'DOCUMENTS', app.DocumentStore(os.path.join(self.tmp.name, 'documents')))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create(self):
+        response = self.client.post('/api/documents', data={'file': (io.BytesIO(png_bytes()), 'scan.png')})
+        self.assertEqual(response.status_code, 201)
+        return response
+
+    def translate_document(self, document_id):
+        return self.client.post(f"/api/documents/{document_id}/translate", data={'target': 'es', 'output': 'text'})
+
+    def test_ocr_once_translate_many(self):
+        response = self.create()
+        document = response.get_json()
+        self.assertEqual(response.headers['Location'], document['status_url'])
+        self.assertEqual(document['chars'], len('Hello.'))
+        self.assertEqual(self.client.get(document['status_url']).get_json()['document_id'], document['document_id'])
+        for _ in range(2):
+            translated = self.translate_document(document['document_id'])
+            self.assertEqual(translated.data, b'Hola.')
+            self.assertEqual(translated.headers['X-Document-Id'], document['document_id'])
+        self.assertEqual(app.ocr_image.call_count, 1)
+        # the upload itself is not kept, only the OCR output
+        self.assertEqual(self.files(), [])
+
+    def test_deleted_document_is_not_found(self):
+        document_id = self.create().get_json()['document_id']
+        self.assertEqual(self.client.delete(f"/api/documents/{document_id}").status_code, 204)
+        self.assertEqual(self.client.get(f"/api/documents/{document_id}").status_code, 404)
+        self.assertEqual(self.translate_document(document_id).status_code, 404)
+        self.assertEqual(self.client.delete(f"/api/documents/{document_id}").status_code, 404)
+
+    def test_translate_takes_an_admission_slot(self):
+        document_id = self.create().get_json()['document_id']
+        admission = app.AdmissionController(max_active=1, max_waiting=0)
+        with mock.patch.object(app, 'ADMISSION', admission), admission.slot(bounded=False):
+            response = self.translate_document(document_id)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response.headers)
+
+
+
+class TestReadiness(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(app, 'WARMUP_STATE', {'status': 'pending', 'seconds': None, 'steps': {}})
+        self.state = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def warm_up(self, **failing):
+        # every step succeeds instantly unless named in ``failing``
+        def step(name):
+            def run():
+                if name in failing:
+                    raise RuntimeError(failing[name])
+                return name
+            return run
+        with mock.patch.object(app, 'preload_modules', step('modules')), \
+                mock.patch.object(app, 'pdf_font_name', step('pdf_font')), \
+                mock.patch.object(app.tesseract_engine, 'version', step('tesseract')), \
+                mock.patch.object(app, 'warm_engines', step('ocr_engines')), \
+                mock.patch.object(app, 'connect_providers', step('providers')), \
+                mock.patch.object(app, 'WARMUP_PROVIDERS', True), \
+                mock.patch.object(app, 'WARMUP_OCR_POOL', False):
+            app.warm_up()
+        return self.client.get('/api/ready')
+
+    def test_not_ready_until_warmed_up(self):
+        self.assertEqual(self.client.get('/api/ready').status_code, 503)
+        response = self.warm_up()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['status'], 'ready')
+        self.assertEqual(set(response.get_json()['steps']), {'modules', 'pdf_font', 'tesseract', 'ocr_engines',
+                                                              'providers'})
+
+    def test_required_step_failing_keeps_it_unready(self):
+        response = self.warm_up(tesseract='tesseract is not installed')
+        self.assertEqual(response.status_code, 503)
+        body = response.get_json()
+        self.assertEqual(body['status'], 'failed')
+        self.assertEqual(body['steps']['tesseract'], {'ok': False, 'error': 'tesseract is not installed',
+                                                      'seconds': body['steps']['tesseract']['seconds']})
+
+    def test_unreachable_provider_does_not_block_readiness(self):
+        response = self.warm_up(providers='connection refused')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.get_json()['steps']['providers']['ok'])
+
+    def test_disabled_warm_up_is_ready(self):
+        self.state['status'] = 'disabled'
+        self.assertEqual(self.client.get('/api/ready').status_code, 200)
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_heavy_modules_are_not_imported_with_the_app(self):
+        # a fresh interpreter: this one has imported them already
+        probe = "import sys, app; print('loaded:', [name for name in sys.argv[1:] if name in sys.modules])"
+        heavy = ['numpy', 'pytesseract', 'pdf2image', 'reportlab', 'bs4', 'deep_translator']
+        completed = subprocess.run([sys.executable, '-c', probe] + heavy, cwd=os.path.dirname(app.__file__),
+                                   capture_output=True, text=True, check=True, timeout=120)
+        self.assertIn('loaded: []', completed.stdout.splitlines())
+
+
+
+def zip_bytes(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+class TestBatch(AppTestCase):
+    def batch(self, data):
+        return self.client.post('/api/batch', data={'files': (io.BytesIO(data), 'scans.zip'),
+                                                    'target': 'es', 'output': 'text'})
+
+    def test_same_names_get_distinct_entries(self):
+        # 'scan' twice would take '1_scan_translated.txt', which '1_scan' needs as well
+        names = ['a/scan.png', 'b/scan.png', '1_scan.png', 'c/1_scan.png', 'd/scan.png']
+        response = self.batch(zip_bytes((name, png_bytes()) for name in names))
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(response.data))
+        outputs = [name for name in archive.namelist() if name != 'manifest.json']
+        self.assertEqual(len(outputs), len(names))
+        self.assertEqual(len(set(outputs)), len(names))
+        manifest = json.loads(archive.read('manifest.json'))
+        self.assertEqual(sorted(entry['output'] for entry in manifest['files']), sorted(outputs))
+
+    def test_unpacked_bytes_are_counted_as_read(self):
+        data = zip_bytes([('scan.png', png_bytes()), ('blank.png', b'\0' * 100000)])
+        with mock.patch.object(app, 'BATCH_MAX_BYTES', 50000):
+            response = self.batch(data)
+        self.assertEqual(response.status_code, 413)
+
+    def test_corrupt_member_is_a_client_error(self):
+        data = bytearray(zip_bytes([('scan.png', b'x' * 1000)]))
+        data[45] ^= 0xff  # inside the compressed bytes of the only member, right after its 38-byte header
+        response = self.batch(bytes(data))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['error'], 'scan.png is corrupt in its ZIP archive')
+
+
+
+class TestJanitorScope(unittest.TestCase):
+    def test_profiles_and_traces_are_expired(self):
+        self.assertIn(str(app.PROFILE_DIR), app.JANITOR.max_age)
+        self.assertIn(str(app.TRACE_PATH.parent), app.JANITOR.max_age)
+        # never the directory holding the job database
+        self.assertNotIn(str(app.JOB_DB_PATH.parent), app.JANITOR.max_age)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.circuit_breaker import CircuitBreaker, ProviderRouter, ProviderUnavailable, is_caller_error  # noqa: E402
+from services.rate_limiter import ProviderError  # noqa: E402
+
+
+class FakeProvider:
+    max_items = 10
+    max_chars = 1000
+
+    def __init__(self, name):
+        self.name = name
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3, open_seconds=60)
+        for _ in range(2):
+            breaker.record_failure(0.1)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure(0.1)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        breaker.record_failure(0.1)
+        breaker.record_success(0.1)
+        breaker.record_failure(0.1)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, slow_seconds=1.0)
+        breaker.record_success(5.0)
+        breaker.record_success(5.0)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_half_open_admits_one_trial(self):
+        breaker = CircuitBreaker(failure_threshold=1, open_seconds=0.05)
+        breaker.record_failure(0.1)
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success(0.1)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, open_seconds=0.05)
+        breaker.record_failure(0.1)
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.record_failure(0.1)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(breaker.trips, 2)
+
+
+class TestProviderRouter(unittest.TestCase):
+    def setUp(self):
+        self.primary, self.secondary = FakeProvider('primary'), FakeProvider('secondary')
+        self.router = ProviderRouter([self.primary, self.secondary], failure_threshold=2, open_seconds=60)
+
+    def test_limits_suit_every_provider(self):
+        self.primary.concurrency, self.secondary.concurrency = 8, 2
+        self.secondary.max_chars = 500
+        router = ProviderRouter([self.primary, self.secondary])
+        self.assertEqual((router.max_items, router.max_chars, router.concurrency), (10, 500, 2))
+
+    def test_fails_over_on_provider_error(self):
+        def call(provider):
+            if provider is self.primary:
+                raise ProviderError('HTTP 503', 503)
+            return provider.name
+        self.assertEqual(self.router.call(call), 'secondary')
+        self.assertEqual(self.router.breakers['primary'].failures, 1)
+
+    def test_open_circuit_is_skipped(self):
+        calls = []
+
+        def call(provider):
+            calls.append(provider.name)
+            if provider is self.primary:
+                raise ProviderError('timeout')
+            return provider.name
+        for _ in range(3):
+            self.router.call(call)
+        self.assertEqual(calls, ['primary', 'secondary', 'primary', 'secondary', 'secondary'])
+
+    def test_caller_errors_pass_through_without_tripping(self):
+        for error in (ValueError('unsupported language: xx-bogus'), ProviderError('HTTP 400', 400)):
+            def call(provider, error=error):
+                raise error
+            for _ in range(3):
+                with self.assertRaises(type(error)):
+                    self.router.call(call)
+        self.assertEqual(self.router.breakers['primary'].state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.router.breakers['secondary'].successes, 0)
+
+    def test_all_failed_raises_unavailable(self):
+        def call(provider):
+            raise ProviderError('HTTP 502', 502)
+        with self.assertRaises(ProviderUnavailable):
+            self.router.call(call)
+
+    def test_is_caller_error(self):
+        self.assertTrue(is_caller_error(ValueError()))
+        self.assertTrue(is_caller_error(ProviderError('bad request', 400)))
+        self.assertFalse(is_caller_error(ProviderError('rate limited', 429)))
+        self.assertFalse(is_caller_error(ProviderError('bad key', 403)))
+        self.assertFalse(is_caller_error(ProviderError('connection reset')))
+        self.assertFalse(is_caller_error(RuntimeError()))
+
+
+if __name__ == '__main__':
+    unittest.main()
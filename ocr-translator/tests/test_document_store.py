@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.document_store import DocumentStore  # noqa: E402
+
+
+class TestDocumentStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = DocumentStore(self.tmp.name, ttl=3600)
+
+    def age(self, document_id, seconds):
+        then = time.time() - seconds
+        os.utime(os.path.join(self.tmp.name, f"{document_id}.json"), (then, then))
+
+    def test_created_document_reads_back(self):
+        created = self.store.create({'filename': 'scan.pdf', 'text': 'नमस्ते'})
+        document = self.store.get(created['id'])
+        self.assertEqual(document['text'], 'नमस्ते')
+        self.assertEqual(document['created_at'], created['created_at'])
+        self.assertAlmostEqual(document['expires_at'], time.time() + 3600, delta=5)
+        self.assertEqual(os.listdir(self.tmp.name), [f"{created['id']}.json"])
+
+    def test_reading_refreshes_the_ttl(self):
+        document_id = self.store.create({})['id']
+        self.age(document_id, 3000)
+        self.assertIsNotNone(self.store.get(document_id))
+        self.age(document_id, 3000)
+        self.assertIsNotNone(self.store.get(document_id))
+
+    def test_expired_document_is_gone(self):
+        document_id = self.store.create({})['id']
+        self.age(document_id, 3700)
+        self.assertIsNone(self.store.get(document_id))
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_no_ttl_keeps_documents(self):
+        store = DocumentStore(self.tmp.name, ttl=0)
+        document_id = store.create({})['id']
+        self.age(document_id, 10 ** 7)
+        self.assertIsNone(store.get(document_id)['expires_at'])
+
+    def test_delete(self):
+        document_id = self.store.create({})['id']
+        self.assertTrue(self.store.delete(document_id))
+        self.assertFalse(self.store.delete(document_id))
+        self.assertIsNone(self.store.get(document_id))
+
+    def test_ids_cannot_name_other_files(self):
+        self.assertIsNone(self.store.get('../jobs'))
+        self.assertFalse(self.store.delete('../jobs'))
+
+
+if __name__ == '__main__':
+    unittest.main()
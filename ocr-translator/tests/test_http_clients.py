@@ -0,0 +1,48 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services import http_clients  # noqa: E402
+from services.http_clients import build_session, get_session, close_sessions  # noqa: E402
+
+
+class TestBuildSession(unittest.TestCase):
+    def test_pool_matches_the_concurrency_cap(self):
+        adapter = build_session(8).get_adapter('https://translate.example')
+        self.assertEqual(adapter._pool_maxsize, 8)
+        self.assertTrue(adapter._pool_block)
+        self.assertEqual(build_session(0).get_adapter('https://translate.example')._pool_maxsize, 1)
+
+    def test_only_connection_failures_are_retried(self):
+        retry = build_session(4, retries=3, backoff=0.25).get_adapter('http://translate.example').max_retries
+        self.assertEqual((retry.total, retry.connect, retry.read, retry.status), (3, 3, 0, 0))
+        self.assertEqual(retry.backoff_factor, 0.25)
+        self.assertFalse(retry.respect_retry_after_header)
+
+
+class TestGetSession(unittest.TestCase):
+    def setUp(self):
+        close_sessions()
+        self.addCleanup(close_sessions)
+
+    def test_same_settings_share_a_session(self):
+        self.assertIs(get_session('deepl', 4), get_session('deepl', 4))
+        self.assertIsNot(get_session('deepl', 4), get_session('google', 4))
+
+    def test_pool_size_is_not_fixed_by_the_first_caller(self):
+        small = get_session('deepl', 2)
+        large = get_session('deepl', 16)
+        self.assertIsNot(small, large)
+        self.assertEqual(large.get_adapter('https://api.deepl.com')._pool_maxsize, 16)
+        self.assertEqual(small.get_adapter('https://api.deepl.com')._pool_maxsize, 2)
+
+    def test_close_sessions_forgets_them(self):
+        session = get_session('deepl', 4)
+        close_sessions()
+        self.assertEqual(http_clients._sessions, {})
+        self.assertIsNot(get_session('deepl', 4), session)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.janitor import FileJanitor  # noqa: E402
+
+
+class TestFileJanitor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.uploads = os.path.join(self.tmp.name, 'uploads')
+        self.outputs = os.path.join(self.tmp.name, 'outputs')
+        os.makedirs(self.uploads)
+        os.makedirs(self.outputs)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_file(self, directory, name, size=100, age=0.0):
+        path = os.path.join(directory, name)
+        with open(path, 'wb') as fh:
+            fh.write(b'x' * size)
+        then = time.time() - age
+        os.utime(path, (then, then))
+        return path
+
+    def test_expires_idle_files_per_directory(self):
+        janitor = FileJanitor({self.uploads: 60, self.outputs: 3600})
+        old_upload = self.make_file(self.uploads, 'old.pdf', age=120)
+        new_upload = self.make_file(self.uploads, 'new.pdf', age=10)
+        output = self.make_file(self.outputs, 'out.pdf', age=120)
+        removed = janitor.sweep()
+        self.assertEqual(removed['expired'], {'files': 1, 'bytes': 100})
+        self.assertFalse(os.path.exists(old_upload))
+        self.assertTrue(os.path.exists(new_upload))
+        self.assertTrue(os.path.exists(output))
+
+    def test_quota_evicts_least_recently_used_first(self):
+        janitor = FileJanitor({self.uploads: 0, self.outputs: 0}, quota_bytes=250, grace_seconds=60)
+        oldest = self.make_file(self.uploads, 'a.pdf', age=3000)
+        older = self.make_file(self.outputs, 'b.pdf', age=2000)
+        recent = self.make_file(self.uploads, 'c.pdf', age=1000)
+        removed = janitor.sweep()
+        self.assertEqual(removed['quota']['files'], 1)
+        self.assertFalse(os.path.exists(oldest))
+        self.assertTrue(os.path.exists(older))
+        self.assertTrue(os.path.exists(recent))
+        self.assertEqual(sum(janitor.stats()['disk_bytes'].values()), 200)
+
+    def test_quota_spares_files_within_grace(self):
+        janitor = FileJanitor({self.uploads: 0}, quota_bytes=100, grace_seconds=600)
+        self.make_file(self.uploads, 'a.pdf', age=30)
+        self.make_file(self.uploads, 'b.pdf', age=20)
+        self.assertEqual(janitor.sweep()['quota']['files'], 0)
+
+    def test_kept_files_are_never_removed(self):
+        queued_input = self.make_file(self.uploads, 'queued.pdf', age=7200)
+        janitor = FileJanitor({self.uploads: 60}, quota_bytes=50, grace_seconds=0,
+                              keep=lambda: [queued_input])
+        removed = janitor.sweep()
+        self.assertEqual(removed['expired']['files'], 0)
+        self.assertEqual(removed['quota']['files'], 0)
+        self.assertTrue(os.path.exists(queued_input))
+        self.assertEqual(janitor.stats()['disk_bytes']['uploads'], 100)
+
+    def test_purge_runs_on_every_sweep(self):
+        janitor = FileJanitor({self.uploads: 60}, purge=lambda: 2)
+        self.assertEqual(janitor.sweep()['records_purged'], 2)
+        janitor.sweep()
+        self.assertEqual(janitor.stats()['records_purged'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
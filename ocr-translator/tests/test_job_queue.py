@@ -0,0 +1,130 @@
+import os
+import socket
+import sys
+import tempfile
+import time
+import unittest
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.job_queue import JobStore, JobQueue, make_owner, QUEUED, RUNNING, DONE, FAILED  # noqa: E402
+
+
+class TestJobStoreRecover(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = JobStore(os.path.join(self.tmp.name, 'jobs.sqlite3'))
+        self.owner = make_owner()
+
+    def tearDown(self):
+        self.store._conn.close()
+        self.tmp.cleanup()
+
+    def running_job(self, owner, heartbeat_at=None):
+        job = self.store.create({}, 'input.pdf')
+        self.store.claim(job['id'], owner)
+        if heartbeat_at is not None:
+            self.store._conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (heartbeat_at, job['id']))
+            self.store._conn.commit()
+        return job['id']
+
+    def status(self, job_id):
+        return self.store.get(job_id)['status']
+
+    def test_own_jobs_are_not_requeued(self):
+        job_id = self.running_job(self.owner, heartbeat_at=0)
+        self.assertEqual(self.store.recover(3, 60, self.owner), [])
+        self.assertEqual(self.status(job_id), RUNNING)
+
+    def test_live_owner_keeps_its_jobs(self):
+        # a process on another host with a fresh lease
+        job_id = self.running_job('elsewhere:1234:abcd1234')
+        self.assertEqual(self.store.recover(3, 60, self.owner), [])
+        self.assertEqual(self.status(job_id), RUNNING)
+
+    def test_expired_lease_is_requeued(self):
+        job_id = self.running_job('elsewhere:1234:abcd1234', heartbeat_at=1.0)
+        self.assertEqual(self.store.recover(3, 60, self.owner), [job_id])
+        self.assertEqual(self.status(job_id), QUEUED)
+        self.assertIsNone(self.store.get(job_id)['owner'])
+
+    def test_exited_process_on_this_host_is_requeued_at_once(self):
+        job_id = self.running_job(f"{socket.gethostname()}:{os.getpid()}:00000000")
+        self.assertEqual(self.store.recover(3, 60, self.owner), [job_id])
+
+    def test_heartbeat_renews_lease(self):
+        job_id = self.running_job(self.owner, heartbeat_at=1.0)
+        self.assertEqual(self.store.heartbeat(self.owner), 1)
+        self.assertGreater(self.store.get(job_id)['heartbeat_at'], 1.0)
+
+    def test_too_many_attempts_fails(self):
+        job_id = self.running_job('elsewhere:1234:abcd1234', heartbeat_at=1.0)
+        self.assertEqual(self.store.recover(1, 60, self.owner), [])
+        self.assertEqual(self.status(job_id), FAILED)
+        # the failure is logged, so event streams following the job end
+        self.assertEqual(self.store.events(job_id)[-1]['event'], FAILED)
+
+    def test_queued_lists_oldest_first(self):
+        first = self.store.create({}, 'a.pdf')['id']
+        second = self.store.create({}, 'b.pdf')['id']
+        self.assertEqual(self.store.queued(), [first, second])
+
+    def test_purge_deletes_old_finished_jobs_and_their_events(self):
+        old = self.running_job(self.owner)
+        self.store.finish(old, 'out.pdf', {})
+        recent = self.running_job(self.owner)
+        self.store.fail(recent, 'boom')
+        running = self.running_job(self.owner)
+        queued = self.store.create({}, 'queued.pdf')['id']
+        self.store._conn.execute("UPDATE jobs SET finished_at = ? WHERE id = ?", (time.time() - 7200, old))
+        self.store._conn.execute("UPDATE jobs SET created_at = 1, started_at = 1 WHERE id IN (?, ?)",
+                                 (running, queued))
+        self.store._conn.commit()
+        self.assertEqual(self.store.purge(3600), 1)
+        self.assertIsNone(self.store.get(old))
+        self.assertEqual(self.store.events(old), [])
+        for job_id in (recent, running, queued):
+            self.assertIsNotNone(self.store.get(job_id))
+        self.assertEqual(self.store.events(recent)[-1]['event'], FAILED)
+
+
+class TestJobQueueRun(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = JobStore(os.path.join(self.tmp.name, 'jobs.sqlite3'))
+
+    def tearDown(self):
+        self.store._conn.close()
+        self.tmp.cleanup()
+
+    def run_job(self, handler):
+        queue = JobQueue(self.store, handler, workers=1)
+        job = queue.submit({}, 'input.pdf')
+        queue._executor.shutdown(wait=True)
+        return self.store.get(job['id'])
+
+    def test_result_is_stored(self):
+        job = self.run_job(lambda job, emit: ('out.pdf', {'pages': 1}))
+        self.assertEqual(job['status'], DONE)
+        self.assertEqual(job['result_path'], 'out.pdf')
+
+    def test_handler_error_fails_job(self):
+        def handler(job, emit):
+            raise RuntimeError('boom')
+        job = self.run_job(handler)
+        self.assertEqual(job['status'], FAILED)
+        self.assertEqual(job['error'], 'boom')
+
+    def test_unstorable_result_fails_job(self):
+        job = self.run_job(lambda job, emit: (BytesIO(b'pdf'), {}))
+        self.assertEqual(job['status'], FAILED)
+
+    def test_terminal_event_is_logged_once(self):
+        job = self.run_job(lambda job, emit: ('out.pdf', {'pages': 1}))
+        self.assertFalse(self.store.fail(job['id'], 'too late'))
+        events = [event['event'] for event in self.store.events(job['id'])]
+        self.assertEqual(events, [QUEUED, RUNNING, DONE])
+
+
+if __name__ == '__main__':
+    unittest.main()
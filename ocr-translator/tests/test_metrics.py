@@ -0,0 +1,84 @@
+import math
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.metrics import Registry  # noqa: E402
+
+
+class TestRegistryRender(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_and_gauge(self):
+        requests = self.registry.counter('ocr_requests_total', 'Requests served', ('endpoint',))
+        requests.inc(endpoint='translate')
+        requests.inc(2, endpoint='batch')
+        inflight = self.registry.gauge('ocr_inflight', 'Requests in flight')
+        inflight.inc()
+        inflight.inc()
+        inflight.dec()
+        self.assertEqual(self.registry.render(), '\n'.join([
+            '# HELP ocr_requests_total Requests served',
+            '# TYPE ocr_requests_total counter',
+            'ocr_requests_total{endpoint="batch"} 2',
+            'ocr_requests_total{endpoint="translate"} 1',
+            '# HELP ocr_inflight Requests in flight',
+            '# TYPE ocr_inflight gauge',
+            'ocr_inflight 1',
+        ]) + '\n')
+
+    def test_histogram_buckets_are_cumulative(self):
+        seconds = self.registry.histogram('ocr_page_seconds', 'OCR time', ('source',), buckets=(0.5, 1))
+        for value in (0.25, 0.5, 0.75, 3):
+            seconds.observe(value, source='ocr')
+        self.assertEqual(self.registry.render().splitlines()[2:], [
+            'ocr_page_seconds_bucket{source="ocr",le="0.5"} 2',
+            'ocr_page_seconds_bucket{source="ocr",le="1"} 3',
+            'ocr_page_seconds_bucket{source="ocr",le="+Inf"} 4',
+            'ocr_page_seconds_sum{source="ocr"} 4.5',
+            'ocr_page_seconds_count{source="ocr"} 4',
+        ])
+
+    def test_escaping(self):
+        errors = self.registry.counter('ocr_errors_total', 'Errors\nby "reason" \\ kind', ('reason',))
+        errors.inc(reason='bad "quote"\\\n')
+        self.assertEqual(self.registry.render().splitlines(), [
+            '# HELP ocr_errors_total Errors\\nby "reason" \\\\ kind',
+            '# TYPE ocr_errors_total counter',
+            'ocr_errors_total{reason="bad \\"quote\\"\\\\\\n"} 1',
+        ])
+
+    def test_special_values(self):
+        gauge = self.registry.gauge('ocr_value', 'A value', ('case',))
+        for case, value in (('inf', math.inf), ('ninf', -math.inf), ('nan', math.nan), ('float', 0.1)):
+            gauge.set(value, case=case)
+        self.assertEqual(self.registry.render().splitlines()[2:], [
+            'ocr_value{case="float"} 0.1',
+            'ocr_value{case="inf"} +Inf',
+            'ocr_value{case="nan"} NaN',
+            'ocr_value{case="ninf"} -Inf',
+        ])
+
+    def test_collectors_run_at_scrape_time(self):
+        depth = [3]
+        self.registry.collector(lambda: [('ocr_queue_depth', 'gauge', 'Queued jobs', [({'queue': 'jobs'}, depth[0])])])
+
+        @self.registry.collector
+        def broken():
+            raise RuntimeError('down')
+        self.assertIn('ocr_queue_depth{queue="jobs"} 3', self.registry.render())
+        depth[0] = 5
+        self.assertIn('ocr_queue_depth{queue="jobs"} 5', self.registry.render())
+
+    def test_labels_and_names_are_checked(self):
+        requests = self.registry.counter('ocr_requests_total', 'Requests served', ('endpoint',))
+        with self.assertRaises(ValueError):
+            requests.inc(status='200')
+        with self.assertRaises(ValueError):
+            self.registry.gauge('ocr_requests_total', 'Same name')
+
+
+if __name__ == '__main__':
+    unittest.main()
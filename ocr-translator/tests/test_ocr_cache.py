@@ -0,0 +1,56 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.ocr_cache import OCRCache  # noqa: E402
+from services import tesseract_engine  # noqa: E402
+
+
+class TestOCRCacheKey(unittest.TestCase):
+    def setUp(self):
+        self.image = Image.new('L', (40, 20), color=255)
+
+    def test_engine_and_version_are_part_of_the_key(self):
+        key = OCRCache.make_key(self.image, 'eng', '', 'pytesseract/tesseract 5.3.0')
+        self.assertNotEqual(key, OCRCache.make_key(self.image, 'eng', '', 'pytesseract/tesseract 5.4.1'))
+        self.assertNotEqual(key, OCRCache.make_key(self.image, 'eng', '', 'tesserocr 2.6.2/tesseract 5.3.0'))
+        self.assertEqual(key, OCRCache.make_key(self.image.copy(), 'eng', '', 'pytesseract/tesseract 5.3.0'))
+
+    def test_identity_names_the_engine_and_tesseract_version(self):
+        tesseract_engine._identities.clear()
+        self.addCleanup(tesseract_engine._identities.clear)
+        with mock.patch.object(tesseract_engine, '_TESSEROCR_INSTALLED', False), \
+                mock.patch.object(tesseract_engine, 'version', return_value='5.3.0') as version:
+            self.assertEqual(tesseract_engine.identity(), 'pytesseract/tesseract 5.3.0')
+            tesseract_engine.identity('pytesseract')
+        version.assert_called_once()
+
+
+class TestOCRCacheDisk(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_overwrite_replaces_the_old_size(self):
+        cache = OCRCache(disk_dir=self.tmp.name)
+        cache.put('ab' * 32, 'x' * 100)
+        cache.put('ab' * 32, 'y' * 40)
+        self.assertEqual(cache.stats()['disk_bytes'], 40)
+        # a fresh instance counts what is on disk, and agrees
+        self.assertEqual(OCRCache(disk_dir=self.tmp.name).stats()['disk_bytes'], 40)
+
+    def test_disk_tier_is_shared_and_evicted_to_its_cap(self):
+        cache = OCRCache(max_items=1, disk_dir=self.tmp.name, disk_max_bytes=250)
+        for n in range(3):
+            cache.put(f"{n:02d}" * 32, str(n) * 100)
+        self.assertLessEqual(cache.stats()['disk_bytes'], 225)
+        self.assertEqual(OCRCache(disk_dir=self.tmp.name).get('02' * 32), '2' * 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import sys
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.parallel_ocr import ocr_pdf_pages  # noqa: E402
+
+
+def render(blank_pages=()):
+    # stands in for pdf2image.convert_from_path: a black box on every page but the blank ones
+    def convert_from_path(pdf_path, dpi, first_page, last_page, output_folder, paths_only, fmt):
+        rendered = []
+        for number in range(first_page, last_page + 1):
+            image = Image.new('L', (200, 100), color=255)
+            if number not in blank_pages:
+                ImageDraw.Draw(image).rectangle((20, 20, 180, 80), fill=0)
+            if paths_only:
+                path = os.path.join(output_folder, f"page-{number}.{fmt}")
+                image.save(path)
+                rendered.append(path)
+            else:
+                rendered.append(image)
+        return rendered
+    return convert_from_path
+
+
+class OcrPdfTestCase(unittest.TestCase):
+    def run_pages(self, page_count, blank_pages=(), workers=1, ocr=None, **kwargs):
+        with mock.patch('pdf2image.convert_from_path', render(blank_pages)), \
+                mock.patch('services.parallel_ocr.count_pdf_pages', return_value=page_count), \
+                mock.patch('services.parallel_ocr.get_pool', return_value=self.pool), \
+                mock.patch('services.parallel_ocr.tesseract_engine.image_to_string',
+                           side_effect=ocr or (lambda image, lang=None, engine='auto': 'text')):
+            return ocr_pdf_pages('doc.pdf', workers=workers, use_text_layer=False, **kwargs)
+
+    def setUp(self):
+        # threads in place of worker processes, so the patches above apply to them
+        self.pool = ThreadPoolExecutor(max_workers=4)
+        self.addCleanup(self.pool.shutdown)
+
+
+class TestBlankPages(OcrPdfTestCase):
+    def test_blank_pages_skip_the_cache_hash(self):
+        cache = mock.Mock()
+        cache.get.return_value = None
+        pages = self.run_pages(3, blank_pages={1, 3}, cache=cache, blank_ink_ratio=0.0002)
+        self.assertEqual([page['source'] for page in pages], ['blank', 'ocr', 'blank'])
+        self.assertEqual(cache.make_key.call_count, 1)
+
+    def test_blank_pages_never_reach_the_pool(self):
+        cache = mock.Mock()
+        cache.get.return_value = None
+        with mock.patch.object(self.pool, 'submit', wraps=self.pool.submit) as submit:
+            pages = self.run_pages(4, blank_pages={2, 3}, workers=2, cache=cache, blank_ink_ratio=0.0002)
+        self.assertEqual([page['source'] for page in pages], ['ocr', 'blank', 'blank', 'ocr'])
+        self.assertEqual(submit.call_count, 2)
+        self.assertEqual(cache.make_key.call_count, 2)
+
+
+
+def page_of(image):
+    # the rendered page number, read back from the spilled file's name
+    return int(os.path.basename(image.filename).split('-')[1].split('.')[0])
+
+
+class TestOcrPdfPages(OcrPdfTestCase):
+    def test_page_order_is_kept_when_workers_finish_out_of_order(self):
+        def ocr(image, lang=None, engine='auto'):
+            number = page_of(image)
+            time.sleep(0.01 * (5 - number))  # the last page finishes first
+            return f"page {number}"
+        events = []
+        with mock.patch.object(self.pool, 'submit', wraps=self.pool.submit) as submit:
+            pages = self.run_pages(4, workers=4, ocr=ocr,
+                                   on_progress=lambda event, data: events.append((event, data['page'])))
+        self.assertEqual(submit.call_count, 4)
+        self.assertEqual([page['page'] for page in pages], [1, 2, 3, 4])
+        self.assertEqual([page['text'] for page in pages], ['page 1', 'page 2', 'page 3', 'page 4'])
+        self.assertEqual(sorted(page for event, page in events if event == 'page'), [1, 2, 3, 4])
+
+    def test_failing_page_does_not_abort_the_document(self):
+        def ocr(image, lang=None, engine='auto'):
+            if page_of(image) == 2:
+                raise RuntimeError('tesseract crashed')
+            return 'text'
+        events = []
+        pages = self.run_pages(3, workers=2, ocr=ocr,
+                               on_progress=lambda event, data: events.append((event, data)))
+        self.assertEqual([page['source'] for page in pages], ['ocr', 'failed', 'ocr'])
+        self.assertEqual(pages[1]['error'], 'tesseract crashed')
+        self.assertEqual(pages[1]['text'], '')
+        self.assertIn('failed', [data['source'] for event, data in events if event == 'page'])
+
+    def test_failing_page_in_process(self):
+        calls = []
+
+        def ocr(image, lang=None, engine='auto'):
+            calls.append(image)
+            if len(calls) == 1:
+                raise RuntimeError('tesseract crashed')
+            return 'text'
+        pages = self.run_pages(2, ocr=ocr)
+        self.assertEqual([page['source'] for page in pages], ['failed', 'ocr'])
+
+    def test_document_fails_when_no_page_can_be_read(self):
+        def ocr(image, lang=None, engine='auto'):
+            raise RuntimeError('tesseract is not installed')
+        with self.assertRaisesRegex(RuntimeError, 'tesseract is not installed'):
+            self.run_pages(3, workers=2, ocr=ocr)
+
+    def test_single_worker_or_page_runs_in_process(self):
+        for page_count, workers in ((3, 1), (1, 4)):
+            with mock.patch.object(self.pool, 'submit') as submit:
+                pages = self.run_pages(page_count, workers=workers)
+            submit.assert_not_called()
+            self.assertEqual([page['source'] for page in pages], ['ocr'] * page_count)
+
+
+class TestTextLayer(unittest.TestCase):
+    def test_mixed_document_only_ocrs_the_scanned_pages(self):
+        layer = ['Born-digital text on the first page', '', 'Born-digital text on the third page', '12']
+        rendered = []
+        convert = render()
+
+        def convert_from_path(pdf_path, dpi, first_page, last_page, **kwargs):
+            rendered.extend(range(first_page, last_page + 1))
+            return convert(pdf_path, dpi, first_page, last_page, **kwargs)
+        with mock.patch('services.parallel_ocr.extract_text_layer', return_value=layer), \
+                mock.patch('services.parallel_ocr.count_pdf_pages', return_value=4), \
+                mock.patch('pdf2image.convert_from_path', convert_from_path), \
+                mock.patch('services.parallel_ocr.tesseract_engine.image_to_string', return_value='scanned'):
+            pages = ocr_pdf_pages('doc.pdf', workers=1)
+        self.assertEqual([page['source'] for page in pages], ['text_layer', 'ocr', 'text_layer', 'ocr'])
+        self.assertEqual([page['text'] for page in pages], [layer[0], 'scanned', layer[2], 'scanned'])
+        self.assertEqual(sorted(rendered), [2, 4])
+        # one pdftotext call for the whole document: no made-up time per page
+        self.assertEqual([page['ocr_seconds'] for page in pages if page['source'] == 'text_layer'], [0.0, 0.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.pdf_rasterizer import StreamingRasterizer  # noqa: E402
+
+
+class FakeConverter:
+    """Stands in for pdf2image.convert_from_path, counting pages alive at once"""
+
+    def __init__(self):
+        self.calls = []
+        self.alive = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, pdf_path, dpi, first_page, last_page, output_folder, paths_only, fmt):
+        self.calls.append((first_page, last_page))
+        rendered = []
+        for number in range(first_page, last_page + 1):
+            image = Image.new('L', (40, 40), color=255)
+            with self._lock:
+                self.alive += 1
+                self.peak = max(self.peak, self.alive)
+            if paths_only:
+                path = os.path.join(output_folder, f"page-{number}.{fmt}")
+                image.save(path)
+                rendered.append(path)
+            else:
+                rendered.append(image)
+        return rendered
+
+    def released(self):
+        with self._lock:
+            self.alive -= 1
+
+
+class TestStreamingRasterizer(unittest.TestCase):
+    def setUp(self):
+        self.converter = FakeConverter()
+        patcher = mock.patch('pdf2image.convert_from_path', self.converter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def consume(self, rasterizer, delay=0.0):
+        numbers = []
+        with rasterizer:
+            for page in rasterizer:
+                numbers.append(page['page'])
+                time.sleep(delay)
+                rasterizer.release(page)
+                self.converter.released()
+        return numbers
+
+    def test_rendered_pages_never_exceed_the_budget(self):
+        rasterizer = StreamingRasterizer('doc.pdf', window=2, page_budget=3, page_count=10)
+        self.assertEqual(self.consume(rasterizer, delay=0.01), list(range(1, 11)))
+        self.assertLessEqual(self.converter.peak, 3)
+        self.assertEqual(self.converter.calls, [(1, 2), (3, 4), (5, 6), (7, 8), (9, 10)])
+
+    def test_renderer_waits_for_release(self):
+        with StreamingRasterizer('doc.pdf', window=1, page_budget=2, page_count=5) as rasterizer:
+            pages = iter(rasterizer)
+            held = [next(pages), next(pages)]
+            time.sleep(0.2)
+            self.assertEqual(len(self.converter.calls), 2)
+            rasterizer.release(held[0])
+            next(pages)
+            self.assertEqual(len(self.converter.calls), 3)
+
+    def test_windows_follow_the_selected_pages(self):
+        rasterizer = StreamingRasterizer('doc.pdf', window=3, page_count=10, pages=[2, 3, 4, 5, 8, 9])
+        self.assertEqual(self.consume(rasterizer), [2, 3, 4, 5, 8, 9])
+        self.assertEqual(self.converter.calls, [(2, 4), (5, 5), (8, 9)])
+
+    def test_spilled_pages_are_paths_removed_on_release(self):
+        seen = []
+        rasterizer = StreamingRasterizer('doc.pdf', window=2, page_budget=2, page_count=4,
+                                         spill_to_disk=True, temp_dir=self.tmp.name)
+        with rasterizer:
+            for page in rasterizer:
+                self.assertIsNone(page['image'])
+                self.assertTrue(page['path'].endswith('.ppm'))
+                self.assertEqual(StreamingRasterizer.load_image(page).size, (40, 40))
+                seen.append(page['path'])
+                rasterizer.release(page)
+                self.assertFalse(os.path.exists(page['path']))
+        self.assertEqual(len(seen), 4)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_close_stops_the_renderer_and_cleans_up(self):
+        rasterizer = StreamingRasterizer('doc.pdf', window=1, page_budget=1, page_count=50,
+                                         spill_to_disk=True, temp_dir=self.tmp.name)
+        with rasterizer:
+            next(iter(rasterizer))
+        self.assertLess(len(self.converter.calls), 50)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_render_errors_reach_the_consumer(self):
+        with mock.patch('pdf2image.convert_from_path', side_effect=RuntimeError('poppler failed')):
+            with self.assertRaises(RuntimeError):
+                self.consume(StreamingRasterizer('doc.pdf', page_count=2))
+
+
+if __name__ == '__main__':
+    unittest.main()
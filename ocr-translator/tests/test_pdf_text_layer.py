@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.pdf_text_layer import extract_text_layer, has_text_layer  # noqa: E402
+
+
+def pdftotext(stdout):
+    # stands in for subprocess.run of pdftotext, printing ``stdout``
+    return mock.patch('services.pdf_text_layer.subprocess.run',
+                      return_value=subprocess.CompletedProcess([], 0, stdout=stdout.encode('utf-8')))
+
+
+class TestExtractTextLayer(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch('services.pdf_text_layer.shutil.which', return_value='/usr/bin/pdftotext')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pages_are_split_on_form_feeds(self):
+        with pdftotext('first page\fsecond page\f\fafter a scan\f'):
+            self.assertEqual(extract_text_layer('doc.pdf', 4), ['first page', 'second page', '', 'after a scan'])
+
+    def test_missing_trailing_pages_are_empty(self):
+        with pdftotext('only page'):
+            self.assertEqual(extract_text_layer('doc.pdf', 3), ['only page', '', ''])
+
+    def test_no_pdftotext(self):
+        with mock.patch('services.pdf_text_layer.shutil.which', return_value=None):
+            self.assertIsNone(extract_text_layer('doc.pdf', 1))
+
+    def test_pdftotext_failure(self):
+        error = subprocess.CalledProcessError(1, 'pdftotext')
+        with mock.patch('services.pdf_text_layer.subprocess.run', side_effect=error):
+            self.assertIsNone(extract_text_layer('doc.pdf', 1))
+
+
+class TestHasTextLayer(unittest.TestCase):
+    def test_threshold_counts_alphanumerics_only(self):
+        self.assertTrue(has_text_layer('a' * 20))
+        self.assertFalse(has_text_layer('a' * 19))
+        # page numbers, rules and whitespace left on a scanned page don't count
+        self.assertFalse(has_text_layer('-' * 40 + '\n \t 12 ' + '.' * 40))
+        self.assertTrue(has_text_layer('नमस्ते दुनिया ' * 3))
+
+    def test_custom_threshold(self):
+        self.assertTrue(has_text_layer('abc', min_chars=3))
+        self.assertFalse(has_text_layer('abc', min_chars=4))
+
+
+if __name__ == '__main__':
+    unittest.main()
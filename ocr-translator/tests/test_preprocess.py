@@ -0,0 +1,85 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.preprocess import adaptive_binarize, ink_ratio, is_blank  # noqa: E402
+
+
+def reference_binarize(gray, window, sensitivity=0.15):
+    # straightforward int64 box sums, the result adaptive_binarize must match
+    height, width = gray.shape
+    padded = np.pad(gray.astype(np.int64), ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    half = window // 2
+    result = np.empty_like(gray)
+    for y in range(height):
+        top, bottom = max(y - half, 0), min(y + half + 1, height)
+        for x in range(width):
+            left, right = max(x - half, 0), min(x + half + 1, width)
+            total = padded[bottom, right] - padded[top, right] - padded[bottom, left] + padded[top, left]
+            count = (bottom - top) * (right - left)
+            ink = int(gray[y, x]) * count * 100 <= total * int(100 * (1 - sensitivity))
+            result[y, x] = 0 if ink else 255
+    return result
+
+
+class TestAdaptiveBinarize(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_matches_reference(self):
+        gray = self.rng.integers(0, 256, (45, 60), dtype=np.uint8)
+        np.testing.assert_array_equal(adaptive_binarize(gray, window=15), reference_binarize(gray, 15))
+
+    def test_large_window_matches_reference(self):
+        # too large for uint32 sums, computed in uint64 instead
+        gray = self.rng.integers(0, 256, (20, 25), dtype=np.uint8)
+        np.testing.assert_array_equal(adaptive_binarize(gray, window=501), reference_binarize(gray, 501))
+
+    def test_shadowed_text_survives(self):
+        gray = np.tile(np.linspace(250, 90, 200).astype(np.uint8), (60, 1))
+        gray[28:32, ::10] //= 3
+        binary = adaptive_binarize(gray)
+        self.assertEqual(binary.dtype, np.uint8)
+        self.assertTrue((binary[28:32, ::10] == 0).all())
+        self.assertGreater((binary[:20] == 255).mean(), 0.95)
+
+
+def a4_page(lines=40, fill=0, background=255):
+    # 300 dpi A4 with lines of small print
+    page = Image.new('L', (2480, 3508), color=background)
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=28)
+    for line in range(lines):
+        draw.text((200, 200 + line * 75), 'The quick brown fox jumps over the lazy dog', fill=fill, font=font)
+    return page
+
+
+class TestBlankPages(unittest.TestCase):
+    def test_empty_page_is_blank(self):
+        self.assertEqual(ink_ratio(a4_page(lines=0)), 0.0)
+        self.assertTrue(is_blank(a4_page(lines=0)))
+
+    def test_noisy_empty_scan_is_blank(self):
+        noise = np.random.default_rng(0).normal(235, 12, (3508, 2480))
+        self.assertTrue(is_blank(Image.fromarray(noise.clip(0, 255).astype(np.uint8))))
+
+    def test_light_gray_print_is_not_blank(self):
+        for fill in (140, 200):
+            self.assertFalse(is_blank(a4_page(fill=fill)), f"text at gray {fill}")
+
+    def test_ink_is_relative_to_the_paper(self):
+        # dark print on gray recycled paper, and the same print on white, read alike
+        on_gray = ink_ratio(a4_page(fill=60, background=190))
+        on_white = ink_ratio(a4_page(fill=60))
+        self.assertAlmostEqual(on_gray, on_white, delta=on_white * 0.5)
+
+    def test_single_line_is_not_blank(self):
+        self.assertFalse(is_blank(a4_page(lines=1, fill=120)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import sys
+import threading
+import unittest
+from email.utils import formatdate
+from unittest import mock
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.rate_limiter import (MAX_RETRY_AFTER, AdaptiveRateLimiter, ProviderError,  # noqa: E402
+                                   RetryBudget, parse_retry_after, send_with_retries)
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def close(self):
+        pass
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    def test_delta_seconds(self):
+        self.assertEqual(parse_retry_after('7'), 7.0)
+        self.assertEqual(parse_retry_after('1.5'), 1.5)
+
+    def test_http_date(self):
+        import time
+        self.assertAlmostEqual(parse_retry_after(formatdate(time.time() + 30, usegmt=True)), 30, delta=2)
+
+    def test_clamped(self):
+        self.assertEqual(parse_retry_after('-5'), 0.0)
+        self.assertEqual(parse_retry_after('86400'), MAX_RETRY_AFTER)
+
+    def test_missing_or_garbage(self):
+        for value in (None, '', 'soon'):
+            self.assertIsNone(parse_retry_after(value))
+
+
+class TestRetryBudget(unittest.TestCase):
+    def test_spend_until_exhausted(self):
+        budget = RetryBudget(2)
+        self.assertEqual([budget.spend() for _ in range(3)], [True, True, False])
+        self.assertEqual(budget.retries, 2)
+
+    def test_thread_safe(self):
+        budget = RetryBudget(100)
+        spent = []
+        threads = [threading.Thread(target=lambda: spent.extend(budget.spend() for _ in range(50)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(spent.count(True), 100)
+
+    def test_counts_untranslated(self):
+        budget = RetryBudget(0)
+        budget.record_untranslated()
+        budget.record_untranslated(3)
+        self.assertEqual(budget.untranslated, 4)
+
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+    def test_backoff_halves_and_success_recovers(self):
+        limiter = AdaptiveRateLimiter(rate=100, burst=1, min_rate=10)
+        limiter.backoff(0)
+        self.assertEqual(limiter.rate, 50)
+        for _ in range(3):
+            limiter.backoff(0)
+        self.assertEqual(limiter.rate, 10)
+        limiter.success()
+        self.assertEqual(limiter.rate, 15)
+
+
+class TestSendWithRetries(unittest.TestCase):
+    def setUp(self):
+        self.limiter = AdaptiveRateLimiter(rate=1000, burst=10)
+        patcher = mock.patch('services.rate_limiter.time.sleep')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sender(self, *outcomes):
+        outcomes = list(outcomes)
+
+        def send():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        return send
+
+    def test_retries_throttled_calls_within_budget(self):
+        budget = RetryBudget(3)
+        send = self.sender(FakeResponse(429, {'Retry-After': '0'}), requests.Timeout('slow'), FakeResponse(200))
+        self.assertEqual(send_with_retries(send, self.limiter, budget).status_code, 200)
+        self.assertEqual(budget.retries, 2)
+        self.assertEqual(self.limiter.backoffs, 2)
+
+    def test_client_errors_are_returned_not_retried(self):
+        budget = RetryBudget(3)
+        self.assertEqual(send_with_retries(self.sender(FakeResponse(400)), self.limiter, budget).status_code, 400)
+        self.assertEqual(budget.retries, 0)
+
+    def test_raises_once_the_budget_is_spent(self):
+        send = self.sender(FakeResponse(503), FakeResponse(503, {'Retry-After': '0'}))
+        with self.assertRaises(ProviderError) as raised:
+            send_with_retries(send, self.limiter, RetryBudget(1))
+        self.assertEqual((raised.exception.status, raised.exception.retry_after), (503, 0.0))
+        self.assertTrue(raised.exception.retryable)
+
+    def test_no_budget_no_retries(self):
+        with self.assertRaises(ProviderError):
+            send_with_retries(self.sender(FakeResponse(502)), self.limiter)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.result_store import ResultStore, SingleFlight, hash_upload  # noqa: E402
+
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ResultStore(os.path.join(self.tmp.name, 'results'), max_bytes=10_000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def put(self, key, size=1000, **kwargs):
+        return self.store.put(key, BytesIO(b'x' * size), '.pdf', {'X-Untranslated-Segments': '0'}, **kwargs)
+
+    def age(self, key, seconds):
+        # pretend the entry was last used `seconds` ago
+        then = time.time() - seconds
+        for path in (self.store._meta_path(key), self.store._meta_path(key).with_suffix('.pdf')):
+            os.utime(path, (then, then))
+
+    def test_hash_upload_depends_on_bytes_and_settings(self):
+        path = os.path.join(self.tmp.name, 'upload.pdf')
+        with open(path, 'wb') as fh:
+            fh.write(b'%PDF')
+        self.assertEqual(hash_upload(path, 'es', 'pdf'), hash_upload(BytesIO(b'%PDF'), 'es', 'pdf'))
+        self.assertNotEqual(hash_upload(path, 'es', 'pdf'), hash_upload(path, 'fr', 'pdf'))
+
+    def test_put_then_get(self):
+        path = self.put('ab' * 32)
+        stored_path, headers = self.store.get('ab' * 32)
+        self.assertEqual(stored_path, path)
+        self.assertEqual(headers, {'X-Untranslated-Segments': '0'})
+        self.assertIsNone(self.store.get('cd' * 32))
+        self.assertEqual(self.store.stats()['hits'], 1)
+
+    def test_rendered_file_is_moved_in(self):
+        rendered = os.path.join(self.tmp.name, 'out.pdf')
+        with open(rendered, 'wb') as fh:
+            fh.write(b'pdf')
+        path = self.store.put('ab' * 32, rendered, '.pdf', {})
+        self.assertFalse(os.path.exists(rendered))
+        with open(path, 'rb') as fh:
+            self.assertEqual(fh.read(), b'pdf')
+
+    def test_unreusable_entry_is_a_miss(self):
+        path = self.put('ab' * 32, reusable=False)
+        self.assertTrue(os.path.exists(path))
+        self.assertIsNone(self.store.get('ab' * 32))
+
+    def test_eviction_drops_least_recently_used(self):
+        keys = [f"{i:02d}" * 32 for i in range(8)]
+        for i, key in enumerate(keys):
+            self.put(key)
+            self.age(key, 3600 - i)
+        self.store.get(keys[0])  # used just now
+        self.put('ff' * 32, size=4000)
+        self.assertLessEqual(self.store.stats()['disk_bytes'], 10_000)
+        self.assertIsNotNone(self.store.get(keys[0]))
+        self.assertIsNone(self.store.get(keys[1]))
+        self.assertIsNotNone(self.store.get('ff' * 32))
+
+    def test_recently_used_entries_are_not_evicted(self):
+        # every entry was just handed out, so the store runs over its cap rather than pull them
+        keys = [f"{i:02d}" * 32 for i in range(12)]
+        paths = [self.put(key) for key in keys]
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+        self.assertGreater(self.store.stats()['disk_bytes'], 10_000)
+
+
+class TestSingleFlight(unittest.TestCase):
+    def run_together(self, flight, fn, callers=4, **kwargs):
+        # the first caller blocks in fn until every other caller is waiting on it
+        results, errors = [], []
+
+        def call():
+            try:
+                results.append(flight.do('key', fn, **kwargs))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        return results, errors
+
+    def gated(self, flight, callers, results):
+        calls = []
+        results = iter(results)
+
+        def fn():
+            calls.append(1)
+            if len(calls) == 1:
+                while flight.coalesced < callers - 1:
+                    time.sleep(0.01)
+            result = next(results)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return fn, calls
+
+    def test_concurrent_calls_share_one_run(self):
+        flight = SingleFlight()
+        fn, calls = self.gated(flight, 4, ['done'])
+        results, errors = self.run_together(flight, fn)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True])
+        self.assertEqual({result for result, _ in results}, {'done'})
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_error_is_shared(self):
+        flight = SingleFlight()
+        fn, calls = self.gated(flight, 3, [ValueError('bad input')])
+        results, errors = self.run_together(flight, fn, callers=3)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(errors), 3)
+
+    def test_retry_on_error_is_not_shared(self):
+        flight = SingleFlight()
+        fn, calls = self.gated(flight, 3, [LookupError('busy'), 'done', 'done'])
+        results, errors = self.run_together(flight, fn, callers=3, retry_on=(LookupError,))
+        self.assertEqual(len(errors), 1)  # only the caller that ran into it
+        self.assertEqual([result for result, _ in results], ['done', 'done'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.text_segmenter import _split_long, join_segments, segment_text  # noqa: E402
+
+
+def roundtrip(text, max_chars=1000):
+    pieces = segment_text(text, max_chars)
+    return join_segments([segment for segment, _ in pieces], [gap for _, gap in pieces])
+
+
+class TestSegmentText(unittest.TestCase):
+    def test_splits_on_sentences(self):
+        pieces = segment_text('Hello there. How are you? Fine!', 1000)
+        self.assertEqual([segment for segment, _ in pieces], ['Hello there.', 'How are you?', 'Fine!'])
+
+    def test_abbreviations_and_initials_do_not_end_sentences(self):
+        pieces = segment_text('Dr. Smith met J. Doe, e.g. at noon. Then left.', 1000)
+        self.assertEqual([segment for segment, _ in pieces], ['Dr. Smith met J. Doe, e.g. at noon.', 'Then left.'])
+
+    def test_lowercase_continuation_is_not_a_break(self):
+        pieces = segment_text('Version 2. is out. Next one.', 1000)
+        self.assertEqual(pieces[0][0], 'Version 2. is out.')
+
+    def test_same_sentence_same_segment_whatever_surrounds_it(self):
+        first = [segment for segment, _ in segment_text('Intro. The cat sat.', 1000)]
+        second = [segment for segment, _ in segment_text('Other stuff here!\n\nThe cat sat.', 1000)]
+        self.assertIn('The cat sat.', first)
+        self.assertIn('The cat sat.', second)
+
+    def test_cjk_and_devanagari_punctuation(self):
+        self.assertEqual(len(segment_text('你好。 再见！', 1000)), 2)
+        self.assertEqual(len(segment_text('नमस्ते। धन्यवाद।', 1000)), 2)
+
+    def test_whitespace_is_restored(self):
+        for text in ['  Leading space. Then text.\n\n\nNew para.  ', 'No punctuation at all', '', '\n\n',
+                     'One.\n   \nTwo.\tThree?  Four']:
+            self.assertEqual(roundtrip(text), text)
+
+    def test_long_sentences_are_split_within_the_limit(self):
+        text = ' '.join(['word'] * 50) + '.'
+        pieces = segment_text(text, 40)
+        self.assertTrue(all(len(segment) <= 40 for segment, _ in pieces))
+        self.assertEqual(roundtrip(text, 40), text)
+
+
+class TestSplitLong(unittest.TestCase):
+    def test_short_segment_is_untouched(self):
+        self.assertEqual(_split_long('short', 10), [('short', '')])
+
+    def test_cuts_at_whitespace_never_mid_word(self):
+        self.assertEqual(_split_long('alpha beta gamma', 11), [('alpha beta', ' '), ('gamma', '')])
+
+    def test_unbreakable_word_is_cut_at_the_limit(self):
+        self.assertEqual(_split_long('x' * 25, 10), [('x' * 10, ''), ('x' * 10, ''), ('x' * 5, '')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,16 @@
+import os
+import sys
 import unittest
-from deep_translator import GoogleTranslator
 from typing import Dict, Tuple
-import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.http_clients import get_session  # noqa: E402
+from services.rate_limiter import RetryBudget  # noqa: E402
+from services.translation_providers import GoogleProvider  # noqa: E402
+
+# The provider's rate limiter paces requests and backs off on 429s, so the
+# tests no longer need fixed sleeps between calls
+PROVIDER = GoogleProvider(get_session('google', 2), concurrency=2, rate=2)
 
 class TestTranslationAccuracy(unittest.TestCase):    
     # Test cases: (source_text, expected_translation, language_code, language_name)
@@ -29,7 +38,7 @@ class TestTranslationAccuracy(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures before each test method."""
-        self.translator = GoogleTranslator()
+        self.budget = RetryBudget(5)
         self.threshold = 0.7  # Minimum similarity score to consider translation acceptable (0-1)
     
     def _get_similarity(self, text1: str, text2: str) -> float:
@@ -58,7 +67,7 @@ class TestTranslationAccuracy(unittest.TestCase):
         """Test if translation from source_text to target_lang matches expected_translation."""
         try:
             # Translate the text
-            translated = GoogleTranslator(source='auto', target=target_lang).translate(source_text)
+            translated = PROVIDER.translate_batch([source_text], target_lang, budget=self.budget)[0]
             
             # Calculate similarity between expected and actual translation
             similarity = self._get_similarity(expected_translation, translated)
@@ -80,7 +89,7 @@ class TestTranslationAccuracy(unittest.TestCase):
             
             # Verify back-translation for additional validation
             if target_lang != 'en':
-                back_translated = GoogleTranslator(source=target_lang, target='en').translate(translated)
+                back_translated = PROVIDER.translate_batch([translated], 'en', target_lang, budget=self.budget)[0]
                 back_similarity = self._get_similarity(source_text.lower(), back_translated.lower())
                 print(f"Back to EN:  {back_translated}")
                 print(f"Back Similarity: {back_similarity:.2f}")
@@ -102,7 +111,6 @@ class TestTranslationAccuracy(unittest.TestCase):
                 self._test_translation_accuracy(
                     source_text, expected_translation, lang_code, lang_name
                 )
-                time.sleep(1)  # Add delay to avoid rate limiting
 
 if __name__ == "__main__":
     unittest.main(argv=['first-arg-is-ignored'], exit=False)
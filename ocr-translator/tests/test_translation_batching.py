@@ -0,0 +1,154 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.circuit_breaker import ProviderRouter  # noqa: E402
+from services.rate_limiter import ProviderError, RetryBudget  # noqa: E402
+from services.translation_batching import (Translations, get_executor, pack_batches,  # noqa: E402
+                                           translate_in_batches)
+
+
+class FakeProvider:
+    """Upper-cases texts; a batch containing a 'bad' segment fails like a mangled separator"""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.calls.append(list(texts))
+        if any('bad' in text for text in texts):
+            raise ValueError('separators lost in translation')
+        return Translations.by('fake', [text.upper() for text in texts])
+
+
+class TestPackBatches(unittest.TestCase):
+    def test_respects_item_limit(self):
+        self.assertEqual(pack_batches(['a'] * 5, max_items=2, max_chars=100), [[0, 1], [2, 3], [4]])
+
+    def test_respects_char_limit_with_separators(self):
+        # 4 + 3 + 4 = 11 chars with the separator, over the limit of 10
+        self.assertEqual(pack_batches(['aaaa', 'bbbb'], max_items=10, max_chars=10, separator_chars=3),
+                         [[0], [1]])
+        self.assertEqual(pack_batches(['aaaa', 'bbbb'], max_items=10, max_chars=11, separator_chars=3),
+                         [[0, 1]])
+
+    def test_oversized_segment_gets_its_own_batch(self):
+        self.assertEqual(pack_batches(['a', 'x' * 50, 'b'], max_items=10, max_chars=10), [[0], [1], [2]])
+
+    def test_empty(self):
+        self.assertEqual(pack_batches([], max_items=10, max_chars=10), [])
+
+
+class TestTranslateInBatches(unittest.TestCase):
+    def test_one_call_per_batch_and_order_kept(self):
+        provider = FakeProvider()
+        segments = ['one', '', 'two', '  ', 'three']
+        translated = translate_in_batches(segments, provider, max_items=2, max_chars=100)
+        self.assertEqual(translated, ['ONE', '', 'TWO', '  ', 'THREE'])
+        self.assertEqual(translated.providers, ['fake', None, 'fake', None, 'fake'])
+        self.assertEqual(len(provider.calls), 2)
+
+    def test_failed_batch_is_split_in_halves(self):
+        provider = FakeProvider()
+        segments = [f"s{i}" for i in range(16)]
+        segments[5] = 'bad'
+        budget = RetryBudget(20)
+        translated = translate_in_batches(segments, provider, max_items=16, max_chars=1000, budget=budget)
+        self.assertEqual(translated[5], 'bad')
+        self.assertEqual(translated[4], 'S4')
+        self.assertEqual(budget.untranslated, 1)
+        # 1 + 2 per level down to the bad segment (16 -> 8 -> 4 -> 2 -> 1), not 1 + 16
+        self.assertEqual(len(provider.calls), 9)
+        self.assertEqual(budget.retries, 4)
+
+    def test_splitting_stops_when_budget_is_spent(self):
+        provider = FakeProvider()
+        segments = ['bad'] + [f"s{i}" for i in range(7)]
+        budget = RetryBudget(1)
+        translated = translate_in_batches(segments, provider, max_items=8, max_chars=1000, budget=budget)
+        self.assertEqual(len(provider.calls), 3)  # the batch, then its two halves
+        self.assertEqual(translated[4:], ['S3', 'S4', 'S5', 'S6'])
+        self.assertEqual(budget.untranslated, 4)
+
+
+class TestProviderErrors(unittest.TestCase):
+    def throttled(self, failures):
+        calls = []
+
+        def translate_many(texts):
+            calls.append(list(texts))
+            if len(calls) <= failures:
+                raise ProviderError('HTTP 503', 503, retry_after=0.01)
+            return [text.upper() for text in texts]
+        return translate_many, calls
+
+    def test_throttled_batch_is_not_retried_again_or_split(self):
+        # the provider already retried it under its rate limiter (send_with_retries)
+        translate_many, calls = self.throttled(failures=1)
+        budget = RetryBudget(5)
+        with mock.patch('time.sleep') as sleep:
+            translated = translate_in_batches(['a', 'b'], translate_many, max_items=10, max_chars=100, budget=budget)
+        self.assertEqual(translated, ['a', 'b'])
+        self.assertEqual(calls, [['a', 'b']])
+        sleep.assert_not_called()
+        self.assertEqual((budget.retries, budget.untranslated), (0, 2))
+
+    def test_rejected_batch_is_split(self):
+        calls = []
+
+        def translate_many(texts):
+            calls.append(list(texts))
+            if len(texts) > 1:
+                raise ProviderError('HTTP 400', 400)
+            return [text.upper() for text in texts]
+        translated = translate_in_batches(['a', 'b'], translate_many, max_items=10, max_chars=100,
+                                          budget=RetryBudget(5))
+        self.assertEqual(translated, ['A', 'B'])
+        self.assertEqual(len(calls), 3)
+
+    def test_open_circuit_fails_fast(self):
+        provider = mock.Mock(max_items=10, max_chars=100)
+        provider.name = 'google'
+        router = ProviderRouter([provider], failure_threshold=1, open_seconds=60)
+        router.breakers['google'].record_failure(0.1)
+        budget = RetryBudget(20)
+        with mock.patch('time.sleep') as sleep:
+            translated = translate_in_batches(['a', 'b'], lambda batch: router.call(lambda p: list(batch)),
+                                              max_items=10, max_chars=100, budget=budget)
+        self.assertEqual(translated, ['a', 'b'])
+        sleep.assert_not_called()
+        self.assertEqual((budget.retries, budget.untranslated), (0, 2))
+
+
+class TestSharedExecutor(unittest.TestCase):
+    def test_documents_share_one_pool_within_their_concurrency(self):
+        lock = threading.Lock()
+        state = {'in_flight': 0, 'peak': 0, 'threads': set()}
+
+        def translate_many(texts):
+            with lock:
+                state['in_flight'] += 1
+                state['peak'] = max(state['peak'], state['in_flight'])
+                state['threads'].add(threading.current_thread().name)
+            time.sleep(0.01)
+            with lock:
+                state['in_flight'] -= 1
+            return list(texts)
+
+        segments = [f"s{i}" for i in range(12)]
+        first = translate_in_batches(segments, translate_many, max_items=1, max_chars=100, concurrency=3)
+        self.assertEqual(first, segments)
+        self.assertLessEqual(state['peak'], 3)
+        translate_in_batches(segments, translate_many, max_items=1, max_chars=100, concurrency=3)
+        self.assertTrue(all(name.startswith('translate') for name in state['threads']))
+        self.assertIs(get_executor(), get_executor())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.translation_batching import Translations  # noqa: E402
+from services.translation_memory import TranslationMemory  # noqa: E402
+
+
+class TestTranslationMemory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.memory = TranslationMemory(os.path.join(self.tmp.name, 'memory.sqlite3'), max_entries=100)
+        self.sent = []
+
+    def tearDown(self):
+        self.memory._conn.close()
+        self.tmp.cleanup()
+
+    def provider(self, name):
+        def translate_missing(texts):
+            self.sent.extend(texts)
+            return Translations.by(name, [f"{name}:{text}" for text in texts])
+        return translate_missing
+
+    def stored_providers(self):
+        return {entry['source_text']: entry['provider'] for entry in self.memory.entries()}
+
+    def test_only_missing_segments_are_sent_once(self):
+        first = self.memory.translate(['Hello.', 'World.'], self.provider('deepl'), 'deepl', 'es')
+        self.assertEqual(first, ['deepl:Hello.', 'deepl:World.'])
+        self.sent.clear()
+        second = self.memory.translate(['Hello.', 'New.', ' New. ', ''], self.provider('deepl'), 'deepl', 'es')
+        self.assertEqual(self.sent, ['New.'])
+        self.assertEqual(second, ['deepl:Hello.', 'deepl:New.', 'deepl:New.', ''])
+
+    def test_keyed_on_the_provider_that_answered(self):
+        route = ['deepl', 'libretranslate']
+        self.memory.translate(['Hello.'], self.provider('libretranslate'), route, 'es')
+        self.assertEqual(self.stored_providers(), {'Hello.': 'libretranslate'})
+        # the fallback's entry is still found through the route
+        self.sent.clear()
+        self.assertEqual(self.memory.translate(['Hello.'], self.provider('deepl'), route, 'es'),
+                         ['libretranslate:Hello.'])
+        self.assertEqual(self.sent, [])
+
+    def test_earlier_provider_wins_on_lookup(self):
+        route = ['deepl', 'libretranslate']
+        self.memory.translate(['Hello.'], self.provider('libretranslate'), 'libretranslate', 'es')
+        self.memory.translate(['Hello.'], self.provider('deepl'), 'deepl', 'es')
+        self.assertEqual(self.memory.translate(['Hello.'], self.provider('deepl'), route, 'es'), ['deepl:Hello.'])
+
+    def test_untagged_results_use_the_first_provider(self):
+        self.memory.translate(['Hello.'], lambda texts: [f"x:{text}" for text in texts], ['deepl', 'libre'], 'es')
+        self.assertEqual(self.stored_providers(), {'Hello.': 'deepl'})
+
+    def test_untranslated_segments_are_not_stored(self):
+        self.memory.translate(['Hello.'], lambda texts: list(texts), 'deepl', 'es')
+        self.assertEqual(self.memory.stats()['entries'], 0)
+
+    def test_eviction_keeps_the_cap(self):
+        for start in range(0, 150, 50):
+            self.memory.translate([f"Segment {i}." for i in range(start, start + 50)],
+                                  self.provider('deepl'), 'deepl', 'es')
+        self.assertLessEqual(self.memory.stats()['entries'], 100)
+        self.assertGreater(self.memory.stats()['evicted'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
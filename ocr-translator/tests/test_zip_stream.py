@@ -0,0 +1,63 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from services.zip_stream import stream_zip  # noqa: E402
+
+
+class TestStreamZip(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_file(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as fh:
+            fh.write(data)
+        return path
+
+    def test_archive_round_trips(self):
+        text = b'translated text\n' * 1000
+        pdf = os.urandom(200 * 1024)
+        members = [('a.txt', self.make_file('a.txt', text)), ('b.pdf', self.make_file('b.pdf', pdf)),
+                   ('summary.json', b'{"files": 2}')]
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(stream_zip(members))))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.read('a.txt'), text)
+        self.assertEqual(archive.read('b.pdf'), pdf)
+        self.assertEqual(archive.read('summary.json'), b'{"files": 2}')
+        self.assertEqual(archive.getinfo('a.txt').compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(archive.getinfo('b.pdf').compress_type, zipfile.ZIP_STORED)
+
+    def test_yields_incrementally(self):
+        path = self.make_file('big.pdf', os.urandom(512 * 1024))
+        chunks = list(stream_zip([('big.pdf', path)], chunk_size=64 * 1024))
+        self.assertGreater(len(chunks), 4)
+        self.assertTrue(all(len(chunk) <= 128 * 1024 for chunk in chunks))
+
+    def test_members_are_pulled_lazily(self):
+        pulled = []
+
+        def members():
+            for name in ('one.txt', 'two.txt'):
+                pulled.append(name)
+                yield name, name.encode()
+        stream = stream_zip(members())
+        next(stream)
+        self.assertEqual(pulled, ['one.txt'])
+        list(stream)
+        self.assertEqual(pulled, ['one.txt', 'two.txt'])
+
+    def test_empty_archive(self):
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(stream_zip([]))))
+        self.assertEqual(archive.namelist(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()